@@ -1,652 +1,792 @@
+import hashlib
+import io
+import json
+import sqlite3
+import tempfile
+import warnings
+from pathlib import Path
+
 import pandas as pd
 import streamlit as st
-from scipy.spatial.distance import euclidean
-from datetime import datetime, timedelta
-import plotly.express as px
-import random
 
-# ------------------------------------------------------------
-# 0) VARIABLES AUXILIARES POR DEFECTO (se sobrescribirán desde el sidebar)
-# ------------------------------------------------------------
-tiempo_carga = 1      # minutos
-tiempo_descarga = 1   # minutos
+from simulacion import ALMACEN, ConfigSimulacion, calcular_kpis
+from simulacion.motor import MODOS_COMPRA, NUCLEOS, PLANIFICADORES
+from simulacion.almacenes import leer_almacenes
+from simulacion.zonas import METODOS_ZONA, comparar_zonificacion
+from simulacion.barrido import (
+    PARAMETROS_BARRIDO,
+    combinaciones,
+    ejecutar_barrido,
+    leer_valores,
+)
+from simulacion.exportar import exportar_zip
+from simulacion.cache import (
+    CacheDisco,
+    CacheEnCapas,
+    CacheLRU,
+    clave_config,
+)
+from simulacion.incremental import simular_o_reanudar
+from simulacion.perfil import Perfilador
+from simulacion.escenarios import (
+    COLUMNAS_DEMANDAS,
+    COLUMNAS_POLIGONOS,
+    COLUMNAS_PROVEEDORES,
+    cargar_tabla,
+    crear_demandas_completo,
+    crear_poligonos_completo,
+    crear_proveedores_completo,
+    leer_demandas,
+    leer_poligonos,
+    leer_proveedores,
+)
+from simulacion.graficos import (
+    UMBRAL_DETALLE,
+    generar_gantt_rutas,
+    generar_gantt_webgl,
+    generar_resumen_diario,
+)
+
+
+# Cada sección es un fragmento (st.fragment): al tocar uno de sus widgets se
+# vuelve a ejecutar solo esa sección, no todo el script. Cada ejecución
+# completa lleva un número para que un fragmento sepa si corre solo.
+st.session_state["ejecucion_app"] = st.session_state.get("ejecucion_app", 0) + 1
+
+
+def publicar(nombre, valor):
+    """
+    Devuelve `valor`, lo que produce un fragmento de entrada. Si el fragmento
+    corrió solo y `valor` cambió, se ejecuta la app completa para que el
+    resto de las secciones lo use. Se compara el texto JSON, como en
+    `clave_config`: reordenar las filas de una tabla también es un cambio.
+    """
+    ejecucion = st.session_state["ejecucion_app"]
+    solo = st.session_state.get(f"{nombre}_ejecucion") == ejecucion
+    texto = json.dumps(valor, ensure_ascii=False, default=str)
+    cambio = st.session_state.get(f"{nombre}_texto") != texto
+    st.session_state[nombre] = valor
+    st.session_state[f"{nombre}_texto"] = texto
+    st.session_state[f"{nombre}_ejecucion"] = ejecucion
+    if solo and cambio:
+        st.rerun(scope="app")
+    return valor
+
 
 # ------------------------------------------------------------
-# 1) SELECCIÓN DE ESCENARIO (SIN session_state)
+# 1) SELECCIÓN DE ESCENARIO
 # ------------------------------------------------------------
 st.title("🌳 Simulación de Reforestación y Logística")
 
 st.markdown(
     """
-    Elige un escenario prefabricado o deja “Ninguno” para ingresar tus propios datos.
+    Elige un escenario prefabricado, importa tus tablas desde archivos CSV o
+    Parquet, o deja “Ninguno” para ingresar tus propios datos.
     """
 )
 
 escenario = st.selectbox(
     "Selecciona escenario",
-    ["Ninguno", "Ejemplo Completo"]
+    ["Ninguno", "Ejemplo Completo", "Importar archivos"]
 )
 
 # ------------------------------------------------------------
-# 2) FUNCIONES PARA CREAR EL ESCENARIO COMPLETO
+# 2) TABLAS INICIALES SEGÚN EL ESCENARIO
 # ------------------------------------------------------------
 
-def crear_poligonos_completo():
-    # IDs dados: 1, 3, 4, 5, 20, 23, 24, 18, 17, 16, 19, 25, 26
-    # Coordenadas arbitrarias para cada polígono (puedes ajustar si tienes datos reales)
-    coords = {
-        1:  ( 0,  0),
-        3:  (10,  0),
-        4:  (20,  0),
-        5:  (30,  0),
-        20: ( 0, 10),
-        23: (10, 10),
-        24: (20, 10),
-        19: (40, 10),
-        25: (50, 10),
-        26: (60, 10),
-        18: (20, 20),
-        17: (30, 20),
-        16: (40, 20),
-
-    }
-    df = pd.DataFrame([
-        {"Polígono": pid, "X": x, "Y": y}
-        for pid, (x, y) in coords.items()
-    ])
-    return df
-
-def crear_demandas_completo():
-    # Hectáreas por polígono
-    hectareas = {
-        1:  5.40,
-        3:  8.00,
-        4:  8.00,
-        5:  7.56,
-        20: 1.38,
-        23: 5.53,
-        24: 5.64,
-        18: 7.11,
-        17: 6.11,
-        16: 5.64,
-        19: 4.92,
-        25: 5.05,
-        26: 4.75,
-    }
-    # Densidad por hectárea (unidades/ha) de cada especie
-    densidad = {
-        "Lechugilla":            33,
-        "Maguey Verde Salmiana": 157,
-        "Maguey azul":           33,
-        "Maguey Verde Striata":  33,
-        "Cuijo cantabriginesis":  39,
-        "Cuijo engelmani":       30,
-        "Tapón":                 58,
-        "Cardón":                51,
-        "Mezquite":              69,
-        "palma china":           21
-    }
-
-    filas = []
-    for pid, ha in hectareas.items():
-        for esp, d in densidad.items():
-            demanda_unidades = int(round(ha * d))
-            filas.append({
-                "Especie":   esp,
-                "Polígono":  pid,
-                "Demanda":   demanda_unidades
-            })
-    df = pd.DataFrame(filas)
-    return df
-
-def crear_proveedores_completo():
-    # Cada proveedor y las especies que ofrece con su costo; max_oferta = 10000 (genérico)
-    filas = []
-    # Vivero: Mezquite a 26.5, palma china a 26
-    filas.extend([
-        {"Proveedor": "Vivero", "Especie": "Mezquite",    "Costo": 26.5, "Max_oferta": 10000},
-        {"Proveedor": "Vivero", "Especie": "palma china", "Costo": 26.0, "Max_oferta": 10000},
-    ])
-    # Moctezuma: Maguey azul y Maguey Verde Striata a 26; Cuijo cantabriginesis y Tapón a 17
-    filas.extend([
-        {"Proveedor": "Moctezuma", "Especie": "Maguey azul",            "Costo": 26.0, "Max_oferta": 10000},
-        {"Proveedor": "Moctezuma", "Especie": "Maguey Verde Striata",   "Costo": 26.0, "Max_oferta": 10000},
-        {"Proveedor": "Moctezuma", "Especie": "Cuijo cantabriginesis",  "Costo": 17.0, "Max_oferta": 10000},
-        {"Proveedor": "Moctezuma", "Especie": "Tapón",                  "Costo": 17.0, "Max_oferta": 10000},
-    ])
-    # Venado: Maguey Verde Striata a 25; Cuijo cantabriginesis, Cuijo engelmani, Tapón, Cardón a 18
-    filas.extend([
-        {"Proveedor": "Venado", "Especie": "Maguey Verde Striata",      "Costo": 25.0, "Max_oferta": 10000},
-        {"Proveedor": "Venado", "Especie": "Cuijo cantabriginesis",      "Costo": 18.0, "Max_oferta": 10000},
-        {"Proveedor": "Venado", "Especie": "Cuijo engelmani",           "Costo": 18.0, "Max_oferta": 10000},
-        {"Proveedor": "Venado", "Especie": "Tapón",                     "Costo": 18.0, "Max_oferta": 10000},
-        {"Proveedor": "Venado", "Especie": "Cardón",                    "Costo": 18.0, "Max_oferta": 10000},
-    ])
-    # Laguna seca: Lechugilla, Maguey Verde Salmiana, Maguey azul a 26; Cuijo engelmani a 21; Tapón a 18
-    filas.extend([
-        {"Proveedor": "Laguna seca", "Especie": "Lechugilla",           "Costo": 26.0, "Max_oferta": 10000},
-        {"Proveedor": "Laguna seca", "Especie": "Maguey Verde Salmiana","Costo": 26.0, "Max_oferta": 10000},
-        {"Proveedor": "Laguna seca", "Especie": "Maguey azul",          "Costo": 26.0, "Max_oferta": 10000},
-        {"Proveedor": "Laguna seca", "Especie": "Cuijo engelmani",      "Costo": 21.0, "Max_oferta": 10000},
-        {"Proveedor": "Laguna seca", "Especie": "Tapón",                "Costo": 18.0, "Max_oferta": 10000},
-    ])
-
-    df = pd.DataFrame(filas)
-    return df
-
-# Según el escenario, definimos los DataFrames iniciales
-if escenario == "Ejemplo Completo":
-    inicial_poligonos   = crear_poligonos_completo()
-    inicial_demandas    = crear_demandas_completo()
-    inicial_proveedores = crear_proveedores_completo()
-else:
-    inicial_poligonos   = pd.DataFrame(columns=["Polígono", "X", "Y"])
-    inicial_demandas    = pd.DataFrame(columns=["Especie", "Polígono", "Demanda"])
-    inicial_proveedores = pd.DataFrame(columns=["Proveedor", "Especie", "Costo", "Max_oferta"])
+@st.cache_data
+def leer_archivo(contenido, nombre, columnas):
+    # Se vuelve a leer solo si cambia el archivo subido
+    archivo = io.BytesIO(contenido)
+    archivo.name = nombre
+    return cargar_tabla(archivo, columnas)
+
+def tabla_importada(etiqueta, columnas, contenedor):
+    archivo = contenedor.file_uploader(etiqueta, type=["csv", "parquet"])
+    if archivo is None:
+        return pd.DataFrame(columns=columnas), ""
+    try:
+        return leer_archivo(archivo.getvalue(), archivo.name, columnas), archivo.file_id
+    except Exception as e:
+        contenedor.error(f"❗ {e}")
+        return pd.DataFrame(columns=columnas), ""
+
+@st.cache_data
+def tablas_ejemplo():
+    # Se arman una sola vez; cada ejecución recibe su propia copia
+    return crear_poligonos_completo(), crear_demandas_completo(), crear_proveedores_completo()
+
+def tablas_iniciales(escenario):
+    # Según el escenario, definimos los DataFrames iniciales
+    origen_tablas = ("", "", "")
+    if escenario == "Ejemplo Completo":
+        inicial_poligonos, inicial_demandas, inicial_proveedores = tablas_ejemplo()
+    elif escenario == "Importar archivos":
+        c1, c2, c3 = st.columns(3)
+        inicial_poligonos, id_pol     = tabla_importada("Polígonos", COLUMNAS_POLIGONOS, c1)
+        inicial_demandas, id_dem      = tabla_importada("Demandas", COLUMNAS_DEMANDAS, c2)
+        inicial_proveedores, id_prov  = tabla_importada("Proveedores", COLUMNAS_PROVEEDORES, c3)
+        origen_tablas = (id_pol, id_dem, id_prov)
+    else:
+        inicial_poligonos   = pd.DataFrame(columns=COLUMNAS_POLIGONOS)
+        inicial_demandas    = pd.DataFrame(columns=COLUMNAS_DEMANDAS)
+        inicial_proveedores = pd.DataFrame(columns=COLUMNAS_PROVEEDORES)
+    return inicial_poligonos, inicial_demandas, inicial_proveedores, origen_tablas
 
 
 # ------------------------------------------------------------
 # 3) TABLAS EDITABLES
 # ------------------------------------------------------------
 
-# 3.1 Polígonos
-st.subheader("🗺️ Definir Polígonos (ID, X, Y)")
-key_pol = f"poligonos_{escenario}"
-df_poligonos = st.data_editor(
-    inicial_poligonos,
-    key=key_pol,
-    num_rows="dynamic",
-    use_container_width=True
-)
-try:
-    poligonos_coords = {
-        int(row["Polígono"]): (float(row["X"]), float(row["Y"]))
-        for _, row in df_poligonos.iterrows()
-        if pd.notnull(row["Polígono"])
-    }
-except Exception:
-    poligonos_coords = {}
-
-# 3.2 Demandas
-st.subheader("📈 Definir Demandas (Especie, Polígono, Demanda)")
-key_dem = f"demandas_{escenario}"
-df_demandas = st.data_editor(
-    inicial_demandas,
-    key=key_dem,
-    num_rows="dynamic",
-    use_container_width=True
-)
-demanda_poligonos = {}
-for _, row in df_demandas.iterrows():
-    if (
-        pd.notnull(row["Especie"])
-        and pd.notnull(row["Polígono"])
-        and pd.notnull(row["Demanda"])
-    ):
-        esp = str(row["Especie"])
-        pid = int(row["Polígono"])
-        dem = float(row["Demanda"])
-        demanda_poligonos.setdefault(esp, {})[pid] = dem
-
-# 3.3 Proveedores
-st.subheader("🤝 Definir Proveedores (Proveedor, Especie, Costo, Max_oferta)")
-key_prov = f"proveedores_{escenario}"
-df_proveedores = st.data_editor(
-    inicial_proveedores,
-    key=key_prov,
-    num_rows="dynamic",
-    use_container_width=True
-)
-demandas_oferta = {}
-for _, row in df_proveedores.iterrows():
-    if (
-        pd.notnull(row["Proveedor"])
-        and pd.notnull(row["Especie"])
-        and pd.notnull(row["Costo"])
-        and pd.notnull(row["Max_oferta"])
-    ):
-        prov = str(row["Proveedor"])
-        esp = str(row["Especie"])
-        costo = float(row["Costo"])
-        max_oferta = float(row["Max_oferta"])
-        demandas_oferta.setdefault(prov, {})[esp] = {"costo": costo, "max_oferta": max_oferta}
+def leer_tabla(lector, df, nombre):
+    # Una tabla con valores inválidos se informa y se toma como vacía
+    try:
+        return lector(df)
+    except ValueError as e:
+        st.error(f"❗ {nombre}: {e}")
+        return {}
+
+
+@st.fragment
+def tablas_editables(escenario):
+    # Editar una tabla vuelve a ejecutar solo esta sección (y la app
+    # completa si cambian los datos leídos)
+    inicial_poligonos, inicial_demandas, inicial_proveedores, origen_tablas = (
+        tablas_iniciales(escenario)
+    )
+
+    # 3.1 Polígonos
+    st.subheader("🗺️ Definir Polígonos (ID, X, Y)")
+    key_pol = f"poligonos_{escenario}{origen_tablas[0]}"
+    df_poligonos = st.data_editor(
+        inicial_poligonos,
+        key=key_pol,
+        num_rows="dynamic",
+        use_container_width=True
+    )
+    poligonos_coords = leer_tabla(leer_poligonos, df_poligonos, "Polígonos")
+
+    # 3.2 Demandas
+    st.subheader("📈 Definir Demandas (Especie, Polígono, Demanda)")
+    key_dem = f"demandas_{escenario}{origen_tablas[1]}"
+    df_demandas = st.data_editor(
+        inicial_demandas,
+        key=key_dem,
+        num_rows="dynamic",
+        use_container_width=True
+    )
+    demanda_poligonos = leer_tabla(leer_demandas, df_demandas, "Demandas")
+
+    # 3.3 Proveedores
+    st.subheader("🤝 Definir Proveedores (Proveedor, Especie, Costo, Max_oferta)")
+    key_prov = f"proveedores_{escenario}{origen_tablas[2]}"
+    df_proveedores = st.data_editor(
+        inicial_proveedores,
+        key=key_prov,
+        num_rows="dynamic",
+        use_container_width=True
+    )
+    demandas_oferta = leer_tabla(leer_proveedores, df_proveedores, "Proveedores")
+
+    return publicar("tablas", (poligonos_coords, demanda_poligonos, demandas_oferta))
+
+
+poligonos_coords, demanda_poligonos, demandas_oferta = tablas_editables(escenario)
 
 
 # ------------------------------------------------------------
 # 4) PARÁMETROS LOGÍSTICOS EN EL SIDEBAR
 # ------------------------------------------------------------
 
-st.sidebar.header("⚙️ Parámetros de Simulación")
-dias_totales = st.sidebar.number_input(
-    "Días totales", min_value=1, max_value=1000, value=30, step=1
-)
-aclimatacion_min_dias = st.sidebar.number_input(
-    "Días para aclimatación",
-    min_value=0,
-    max_value=5,
-    value=3,  # mínimo de 3 días según PDF
-    step=1
-)
-capacidad_camion = st.sidebar.number_input(
-    "Capacidad del camión (unidades)", min_value=1, value=535, step=100
-)
-jornada_min = st.sidebar.number_input(
-    "Minutos por jornada", min_value=60, value=360, step=30
-)
-espacio_max_almacen = st.sidebar.number_input(
-    "Espacio máximo en almacén (unidades)", min_value=1, value=1000, step=100
-)
-costo_transporte = st.sidebar.number_input(
-    "Costo transporte por viaje", min_value=0, value=4500, step=500
-)
-velocidad = st.sidebar.number_input(
-    "Velocidad (km/h)", min_value=1.0, value=60.0, step=1.0
-)
-costo_plantacion = st.sidebar.number_input(
-    "Costo plantación por unidad", min_value=0.0, value=20.0, step=1.0
-)
-
-# Nuevos inputs en sidebar: tiempo de carga y descarga
-tiempo_carga = st.sidebar.number_input(
-    "Tiempo de carga (minutos)", min_value=0, value=30, step=5
-)
-tiempo_descarga = st.sidebar.number_input(
-    "Tiempo de descarga (minutos)", min_value=0, value=30, step=5
-)
+ETIQUETAS_PLANIFICADOR = {
+    "voraz": "Voraz (más lejano y vecino más cercano)",
+    "ahorros": "Ahorros (Clarke–Wright)",
+}
+
+ETIQUETAS_COMPRAS = {
+    "voraz": "Día a día (proveedor más barato)",
+    "optimo": "Plan óptimo de todo el horizonte (MILP)",
+}
+
+ETIQUETAS_NUCLEO = {
+    "dias": "Paso diario",
+    "eventos": "Eventos discretos",
+}
+
+ETIQUETAS_ZONAS = {
+    "kmeans": "k-means (zonas compactas)",
+    "cuadricula": "Cuadrícula",
+}
+
+
+@st.fragment
+def parametros_simulacion():
+    st.header("⚙️ Parámetros de Simulación")
+    dias_totales = st.number_input(
+        "Días totales", min_value=1, max_value=1000, value=30, step=1
+    )
+    aclimatacion_min_dias = st.number_input(
+        "Días para aclimatación",
+        min_value=0,
+        max_value=5,
+        value=3,  # mínimo de 3 días según PDF
+        step=1
+    )
+    capacidad_camion = st.number_input(
+        "Capacidad del camión (unidades)", min_value=1, value=535, step=100
+    )
+    jornada_min = st.number_input(
+        "Minutos por jornada", min_value=60, value=360, step=30
+    )
+    espacio_max_almacen = st.number_input(
+        "Espacio máximo en almacén (unidades)", min_value=1, value=1000, step=100
+    )
+    costo_transporte = st.number_input(
+        "Costo transporte por viaje", min_value=0, value=4500, step=500
+    )
+    velocidad = st.number_input(
+        "Velocidad (km/h)", min_value=1.0, value=60.0, step=1.0
+    )
+    costo_plantacion = st.number_input(
+        "Costo plantación por unidad", min_value=0.0, value=20.0, step=1.0
+    )
+
+    # Nuevos inputs en sidebar: tiempo de carga y descarga
+    tiempo_carga = st.number_input(
+        "Tiempo de carga (minutos)", min_value=0, value=30, step=5
+    )
+    tiempo_descarga = st.number_input(
+        "Tiempo de descarga (minutos)", min_value=0, value=30, step=5
+    )
+
+    # Flota y planificador de rutas
+    camiones = st.number_input(
+        "Camiones en la flota", min_value=1, value=1, step=1
+    )
+    planificador = st.selectbox(
+        "Planificador de rutas", PLANIFICADORES,
+        format_func=ETIQUETAS_PLANIFICADOR.get
+    )
+    presupuesto_mejora_ms = st.number_input(
+        "Mejora 2-opt / Or-opt (ms de CPU por día)", min_value=0, value=0, step=10,
+        help="Tiempo para acortar cada ruta reordenando sus paradas; 0 la desactiva."
+    )
+    modo_compras = st.selectbox(
+        "Compras", MODOS_COMPRA, format_func=ETIQUETAS_COMPRAS.get
+    )
+    nucleo = st.selectbox(
+        "Núcleo de simulación", NUCLEOS, format_func=ETIQUETAS_NUCLEO.get,
+        help="Por eventos solo se procesan los días en que llega, se aclimata o se "
+             "entrega algo; los resultados son los mismos que con el paso diario. "
+             "Conviene en horizontes largos en que la actividad termina mucho antes "
+             "del final; si hay entregas casi todos los días, el paso diario es más "
+             "rápido."
+    )
+
+    tamano_zona = st.number_input(
+        "Polígonos por zona de reparto", min_value=0, value=0, step=50,
+        help="Agrupa los polígonos en zonas y arma cada ruta dentro de una sola zona: "
+             "planifica mucho más rápido en sitios grandes a cambio de rutas algo más "
+             "largas. 0 las desactiva."
+    )
+    metodo_zonas = st.selectbox(
+        "Zonificación", METODOS_ZONA, format_func=ETIQUETAS_ZONAS.get,
+        disabled=tamano_zona == 0
+    )
+
+    archivo_red = st.file_uploader(
+        "🛣️ Red vial (CSV de aristas)", type=["csv"],
+        help="Columnas X1, Y1, X2, Y2 y opcionales Distancia y Velocidad (km/h) por "
+             "tramo. Sin archivo, los viajes van en línea recta."
+    )
+    red_vial = ""
+    if archivo_red is not None:
+        # El motor lee la red desde disco; el nombre es el hash del contenido
+        contenido_red = archivo_red.getvalue()
+        ruta_red = Path(tempfile.gettempdir()) / "simulacion_redes" / (
+            hashlib.sha256(contenido_red).hexdigest() + ".csv"
+        )
+        if not ruta_red.exists():
+            ruta_red.parent.mkdir(parents=True, exist_ok=True)
+            ruta_red.write_bytes(contenido_red)
+        red_vial = str(ruta_red)
+
+    texto_almacenes = st.text_input(
+        "🏭 Almacenes (polígono:espacio)", value="",
+        help="Varios almacenes separados por comas, p. ej. 18:1000, 42:800 (sin espacio "
+             "se usa el máximo del almacén). Cada polígono se atiende desde el más "
+             "cercano, con su propia flota. Vacío: solo el almacén 18."
+    )
+    perfilar = st.checkbox(
+        "⏱️ Perfilar ejecución", value=False,
+        help="Mide el tiempo de cada etapa del motor (por día) al ejecutar la simulación."
+    )
+
+    parametros = dict(
+        dias_totales=dias_totales,
+        aclimatacion_min_dias=aclimatacion_min_dias,
+        capacidad_camion=capacidad_camion,
+        jornada_min=jornada_min,
+        espacio_max_almacen=espacio_max_almacen,
+        costo_transporte=costo_transporte,
+        velocidad=velocidad,
+        costo_plantacion=costo_plantacion,
+        tiempo_carga=tiempo_carga,
+        tiempo_descarga=tiempo_descarga,
+        camiones=camiones,
+        planificador=planificador,
+        presupuesto_mejora_ms=presupuesto_mejora_ms,
+        modo_compras=modo_compras,
+        nucleo=nucleo,
+        red_vial=red_vial,
+        tamano_zona=tamano_zona,
+        metodo_zonas=metodo_zonas,
+    )
+    return publicar("parametros", (parametros, texto_almacenes, perfilar))
+
+
+# Los widgets del fragmento van en el sidebar
+with st.sidebar:
+    parametros, texto_almacenes, perfilar = parametros_simulacion()
 
-# Verificar polígono 18 (almacén)
-if 18 not in poligonos_coords:
-    st.error("❗ Debes incluir el polígono 18 (almacén) en la tabla de Polígonos.")
+try:
+    almacenes = leer_almacenes(texto_almacenes, parametros["espacio_max_almacen"])
+except ValueError as e:
+    st.error(f"❗ {e}")
     st.stop()
 
+# Verificar polígono 18 (o los almacenes indicados)
+for pid in almacenes or [ALMACEN]:
+    if pid not in poligonos_coords:
+        st.error(f"❗ Debes incluir el polígono {pid} (almacén) en la tabla de Polígonos.")
+        st.stop()
+
+config = ConfigSimulacion(
+    poligonos_coords=poligonos_coords,
+    demanda_poligonos=demanda_poligonos,
+    demandas_oferta=demandas_oferta,
+    almacenes=almacenes,
+    **parametros,
+)
 
 # ------------------------------------------------------------
-# 5) FUNCIONES DE SIMULACIÓN
+# 5) EJECUCIÓN DE SIMULACIÓN Y RESULTADOS
 # ------------------------------------------------------------
-
-def tiempo_entre(p1, p2):
-    distancia = euclidean(poligonos_coords[p1], poligonos_coords[p2])
-    return (distancia / velocidad) * 60
-
-def actualizar_inventario(inventario, dia):
-    if dia == 0:
-        return
-    for esp in inventario:
-        inventario[esp][dia] += inventario[esp][dia - 1]
-
-def calcular_disponibles(inventario):
-    disponibles = {esp: [0] * (dias_totales + 1) for esp in demanda_poligonos}
-    for dia in range(dias_totales + 1):
-        for esp in demanda_poligonos:
-            if dia >= aclimatacion_min_dias:
-                disponibles[esp][dia] = inventario[esp][dia - aclimatacion_min_dias]
-    return disponibles
-
-def planificar_rutas(dia, disponibles, demanda_restante):
-    rutas_dia = []
-    entregado = {esp: 0 for esp in demanda_poligonos}
-    tiempo_total = 0
-
-    while tiempo_total < jornada_min:
-        ruta = [18]
-        tiempo_ruta = tiempo_carga
-        carga = 0
-        detalle = []
-
-        while True:
-            last = ruta[-1]
-            candidatos = [
-                pid
-                for esp in demanda_restante
-                for pid, d in demanda_restante[esp].items()
-                if d > 0
-            ]
-            if not candidatos:
-                break
-
-            # Primer paso: al nodo más lejano desde el almacén
-            if len(ruta) == 1:
-                candidatos.sort(
-                    key=lambda pid: euclidean(poligonos_coords[last], poligonos_coords[pid]),
-                    reverse=True
+@st.cache_resource
+def obtener_cache_resultados():
+    # Compartida entre reruns y sesiones; descarta los escenarios menos usados.
+    # Detrás de la memoria, una caché en disco que sobrevive a reinicios
+    # (si no se puede crear, solo memoria)
+    memoria = CacheLRU(max_entradas=32)
+    try:
+        return CacheEnCapas(memoria, CacheDisco())
+    except (OSError, sqlite3.Error):
+        return memoria
+
+cache_resultados = obtener_cache_resultados()
+cache_disco = getattr(cache_resultados, "disco", None)
+
+
+@st.fragment
+def resultados_simulacion(config, clave, perfilar):
+    # Ejecutar, cambiar la vista del Gantt o el día a detallar vuelve a
+    # ejecutar solo los resultados, sin releer las tablas ni los parámetros.
+    # Un escenario ya simulado (mismas tablas y parámetros) se muestra sin
+    # volver a pulsar el botón ni a ejecutar el motor
+    ejecutar = st.button("🔄 Ejecutar simulación")
+    if ejecutar or clave in cache_resultados:
+        if len(config.demanda_poligonos) == 0:
+            st.error("❗ Debes definir al menos una demanda en la tabla de Demandas.")
+        else:
+            # Al perfilar se simula de nuevo aunque el escenario esté en caché
+            perfil = Perfilador() if perfilar and ejecutar else None
+            # Avance y KPIs parciales mientras el motor produce cada día
+            barra = st.progress(0.0, text="🏃‍♂️ Ejecutando simulación…")
+            en_vivo = st.empty()
+            cada = max(1, config.dias_totales // 50)
+
+            def mostrar_avance(dia_simulado, acumulado):
+                dia = dia_simulado.dia
+                if dia % cada and dia < config.dias_totales:
+                    return
+                barra.progress(
+                    min(1.0, (dia + 1) / max(config.dias_totales, 1)),
+                    text=f"🏃‍♂️ Día {min(dia + 1, config.dias_totales)} de {config.dias_totales}"
                 )
+                with en_vivo.container():
+                    v1, v2, v3 = st.columns(3)
+                    v1.metric("🚌 Viajes hasta ahora", acumulado.viajes)
+                    v2.metric("📦 Unidades entregadas", f"{acumulado.unidades_entregadas:.0f}")
+                    v3.metric("💰 Costo acumulado", f"${acumulado.costo_total:.2f}")
+
+            try:
+                # Con la última corrida de la sesión solo se re-simula desde el
+                # primer día que cambia (ver simulacion.incremental). Las tablas
+                # largas se vuelcan por bloques a un directorio temporal. Los
+                # avisos del motor (p. ej. del plan de compras) se muestran abajo.
+                with tempfile.TemporaryDirectory(prefix="simulacion_") as directorio, \
+                        warnings.catch_warnings(record=True) as avisos:
+                    warnings.simplefilter("always", RuntimeWarning)
+                    resultados, corrida, desde = simular_o_reanudar(
+                        config, cache_resultados, st.session_state.get("corrida"), perfil,
+                        al_avanzar=mostrar_avance, cache_matrices=cache_disco, clave=clave,
+                        directorio=directorio
+                    )
+            except ValueError as e:
+                st.error(f"❗ {e}")
+                st.stop()
+            finally:
+                barra.empty()
+                en_vivo.empty()
+            st.session_state["corrida"] = corrida
+            df_inventario, df_compras, df_entregas, df_rutas = resultados
+            if desde is None:
+                st.success("⚡ Resultados recuperados de la caché.")
+            elif desde > 0:
+                st.success(f"♻️ ¡Simulación completada! Se re-simuló desde el día {desde}.")
             else:
-                # Luego, vecino más cercano
-                candidatos.sort(
-                    key=lambda pid: euclidean(poligonos_coords[last], poligonos_coords[pid])
-                )
+                st.success("✅ ¡Simulación completada!")
+            for aviso in avisos:
+                st.warning(f"⚠️ {aviso.message}")
+
+            # El último perfil se conserva entre reruns mientras no cambie el escenario
+            if perfil is not None:
+                st.session_state["perfil"] = (clave, perfil)
+            clave_perfil, perfil = st.session_state.get("perfil", (None, None))
+            if perfilar and clave_perfil == clave:
+                with st.expander("⏱️ Perfil de ejecución"):
+                    st.dataframe(perfil.tabla_etapas(), use_container_width=True)
+                    st.dataframe(
+                        pd.DataFrame(list(perfil.contadores.items()), columns=["Contador", "Total"]),
+                        use_container_width=True
+                    )
+                    df_dias = perfil.tabla_dias()
+                    etapas_dia = [c for c in df_dias.columns if c in perfil.etapas]
+                    st.caption("Segundos por etapa y día")
+                    st.bar_chart(df_dias.set_index("Día")[etapas_dia])
+                    st.download_button(
+                        "⬇️ Descargar perfil (JSON)",
+                        data=perfil.a_json(indent=2),
+                        file_name="perfil_simulacion.json",
+                        mime="application/json"
+                    )
+
+            # ------------------------------------------------------------
+            # 6) KPIs CON TARJETAS GRANDES (st.metric)
+            # ------------------------------------------------------------
+            kpis = calcular_kpis(config, resultados)
+
+            st.subheader("KPIs de la Solución")
+            k1, k2, k3, k4 = st.columns(4)
+            k1.metric(
+                label="🚌 Viajes totales",
+                value=f"{kpis['viajes']}"
+            )
+            k2.metric(
+                label="⏱️ Tiempo total",
+                value=f"{kpis['dias_total']}d {kpis['duracion_ultima']}m"
+            )
+            k3.metric(
+                label="💰 Costo total",
+                value=f"${kpis['costo_total']:.2f}"
+            )
+            k4.metric(
+                label="🔧 Minutos ahorrados",
+                value=f"{kpis['minutos_ahorrados']:.1f}",
+                delta="2-opt / Or-opt"
+            )
+
+            # ------------------------------------------------------------
+            # → MÉTRICAS DE EFICIENCIA
+            # ------------------------------------------------------------
+            # Mostrar con st.metric
+            um1, um2, um3, um4 = st.columns(4)
+            um1.metric(
+                label="📦 Fill Rate",
+                value=f"{kpis['fill_rate']:.1f}%",
+                delta=f"{kpis['unidades_entregadas']}/{kpis['unidades_demandadas']}"
+            )
+            um2.metric(
+                label="🚚 Utilización media",
+                value=f"{kpis['utilizacion_media']:.1f}%",
+                delta=f"Camión cap. {config.capacidad_camion}"
+            )
+            um3.metric(
+                label="💲 Costo unidad",
+                value=f"${kpis['costo_unitario']:,.2f}",
+                delta="promedio"
+            )
+            um4.metric(
+                label="📊 Unidades entregadas",
+                value=f"{kpis['unidades_entregadas']}"
+            )
+
+
+            # ------------------------------------------------------------
+            # 7) RESULTADOS TABULARES
+            # ------------------------------------------------------------
+            st.subheader("📊 Inventario Diario")
+            st.dataframe(df_inventario, use_container_width=True)
+
+            st.subheader("🛒 Compras Realizadas")
+            if not df_compras.empty:
+                st.dataframe(df_compras, use_container_width=True)
+            else:
+                st.info("No se realizaron compras durante la simulación.")
 
-            encontrado = False
-            for pid in candidatos:
-                t_viaje = tiempo_entre(last, pid)
-                t_vuelta = tiempo_entre(pid, 18)
-                t_extra = t_viaje + tiempo_descarga + t_vuelta
-                if tiempo_total + tiempo_ruta + t_extra > jornada_min:
-                    continue
-
-                entrega_nodo = {}
-                total_nodo = 0
-                for esp in demanda_poligonos:
-                    disp = disponibles[esp][dia]
-                    dem = demanda_restante[esp].get(pid, 0)
-                    cap_rest = capacidad_camion - carga - total_nodo
-                    q = min(disp, dem, cap_rest)
-                    if q > 0:
-                        entrega_nodo[esp] = q
-                        total_nodo += q
-
-                if total_nodo > 0:
-                    ruta.append(pid)
-                    tiempo_ruta += t_viaje + tiempo_descarga
-                    for esp, q in entrega_nodo.items():
-                        disponibles[esp][dia] -= q
-                        demanda_restante[esp][pid] -= q
-                        entregado[esp] += q
-                    carga += total_nodo
-                    detalle.append((pid, entrega_nodo))
-                    encontrado = True
-                    break
-
-            if not encontrado:
-                break
-
-        if len(ruta) > 1:
-            tiempo_ruta += tiempo_entre(ruta[-1], 18)
-            tiempo_total += tiempo_ruta
-            rutas_dia.append({
-                "Día": dia,
-                "Ruta": " → ".join(map(str, ruta + [18])),
-                "Duración_min": round(tiempo_ruta),
-                "Unidades": carga,
-                "Detalle": detalle
-            })
-        else:
-            break
+            st.subheader("📦 Entregas Ejecutadas")
+            if not df_entregas.empty:
+                st.dataframe(df_entregas, use_container_width=True)
+            else:
+                st.info("No se registraron entregas durante la simulación.")
+
+            st.subheader("🗺️ Rutas Diarias")
+            if not df_rutas.empty:
+                # Copia para mostrar: los resultados quedan intactos en la caché
+                st.dataframe(
+                    df_rutas.assign(Detalle=df_rutas["Detalle"].astype(str)),
+                    use_container_width=True
+                )
 
-    return rutas_dia, entregado
+            st.download_button(
+                "⬇️ Descargar resultados (Parquet)",
+                data=exportar_zip(config, resultados),
+                file_name="resultados_simulacion.zip",
+                mime="application/zip",
+                help="Tablas compactas: especies y proveedores como categorías, "
+                     "un tipo fijo por columna y el detalle de rutas como tabla de paradas."
+            )
+
+            if not df_rutas.empty:
+                st.subheader("📈 Diagrama de Gantt de Rutas")
+                if len(df_rutas) <= UMBRAL_DETALLE:
+                    st.plotly_chart(generar_gantt_rutas(df_rutas), use_container_width=True)
+                else:
+                    # Con miles de rutas: resumen por día con detalle bajo demanda,
+                    # o todas las rutas dibujadas con WebGL
+                    vista = st.radio(
+                        "Vista del diagrama",
+                        ["Resumen por día", "Todas las rutas (WebGL)"],
+                        horizontal=True
+                    )
+                    if vista == "Resumen por día":
+                        st.plotly_chart(generar_resumen_diario(df_rutas), use_container_width=True)
+                        dia_detalle = st.selectbox(
+                            "Ver rutas del día", sorted(df_rutas["Día"].unique())
+                        )
+                        st.plotly_chart(
+                            generar_gantt_rutas(df_rutas[df_rutas["Día"] == dia_detalle]),
+                            use_container_width=True
+                        )
+                    else:
+                        st.plotly_chart(generar_gantt_webgl(df_rutas), use_container_width=True)
+            else:
+                st.info("No hay rutas para graficar.")
 
-def procesar_entregas(inventario, entregas, entregado, dia):
-    for esp, cantidad in entregado.items():
-        disponible_hoy = inventario[esp][dia]
-        a_entregar = min(disponible_hoy, cantidad)
 
-        if a_entregar > 0:
-            inventario[esp][dia] -= a_entregar
-            entregas.append({
-                "Especie":      esp,
-                "Día entrega":  dia,
-                "Cantidad":     a_entregar,
-                "Costo plantación": a_entregar * costo_plantacion
-            })
+# La clave del escenario se calcula una sola vez por ejecución de la app
+resultados_simulacion(config, clave_config(config), perfilar)
 
-def realizar_compras(inventario, compras, oferta_usada, dia):
-    """
-    Compra todas las especies que hagan falta para reponer el inventario,
-    cobrando un solo costo de transporte por día, y asegurándose de que
-    el espacio en almacén (espacio_max_almacen) se trate como un total agregado.
-    """
-    # 1) Flag para cobrar transporte solo una vez por día
-    transporte_cobrado = False
-
-    # 2) Calculamos cuánto hay en total en inventario en el día 'dia'
-    total_en_almacen = sum(inventario[esp][dia] for esp in inventario)
-    espacio_libre_total = espacio_max_almacen - total_en_almacen
-    # Si ya está lleno o no hay espacio, no compramos nada:
-    if espacio_libre_total <= 0:
-        return
-
-    # 3) Iteramos especie por especie para reponer demanda
-    for esp in demanda_poligonos:
-        # Ya no alcanzaría a llegar (si no cabe en almacén para aclimatar):
-        if dia + aclimatacion_min_dias >= dias_totales:
-            continue
-
-        # Demanda total de esta especie (sobre todos los polígonos)
-        total_dem = sum(demanda_poligonos[esp].values())
-        # Cuánto ya se compró de esta especie (sumamos en 'compras')
-        total_cmp = sum(c["Cantidad"] for c in compras if c["Especie"] == esp)
-        restante = total_dem - total_cmp
-
-        if restante <= 0:
-            continue
-
-        # Ahora el espacio disponible para esta especie es
-        # el "espacio_libre_total", no un valor por especie.
-        if espacio_libre_total <= 0:
-            break  # ya no cabe nada más en almacén
-
-        max_posible = min(restante, espacio_libre_total)
-
-        # Recolectamos las ofertas disponibles de proveedores para esta especie
-        opciones = []
-        for p, datos in demandas_oferta.items():
-            info = datos.get(esp)
-            if info:
-                dispo = info["max_oferta"] - oferta_usada[p][esp]
-                if dispo > 0:
-                    opciones.append((p, info["costo"], dispo))
-        opciones.sort(key=lambda x: x[1])  # orden por costo ascendente
-
-        restante_a_comprar = max_posible
-        for p_sel, costo_unit, dispo in opciones:
-            if restante_a_comprar <= 0 or espacio_libre_total <= 0:
-                break
-            cantidad = min(dispo, restante_a_comprar, espacio_libre_total)
-
-            # 4) Cobro único de transporte por día:
-            costo_trans = 0
-            if not transporte_cobrado:
-                costo_trans = costo_transporte
-                transporte_cobrado = True
-
-            compras.append({
-                "Especie":          esp,
-                "Día pedido":       dia,
-                "Proveedor":        p_sel,
-                "Cantidad":         cantidad,
-                "Costo compra":     cantidad * costo_unit,
-                "Costo transporte": costo_trans
-            })
-
-            # Actualizamos oferta usada y espacio en almacén para este día + 1
-            oferta_usada[p_sel][esp] += cantidad
-            inventario[esp][dia + 1] += cantidad
-
-            # Reducimos el espacio libre total
-            espacio_libre_total -= cantidad
-            restante_a_comprar -= cantidad
-
-            # Si se acabó el espacio, salimos de ambos bucles
-            if espacio_libre_total <= 0:
-                break
-
-
-def simular():
-    inventario = {esp: [0] * (dias_totales + 1) for esp in demanda_poligonos}
-    demanda_restante = {esp: demanda_poligonos[esp].copy() for esp in demanda_poligonos}
-    ofertas_usadas = {p: {esp: 0 for esp in demanda_poligonos} for p in demandas_oferta}
-    compras = []
-    entregas = []
-    rutas = []
-    lista_inventario = []
-
-    for dia in range(dias_totales):
-        actualizar_inventario(inventario, dia)
-        row_inv = {"Día": dia}
-        for esp in inventario:
-            row_inv[esp] = inventario[esp][dia]
-        lista_inventario.append(row_inv)
-
-        disponibles = calcular_disponibles(inventario)
-        rutas_dia, entregado = planificar_rutas(dia, disponibles, demanda_restante)
-        rutas.extend(rutas_dia)
-        procesar_entregas(inventario, entregas, entregado, dia)
-        realizar_compras(inventario, compras, ofertas_usadas, dia)
-
-    row_inv = {"Día": dias_totales}
-    for esp in inventario:
-        row_inv[esp] = inventario[esp][dias_totales]
-    lista_inventario.append(row_inv)
-
-    df_inventario = pd.DataFrame(lista_inventario)
-    df_compras = pd.DataFrame(compras)
-    df_entregas = pd.DataFrame(entregas)
-    df_rutas = pd.DataFrame(rutas)
-
-    return df_inventario, df_compras, df_entregas, df_rutas
 
 # ------------------------------------------------------------
-# 6) EJECUCIÓN DE SIMULACIÓN Y RESULTADOS
+# 8) BARRIDO DE PARÁMETROS
 # ------------------------------------------------------------
-if st.button("🔄 Ejecutar simulación"):
-    if len(demanda_poligonos) == 0:
-        st.error("❗ Debes definir al menos una demanda en la tabla de Demandas.")
-    else:
-        with st.spinner("🏃‍♂️ Ejecutando simulación…"):
-            df_inventario, df_compras, df_entregas, df_rutas = simular()
-        st.success("✅ ¡Simulación completada!")
-
-        # ------------------------------------------------------------
-        # 7) KPIs CON TARJETAS GRANDES (st.metric)
-        # ------------------------------------------------------------
-        num_viajes = len(df_rutas)
-        if num_viajes == 0:
-            dias_total = 0
-            duracion_ultima = 0
-        else:
-            dias_total = df_rutas["Día"].max()
-            duracion_ultima = int(df_rutas.iloc[-1]["Duración_min"])
-
-        costo_compra_sum = df_compras["Costo compra"].sum() if not df_compras.empty else 0
-        costo_transp_sum = df_compras["Costo transporte"].sum() if not df_compras.empty else 0
-        costo_plant_sum = df_entregas["Costo plantación"].sum() if not df_entregas.empty else 0
-        costo_total = costo_compra_sum + costo_transp_sum + costo_plant_sum
-
-        st.subheader("KPIs de la Solución")
-        k1, k2, k3 = st.columns(3)
-        k1.metric(
-            label="🚌 Viajes totales",
-            value=f"{num_viajes}"
-        )
-        k2.metric(
-            label="⏱️ Tiempo total",
-            value=f"{dias_total}d {duracion_ultima}m"
-        )
-        k3.metric(
-            label="💰 Costo total",
-            value=f"${costo_total:.2f}"
-        )
-                # … después de tus k1.metric, k2.metric, k3.metric …
-
-        # ------------------------------------------------------------
-        # → NUEVAS MÉTRICAS DE EFICIENCIA
-        # ------------------------------------------------------------
-        # 1) Unidades demandadas totales
-        total_demandadas = sum(
-            d for esp in demanda_poligonos 
-            for d in demanda_poligonos[esp].values()
+ETIQUETAS_BARRIDO = {
+    "capacidad_camion":      "Capacidad del camión (unidades)",
+    "espacio_max_almacen":   "Espacio máximo en almacén (unidades)",
+    "jornada_min":           "Minutos por jornada",
+    "aclimatacion_min_dias": "Días para aclimatación",
+    "costo_transporte":      "Costo transporte por viaje",
+    "camiones":              "Camiones en la flota",
+}
+
+@st.fragment
+def barrido_parametros(config):
+    with st.expander("🔁 Barrido de parámetros"):
+        st.markdown(
+            "Indica los valores a probar como `inicio:fin:paso` (fin incluido) o como "
+            "lista `a,b,c`. Los parámetros vacíos usan el valor del sidebar."
         )
+        textos_barrido = {
+            nombre: st.text_input(ETIQUETAS_BARRIDO[nombre], key=f"barrido_{nombre}")
+            for nombre in PARAMETROS_BARRIDO
+        }
+
+        if st.button("▶️ Ejecutar barrido"):
+            try:
+                valores_barrido = {
+                    nombre: leer_valores(texto)
+                    for nombre, texto in textos_barrido.items()
+                    if texto.strip()
+                }
+            except ValueError as e:
+                st.error(f"❗ {e}")
+                st.stop()
+
+            if not valores_barrido:
+                st.error("❗ Indica valores para al menos un parámetro.")
+            elif len(config.demanda_poligonos) == 0:
+                st.error("❗ Debes definir al menos una demanda en la tabla de Demandas.")
+            else:
+                with st.spinner(f"🏃‍♂️ Simulando {len(combinaciones(valores_barrido))} combinaciones…"):
+                    df_barrido = ejecutar_barrido(config, valores_barrido)
+                st.success("✅ ¡Barrido completado!")
+                st.dataframe(df_barrido, use_container_width=True)
+
+                # plotly se carga solo al dibujar
+                import plotly.express as px
+
+                frontera = df_barrido[df_barrido["Frontera"]].sort_values("costo_total")
+                fig_barrido = px.scatter(
+                    df_barrido,
+                    x="costo_total",
+                    y="fill_rate",
+                    color="Frontera",
+                    hover_data=list(valores_barrido),
+                    title="Costo total vs. Fill Rate",
+                    labels={"costo_total": "Costo total ($)", "fill_rate": "Fill Rate (%)"}
+                )
+                fig_barrido.add_scatter(
+                    x=frontera["costo_total"],
+                    y=frontera["fill_rate"],
+                    mode="lines",
+                    line=dict(dash="dash"),
+                    name="Frontera"
+                )
+                st.plotly_chart(fig_barrido, use_container_width=True)
 
-        # 2) Unidades efectivamente entregadas
-        total_entregadas = df_entregas["Cantidad"].sum() if not df_entregas.empty else 0
-
-        # Fill Rate
-        fill_rate = (total_entregadas / total_demandadas * 100) if total_demandadas > 0 else 0
 
-        # Utilización media de camión
-        if len(df_rutas) > 0:
-            utilizaciones = df_rutas["Unidades"] / capacidad_camion
-            util_media = utilizaciones.mean() * 100
-        else:
-            util_media = 0
+barrido_parametros(config)
 
-        # Costo unitario
-        coste_unitario = (costo_total / total_entregadas) if total_entregadas > 0 else 0
 
-        # Mostrar con st.metric
-        um1, um2, um3, um4 = st.columns(4)
-        um1.metric(
-            label="📦 Fill Rate",
-            value=f"{fill_rate:.1f}%",
-            delta=f"{total_entregadas}/{total_demandadas}"
-        )
-        um2.metric(
-            label="🚚 Utilización media",
-            value=f"{util_media:.1f}%",
-            delta=f"Camión cap. {capacidad_camion}"
-        )
-        um3.metric(
-            label="💲 Costo unidad",
-            value=f"${coste_unitario:,.2f}",
-            delta="promedio"
-        )
-        um4.metric(
-            label="📊 Unidades entregadas",
-            value=f"{total_entregadas}"
+# ------------------------------------------------------------
+# 9) MONTE CARLO (DEMANDA, OFERTA Y TIEMPOS INCIERTOS)
+# ------------------------------------------------------------
+@st.fragment
+def monte_carlo(config):
+    with st.expander("🎲 Monte Carlo"):
+        st.markdown(
+            "Repite la simulación con demanda, `Max_oferta` y tiempos de viaje "
+            "perturbados (factores lognormales de media 1 con la variación indicada) "
+            "y resume los KPIs con intervalos de confianza."
         )
+        mc1, mc2, mc3 = st.columns(3)
+        replicas = mc1.number_input("Réplicas", min_value=2, value=50, step=10)
+        semilla_mc = mc2.number_input("Semilla", min_value=0, value=0, step=1)
+        nivel_mc = mc3.selectbox("Confianza", [0.90, 0.95, 0.99], index=1, format_func="{:.0%}".format)
+        cv_demanda = mc1.number_input("Variación demanda (CV)", min_value=0.0, value=0.10, step=0.05)
+        cv_oferta = mc2.number_input("Variación Max_oferta (CV)", min_value=0.0, value=0.10, step=0.05)
+        cv_tiempos = mc3.number_input("Variación tiempos de viaje (CV)", min_value=0.0, value=0.10, step=0.05)
+
+        if st.button("▶️ Ejecutar Monte Carlo"):
+            # Monte Carlo (scipy.stats) y plotly se cargan solo al usarlos
+            from simulacion.montecarlo import ejecutar_montecarlo, resumen_montecarlo
+            import plotly.express as px
+
+            if len(config.demanda_poligonos) == 0:
+                st.error("❗ Debes definir al menos una demanda en la tabla de Demandas.")
+            else:
+                try:
+                    with st.spinner(f"🏃‍♂️ Simulando {replicas} réplicas…"):
+                        df_mc = ejecutar_montecarlo(
+                            config, int(replicas), cv_demanda, cv_oferta, cv_tiempos, int(semilla_mc)
+                        )
+                except ValueError as e:
+                    st.error(f"❗ {e}")
+                    st.stop()
+                resumen_mc = resumen_montecarlo(df_mc, nivel_mc)
+                st.success("✅ ¡Monte Carlo completado!")
+
+                fila_fr = resumen_mc.set_index("KPI").loc["fill_rate"]
+                fila_ct = resumen_mc.set_index("KPI").loc["costo_total"]
+                r1, r2 = st.columns(2)
+                r1.metric(
+                    "📦 Fill Rate medio",
+                    f"{fila_fr['Media']:.1f}%",
+                    delta=f"IC {nivel_mc:.0%}: {fila_fr['IC inferior']:.1f}–{fila_fr['IC superior']:.1f}%",
+                    delta_color="off"
+                )
+                r2.metric(
+                    "💰 Costo total medio",
+                    f"${fila_ct['Media']:.2f}",
+                    delta=f"IC {nivel_mc:.0%}: ${fila_ct['IC inferior']:.0f}–${fila_ct['IC superior']:.0f}",
+                    delta_color="off"
+                )
+                st.dataframe(resumen_mc, use_container_width=True)
+                st.plotly_chart(
+                    px.scatter(
+                        df_mc, x="costo_total", y="fill_rate", hover_data=["Réplica"],
+                        marginal_x="histogram", marginal_y="histogram",
+                        title="Réplicas: costo total vs. fill rate",
+                        labels={"costo_total": "Costo total ($)", "fill_rate": "Fill Rate (%)"}
+                    ),
+                    use_container_width=True
+                )
+                st.download_button(
+                    "⬇️ Descargar réplicas (CSV)",
+                    data=df_mc.to_csv(index=False),
+                    file_name="montecarlo.csv",
+                    mime="text/csv"
+                )
 
 
-        # ------------------------------------------------------------
-        # 8) RESULTADOS TABULARES
-        # ------------------------------------------------------------
-        st.subheader("📊 Inventario Diario")
-        st.dataframe(df_inventario, use_container_width=True)
+monte_carlo(config)
 
-        st.subheader("🛒 Compras Realizadas")
-        if not df_compras.empty:
-            st.dataframe(df_compras, use_container_width=True)
-        else:
-            st.info("No se realizaron compras durante la simulación.")
 
-        st.subheader("📦 Entregas Ejecutadas")
-        if not df_entregas.empty:
-            st.dataframe(df_entregas, use_container_width=True)
-        else:
-            st.info("No se registraron entregas durante la simulación.")
-
-        st.subheader("🗺️ Rutas Diarias")
-        if not df_rutas.empty:
-            df_rutas["Detalle"] = df_rutas["Detalle"].astype(str)
-            st.dataframe(df_rutas, use_container_width=True)
-
-            st.subheader("📈 Diagrama de Gantt de Rutas")
-            def generar_gantt_rutas(df_rutas):
-                base = datetime(2025, 1, 1, 9, 0, 0)
-                df = df_rutas.copy().reset_index(drop=True)
-                df["Start"] = pd.NaT
-                df["Finish"] = pd.NaT
-
-                for dia, grupo in df.groupby("Día"):
-                    tiempo_acum = 0
-                    for idx in grupo.index:
-                        inicio = base + timedelta(days=int(dia), minutes=tiempo_acum)
-                        dur = int(df.at[idx, "Duración_min"])
-                        fin = inicio + timedelta(minutes=dur)
-
-                        df.at[idx, "Start"] = inicio
-                        df.at[idx, "Finish"] = fin
-                        tiempo_acum += dur
-
-                df["Task"] = "Día " + df["Día"].astype(str) + " – ruta " + df.index.astype(str)
-
-                fig = px.timeline(
-                    df,
-                    x_start="Start",
-                    x_end="Finish",
-                    y="Task",
-                    color="Día",
-                    title="Diagrama de Gantt de Rutas",
-                    labels={"Día": "Día", "Task": "Ruta"}
-                )
-                fig.update_yaxes(autorange="reversed")
-                fig.update_layout(
-                    xaxis_title="Fecha y hora",
-                    margin=dict(l=200, r=40, t=80, b=40),
-                    height=150 + 30 * len(df)
-                )
-                return fig
+# ------------------------------------------------------------
+# 10) ESTADÍSTICAS DE CACHÉ (sidebar)
+# ------------------------------------------------------------
+with st.sidebar.expander("💾 Caché de resultados"):
+    memoria = getattr(cache_resultados, "memoria", cache_resultados)
+    c1, c2 = st.columns(2)
+    c1.metric("Aciertos (memoria)", memoria.aciertos)
+    c2.metric("Fallos (memoria)", memoria.fallos)
+    if cache_disco is not None:
+        c1.metric("Aciertos (disco)", cache_disco.aciertos)
+        c2.metric("Fallos (disco)", cache_disco.fallos)
+        st.caption(
+            f"{len(cache_disco)} entradas en disco · "
+            f"{cache_disco.bytes_usados() / 2**20:.1f} de "
+            f"{cache_disco.max_bytes / 2**20:.0f} MB · {cache_disco.ruta}"
+        )
+        if st.button("🗑️ Vaciar caché en disco"):
+            cache_disco.vaciar()
+            st.rerun()
+    else:
+        st.caption("Sin caché en disco: solo se conservan resultados en memoria.")
 
-            fig_rutas = generar_gantt_rutas(df_rutas)
-            st.plotly_chart(fig_rutas, use_container_width=True)
-        else:
-            st.info("No hay rutas para graficar.")
+
+# ------------------------------------------------------------
+# 11) ZONAS DE REPARTO: COSTO FRENTE A PLANIFICAR SIN ZONAS
+# ------------------------------------------------------------
+@st.fragment
+def comparar_zonas(config):
+    with st.expander("🗺️ Zonas de reparto"):
+        st.markdown(
+            "Simula el escenario con las zonas del sidebar y sin zonas, y compara "
+            "el tiempo de simulación y la distancia recorrida por unidad entregada."
+        )
+        if config.tamano_zona == 0:
+            st.info("Indica los polígonos por zona en el sidebar para comparar.")
+        elif st.button("▶️ Comparar con planificación sin zonas"):
+            try:
+                with st.spinner("🏃‍♂️ Simulando con y sin zonas…"):
+                    df_zonas = comparar_zonificacion(config)
+            except ValueError as e:
+                st.error(f"❗ {e}")
+                st.stop()
+            z1, z2 = st.columns(2)
+            z1.metric(
+                "📏 Distancia extra por zonas",
+                f"{df_zonas['Distancia extra (%)'].iloc[1]:+.1f}%"
+            )
+            z2.metric(
+                "⏱️ Tiempo con zonas",
+                f"{df_zonas['Segundos'].iloc[1]:.2f} s",
+                delta=f"{df_zonas['Segundos'].iloc[1] - df_zonas['Segundos'].iloc[0]:+.2f} s",
+                delta_color="inverse"
+            )
+            st.dataframe(df_zonas, use_container_width=True)
+
+
+comparar_zonas(config)
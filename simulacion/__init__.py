@@ -0,0 +1,25 @@
+"""Motor de simulación de reforestación y logística, independiente de Streamlit."""
+from .motor import (
+    ALMACEN,
+    ConfigSimulacion,
+    MotorMultialmacen,
+    MotorSimulacion,
+    ResultadosSimulacion,
+    calcular_kpis,
+    crear_motor,
+    simular,
+)
+from .escenarios import cargar_escenario, config_desde_tablas
+
+__all__ = [
+    "ALMACEN",
+    "ConfigSimulacion",
+    "MotorMultialmacen",
+    "MotorSimulacion",
+    "ResultadosSimulacion",
+    "calcular_kpis",
+    "crear_motor",
+    "simular",
+    "cargar_escenario",
+    "config_desde_tablas",
+]
@@ -0,0 +1,135 @@
+"""
+Planificador de ahorros (Clarke–Wright) para una flota de camiones.
+
+Se parte de una ruta de ida y vuelta por polígono y se unen rutas por sus
+extremos en orden de ahorro decreciente, t(i, almacén) + t(almacén, j) −
+t(i, j) más el tiempo de carga que ya no se repite, mientras la ruta unida
+quepa en el camión y en la jornada. Los ahorros solo se calculan entre
+cada polígono y sus vecinos más cercanos, así que la lista de ahorros crece
+linealmente con el número de polígonos.
+
+Entregas divididas: si la carga de una ruta de un solo polígono no cabe
+entera en la ruta con la que se une, esa ruta se llena hasta la capacidad
+con parte de la carga del polígono y el resto queda como ruta propia, que
+puede seguir uniéndose. Así los camiones salen llenos como con el
+planificador voraz, en lugar de un viaje por polígono cuando las cargas
+no caben de a pares.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Vecinos más cercanos de cada polígono con los que se calcula el ahorro
+VECINOS = 25
+
+
+def asignar_carga(disponibles, restante, capacidad):
+    """
+    Cantidad por especie (filas) para cada nodo (columnas, en orden de
+    prioridad): la demanda de cada nodo se llena especie por especie hasta
+    la capacidad de un camión y el stock se reparte nodo por nodo.
+    """
+    previo = np.cumsum(restante, axis=0) - restante
+    q = np.minimum(restante, np.maximum(capacidad - previo, 0))
+    previo = np.cumsum(q, axis=1) - q
+    return np.minimum(q, np.maximum(disponibles[:, None] - previo, 0))
+
+
+def construir_rutas(nodos, cargas, tiempos, coords, almacen, capacidad, limite,
+                    tiempo_carga, tiempo_descarga):
+    """
+    Rutas de ahorros sobre `nodos` (índices del motor) con `cargas` unidades
+    cada uno. Devuelve `(rutas, evaluados)`: una lista de `(nodos de la
+    ruta, duración, unidades, unidades por nodo)` y el número de ahorros
+    evaluados. Con entregas divididas un nodo puede estar en
+    varias rutas. Supone la matriz de tiempos simétrica.
+    """
+    n = len(nodos)
+    ida = tiempos[almacen, nodos]
+    vuelta = tiempos[nodos, almacen]
+    duracion = tiempo_carga + ida + tiempo_descarga + vuelta
+    carga = np.asarray(cargas, dtype=float).copy()
+    rutas = {r: [r] for r in range(n)}
+    partes = {r: [carga[r]] for r in range(n)}
+    ruta_de = np.arange(n)
+
+    ahorros = []
+    k = min(VECINOS, n - 1)
+    if k > 0:
+        _, vecinos = cKDTree(coords[nodos]).query(coords[nodos], k=k + 1)
+        i = np.repeat(np.arange(n), k + 1)
+        j = vecinos.ravel()
+        a, b = np.minimum(i, j), np.maximum(i, j)
+        pares = np.unique(a[a != b] * n + b[a != b])
+        a, b = pares // n, pares % n
+        ahorro = vuelta[a] + ida[b] - tiempos[nodos[a], nodos[b]] + tiempo_carga
+        positivo = ahorro > 0
+        ahorros = list(zip(
+            (-ahorro[positivo]).tolist(), a[positivo].tolist(), b[positivo].tolist()
+        ))
+        ahorros.sort()
+
+    # Primero solo uniones enteras; después, con las rutas ya unidas, también
+    # entregas divididas para llenar los camiones que quedaron a medias
+    evaluados = 0
+    for dividir in (False, True):
+        evaluados += _unir(ahorros, dividir, rutas, partes, ruta_de, carga, duracion,
+                           capacidad, limite)
+
+    return [
+        (nodos[ruta], float(duracion[r]), float(carga[r]), np.array(partes[r]))
+        for r, ruta in rutas.items()
+    ], evaluados
+
+
+def _unir(ahorros, dividir, rutas, partes, ruta_de, carga, duracion, capacidad, limite):
+    """
+    Recorre `ahorros` (de mayor a menor) uniendo rutas por sus extremos; con
+    `dividir`, también con entregas divididas. Devuelve cuántos evaluó.
+    """
+    evaluados = 0
+    for menos_ahorro, a, b in ahorros:
+        evaluados += 1
+        ra, rb = ruta_de[a], ruta_de[b]
+        if ra == rb:
+            continue
+        ruta_a, ruta_b = rutas[ra], rutas[rb]
+        # Solo se unen extremos: un nodo interior ya tiene ambos vecinos
+        if a not in (ruta_a[0], ruta_a[-1]) or b not in (ruta_b[0], ruta_b[-1]):
+            continue
+        nueva = duracion[ra] + duracion[rb] + menos_ahorro
+        if nueva > limite:
+            continue
+        if carga[ra] + carga[rb] > capacidad:
+            if not dividir:
+                continue
+            # Entrega dividida: la ruta de un solo polígono completa la otra
+            if len(ruta_b) > 1:
+                a, b, ra, rb, ruta_a, ruta_b = b, a, rb, ra, ruta_b, ruta_a
+            if len(ruta_b) > 1 or carga[ra] >= capacidad:
+                continue
+            parte = capacidad - carga[ra]
+            if ruta_a[-1] != a:
+                ruta_a.reverse()
+                partes[ra].reverse()
+            ruta_a.append(b)
+            partes[ra].append(parte)
+            carga[ra] = capacidad
+            duracion[ra] = nueva
+            carga[rb] -= parte
+            partes[rb][0] -= parte
+            continue
+
+        # ... → a  +  b → ...
+        if ruta_a[-1] != a:
+            ruta_a.reverse()
+            partes[ra].reverse()
+        if ruta_b[0] != b:
+            ruta_b.reverse()
+            partes[rb].reverse()
+        ruta_a.extend(ruta_b)
+        partes[ra].extend(partes.pop(rb))
+        ruta_de[ruta_b] = ra
+        del rutas[rb]
+        carga[ra] += carga[rb]
+        duracion[ra] = nueva
+    return evaluados
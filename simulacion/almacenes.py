@@ -0,0 +1,115 @@
+"""
+Varios almacenes: cada polígono se atiende desde el almacén más cercano y
+cada almacén se simula como un escenario independiente, con su propio
+espacio, inventario, flota (`camiones` por almacén) y compras.
+
+La asignación se calcula una sola vez (un índice polígono → almacén con la
+matriz de distancias del motor, en línea recta o por red vial). La oferta
+de cada proveedor se reparte entre almacenes en proporción a la demanda de
+cada especie que atiende cada uno, así que ningún almacén depende de lo que
+compren los demás y se pueden simular en paralelo.
+"""
+from dataclasses import replace
+
+import numpy as np
+
+
+def leer_almacenes(texto, espacio_por_defecto):
+    """
+    Interpreta "18:1000, 42:800" (polígono:espacio) o "18, 42" (todos con
+    `espacio_por_defecto`). Devuelve {polígono: espacio_max_almacen}.
+    """
+    almacenes = {}
+    for parte in texto.split(","):
+        parte = parte.strip()
+        if not parte:
+            continue
+        pid, _, espacio = parte.partition(":")
+        try:
+            pid = int(pid)
+            espacio = int(espacio) if espacio.strip() else espacio_por_defecto
+        except ValueError:
+            raise ValueError(
+                f"Almacén inválido '{parte}': usa polígono o polígono:espacio"
+            ) from None
+        if pid in almacenes:
+            raise ValueError(f"El polígono {pid} aparece dos veces como almacén.")
+        almacenes[pid] = espacio
+    return almacenes
+
+
+def asignar_almacenes(distancias, poligonos, almacenes):
+    """
+    Almacén más cercano de cada polígono (en el orden de `poligonos`, que es
+    el de las filas de `distancias`). Cada almacén queda asignado a sí mismo.
+    """
+    indice = {pid: i for i, pid in enumerate(poligonos)}
+    columnas = [indice[a] for a in almacenes]
+    cercano = np.asarray(list(almacenes))[np.argmin(distancias[:, columnas], axis=1)]
+    cercano[columnas] = list(almacenes)
+    return cercano
+
+
+def repartir_ofertas(demandas_oferta, participacion):
+    """
+    Oferta de cada almacén: `Max_oferta` de cada proveedor y especie
+    repartido según `participacion` ({almacén: {especie: fracción}}), en
+    unidades enteras y sin perder el total.
+    """
+    almacenes = list(participacion)
+    ofertas = {
+        a: {prov: {} for prov in demandas_oferta} for a in almacenes
+    }
+    for prov, datos in demandas_oferta.items():
+        for esp, info in datos.items():
+            if not info:
+                for a in almacenes:
+                    ofertas[a][prov][esp] = info
+                continue
+            fraccion = np.array([participacion[a].get(esp, 0.0) for a in almacenes])
+            acumulado = np.round(np.cumsum(fraccion) * info["max_oferta"])
+            partes = np.diff(acumulado, prepend=0)
+            for a, m in zip(almacenes, partes.tolist()):
+                ofertas[a][prov][esp] = {**info, "max_oferta": m}
+    return ofertas
+
+
+def configs_por_almacen(config, asignacion):
+    """
+    {almacén: ConfigSimulacion} con los polígonos asignados a cada almacén,
+    su demanda, su parte de la oferta y su espacio. Las especies se
+    conservan todas (aunque un almacén no tenga demanda de alguna) para que
+    los inventarios de todos los almacenes tengan las mismas columnas.
+    """
+    almacen_de = dict(zip(config.poligonos_coords, asignacion.tolist()))
+    demanda = {
+        a: {esp: {} for esp in config.demanda_poligonos} for a in config.almacenes
+    }
+    for esp, dem in config.demanda_poligonos.items():
+        for pid, d in dem.items():
+            demanda[almacen_de[pid]][esp][pid] = d
+
+    totales = {esp: sum(dem.values()) for esp, dem in config.demanda_poligonos.items()}
+    participacion = {
+        a: {
+            esp: sum(dem.values()) / totales[esp] if totales[esp] > 0 else 0.0
+            for esp, dem in demanda[a].items()
+        }
+        for a in config.almacenes
+    }
+    ofertas = repartir_ofertas(config.demandas_oferta, participacion)
+
+    return {
+        a: replace(
+            config,
+            poligonos_coords={
+                pid: xy for pid, xy in config.poligonos_coords.items() if almacen_de[pid] == a
+            },
+            demanda_poligonos=demanda[a],
+            demandas_oferta=ofertas[a],
+            espacio_max_almacen=espacio,
+            almacen=a,
+            almacenes={},
+        )
+        for a, espacio in config.almacenes.items()
+    }
@@ -0,0 +1,119 @@
+"""
+Barrido de parámetros logísticos en paralelo:
+
+    python -m simulacion.barrido escenarios/ejemplo_completo.json \
+        -p capacidad_camion=300:900:100 -p jornada_min=360,480 -o barrido.csv
+
+Cada combinación de valores se simula en un pool de procesos (por defecto,
+uno por núcleo) y sus KPIs se reúnen en una sola tabla, con la frontera
+costo total vs. fill rate marcada en la columna "Frontera".
+"""
+import argparse
+import itertools
+import sys
+
+import pandas as pd
+
+from .escenarios import cargar_escenario
+from .paralelo import simular_variantes
+
+# Parámetros del sidebar que tiene sentido barrer
+PARAMETROS_BARRIDO = (
+    "capacidad_camion",
+    "espacio_max_almacen",
+    "jornada_min",
+    "aclimatacion_min_dias",
+    "costo_transporte",
+    "camiones",
+)
+
+
+def leer_valores(texto):
+    """
+    Interpreta "inicio:fin:paso" (fin incluido) o una lista "a,b,c".
+    Devuelve enteros cuando todos los valores lo son.
+    """
+    texto = texto.strip()
+    if ":" in texto:
+        partes = [float(x) for x in texto.split(":")]
+        if len(partes) != 3 or partes[2] <= 0:
+            raise ValueError(f"Rango inválido '{texto}': usa inicio:fin:paso con paso > 0")
+        inicio, fin, paso = partes
+        n = int((fin - inicio) / paso + 1e-9) + 1
+        valores = [inicio + i * paso for i in range(max(n, 0))]
+    else:
+        valores = [float(x) for x in texto.split(",") if x.strip()]
+    if not valores:
+        raise ValueError(f"Sin valores en '{texto}'")
+    if all(v.is_integer() for v in valores):
+        valores = [int(v) for v in valores]
+    return valores
+
+
+def combinaciones(valores):
+    """Producto cartesiano de {parámetro: [valores]} como lista de dicts."""
+    desconocidos = set(valores) - set(PARAMETROS_BARRIDO)
+    if desconocidos:
+        raise ValueError("Parámetros no barribles: " + ", ".join(sorted(desconocidos)))
+    nombres = list(valores)
+    return [dict(zip(nombres, combo)) for combo in itertools.product(*valores.values())]
+
+
+def frontera_costo_fill_rate(df):
+    """
+    Marca las combinaciones no dominadas: ninguna otra logra mayor fill rate
+    con costo total menor o igual.
+    """
+    df = df.copy()
+    orden = df.sort_values(["costo_total", "fill_rate"], ascending=[True, False]).index
+    mejor = -1.0
+    frontera = pd.Series(False, index=df.index)
+    for i in orden:
+        if df.at[i, "fill_rate"] > mejor:
+            frontera[i] = True
+            mejor = df.at[i, "fill_rate"]
+    df["Frontera"] = frontera
+    return df
+
+
+def ejecutar_barrido(config_base, valores, procesos=None):
+    """
+    Simula todas las combinaciones de `valores` ({parámetro: [valores]})
+    sobre `config_base` y devuelve una tabla con parámetros y KPIs.
+    """
+    combos = combinaciones(valores)
+    filas = simular_variantes(config_base, [(c, c) for c in combos], procesos)
+    return frontera_costo_fill_rate(pd.DataFrame(filas))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m simulacion.barrido",
+        description="Barre parámetros logísticos sobre un escenario.",
+    )
+    parser.add_argument("escenario", help="archivo de escenario (.json)")
+    parser.add_argument(
+        "-p", "--param", action="append", default=[], metavar="NOMBRE=VALORES",
+        help="p. ej. capacidad_camion=300:900:100 o jornada_min=360,480 "
+             f"({', '.join(PARAMETROS_BARRIDO)})",
+    )
+    parser.add_argument("-o", "--salida", default="barrido.csv", help="archivo CSV de resultados")
+    parser.add_argument("-j", "--procesos", type=int, default=None, help="procesos (por defecto, todos los núcleos)")
+    args = parser.parse_args(argv)
+
+    valores = {}
+    for p in args.param:
+        nombre, _, texto = p.partition("=")
+        valores[nombre.strip()] = leer_valores(texto)
+    if not valores:
+        parser.error("indica al menos un parámetro con -p")
+
+    _, config = cargar_escenario(args.escenario)
+    df = ejecutar_barrido(config, valores, args.procesos)
+    df.to_csv(args.salida, index=False)
+    print(f"{len(df)} combinaciones ({int(df['Frontera'].sum())} en la frontera) → {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Corrida por lotes sin interfaz:
+
+    python -m simulacion.batch escenarios/*.json --salida resultados/ --procesos 8
+
+Por cada escenario escribe `<salida>/<nombre>/{inventario,compras,entregas,rutas}.csv`
+y al final un `<salida>/resumen.csv` con los KPIs de todos los escenarios. Con
+`--formato parquet` o `--formato arrow` las tablas se exportan compactas (ver
+`simulacion.exportar`).
+"""
+import argparse
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from .escenarios import cargar_escenario
+from .exportar import FORMATOS, exportar
+from .flujo import simular_en_flujo
+
+
+def ejecutar_escenario(ruta, salida, formato="csv"):
+    """
+    Simula un archivo de escenario, guarda sus tablas y devuelve sus KPIs.
+
+    Las filas se vuelcan por bloques a un directorio temporal mientras se
+    simula; los CSV se escriben bloque a bloque y los KPIs salen de los
+    totales, sin armar las tablas completas.
+    """
+    nombre, config = cargar_escenario(ruta)
+
+    destino = Path(salida) / nombre
+    destino.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="simulacion_") as directorio:
+        for _, acumulado in simular_en_flujo(config, directorio=directorio):
+            pass
+        with acumulado:
+            if formato == "csv":
+                for tabla, bloques in acumulado.tablas.items():
+                    for i, df in enumerate(bloques.partes()):
+                        df.to_csv(destino / f"{tabla}.csv", index=False,
+                                  mode="w" if i == 0 else "a", header=i == 0)
+            else:
+                exportar(config, acumulado.resultados(), destino, formato)
+            kpis = acumulado.kpis()
+
+    return {"Escenario": nombre, "Archivo": str(ruta), **kpis}
+
+
+def _ejecutar_seguro(ruta, salida, formato="csv"):
+    try:
+        return ejecutar_escenario(ruta, salida, formato)
+    except Exception as e:
+        return {"Escenario": Path(ruta).stem, "Archivo": str(ruta), "Error": str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m simulacion.batch",
+        description="Ejecuta la simulación para varios archivos de escenario.",
+    )
+    parser.add_argument("escenarios", nargs="+", help="archivos de escenario (.json)")
+    parser.add_argument("-o", "--salida", default="resultados", help="carpeta de resultados")
+    parser.add_argument(
+        "-j", "--procesos", type=int, default=1,
+        help="número de procesos en paralelo (por defecto 1)",
+    )
+    parser.add_argument(
+        "-f", "--formato", choices=("csv", *FORMATOS), default="csv",
+        help="formato de las tablas de resultados (por defecto csv)",
+    )
+    args = parser.parse_args(argv)
+
+    salida = Path(args.salida)
+    salida.mkdir(parents=True, exist_ok=True)
+
+    if args.procesos > 1:
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            filas = list(pool.map(
+                _ejecutar_seguro, args.escenarios,
+                [salida] * len(args.escenarios), [args.formato] * len(args.escenarios),
+            ))
+    else:
+        filas = [_ejecutar_seguro(ruta, salida, args.formato) for ruta in args.escenarios]
+
+    resumen = pd.DataFrame(filas)
+    resumen.to_csv(salida / "resumen.csv", index=False)
+
+    errores = [f for f in filas if f.get("Error")]
+    for f in errores:
+        print(f"✗ {f['Archivo']}: {f['Error']}", file=sys.stderr)
+    print(f"{len(filas) - len(errores)}/{len(filas)} escenarios simulados → {salida / 'resumen.csv'}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
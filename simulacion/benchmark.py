@@ -0,0 +1,106 @@
+"""
+Benchmark por etapas sobre escenarios sintéticos:
+
+    python -m simulacion.benchmark                      # tamaños por defecto
+    python -m simulacion.benchmark -t 500x30x8x180 -t 2000x60x12x365 -r 5
+    python -m simulacion.benchmark -o hoy.csv --referencia ayer.csv
+
+Cada tamaño es POLÍGONOSxESPECIESxPROVEEDORESxDÍAS. Para cada uno se mide la
+construcción del motor, cada etapa del día (inventario, disponibles, rutas,
+entregas, compras) y la corrida completa, volcando las filas por bloques a
+un directorio temporal como una corrida larga; se reporta la mediana de
+las repeticiones. Con --referencia se compara contra un CSV
+anterior del mismo benchmark (razón > 1: más lento que la referencia).
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from .escenarios import generar_escenario
+from .flujo import simular_en_flujo
+from .perfil import Perfilador
+
+TAMANOS_POR_DEFECTO = ["50x10x4x60", "500x30x8x180", "2000x60x12x365"]
+
+
+def leer_tamano(texto):
+    partes = [int(x) for x in texto.lower().split("x")]
+    if len(partes) != 4 or min(partes) < 1:
+        raise argparse.ArgumentTypeError(
+            f"Tamaño inválido '{texto}': usa POLÍGONOSxESPECIESxPROVEEDORESxDÍAS"
+        )
+    return tuple(partes)
+
+
+def medir(config):
+    """Una corrida cronometrada: {etapa: (segundos, llamadas)}."""
+    perfil = Perfilador()
+    with tempfile.TemporaryDirectory(prefix="simulacion_") as directorio:
+        t0 = time.perf_counter()
+        for _, acumulado in simular_en_flujo(config, perfil, directorio):
+            pass
+        t_simular = time.perf_counter() - t0
+        acumulado.borrar()
+    return {
+        **{etapa: tuple(valores) for etapa, valores in perfil.etapas.items()},
+        "simular": (t_simular, 1),
+    }
+
+
+def ejecutar_benchmark(tamanos, repeticiones=3, semilla=0):
+    """Tabla con la mediana de segundos por tamaño y etapa."""
+    filas = []
+    for n_pol, n_esp, n_prov, dias in tamanos:
+        config = generar_escenario(n_pol, n_esp, n_prov, dias, semilla=semilla)
+        corridas = [medir(config) for _ in range(repeticiones)]
+        for etapa in corridas[0]:
+            filas.append({
+                "Tamaño": f"{n_pol}x{n_esp}x{n_prov}x{dias}",
+                "Etapa": etapa,
+                "Segundos": statistics.median(c[etapa][0] for c in corridas),
+                "Llamadas": corridas[0][etapa][1],
+            })
+    return pd.DataFrame(filas)
+
+
+def comparar(df, referencia):
+    """Agrega la razón contra una corrida de referencia (> 1: regresión)."""
+    ref = referencia.set_index(["Tamaño", "Etapa"])["Segundos"].rename("Referencia")
+    df = df.join(ref, on=["Tamaño", "Etapa"])
+    df["Razón"] = df["Segundos"] / df["Referencia"]
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m simulacion.benchmark",
+        description="Mide el tiempo de cada etapa de la simulación en escenarios sintéticos.",
+    )
+    parser.add_argument(
+        "-t", "--tamano", action="append", type=leer_tamano, metavar="NxSxPxD",
+        help=f"tamaño del escenario (por defecto: {' '.join(TAMANOS_POR_DEFECTO)})",
+    )
+    parser.add_argument("-r", "--repeticiones", type=int, default=3)
+    parser.add_argument("-s", "--semilla", type=int, default=0)
+    parser.add_argument("-o", "--salida", help="guardar resultados en CSV")
+    parser.add_argument("--referencia", help="CSV de una corrida anterior para comparar")
+    args = parser.parse_args(argv)
+
+    tamanos = args.tamano or [leer_tamano(t) for t in TAMANOS_POR_DEFECTO]
+    df = ejecutar_benchmark(tamanos, args.repeticiones, args.semilla)
+    if args.referencia:
+        df = comparar(df, pd.read_csv(args.referencia))
+    if args.salida:
+        df.to_csv(args.salida, index=False)
+
+    with pd.option_context("display.float_format", "{:.4f}".format, "display.width", 120):
+        print(df.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
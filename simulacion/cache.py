@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import fields
+from pathlib import Path
+
+from .flujo import simular_en_flujo
+
+
+# Caché persistente por defecto (se puede cambiar con SIMULACION_CACHE)
+RUTA_CACHE_DISCO = Path(
+    os.environ.get("SIMULACION_CACHE", Path.home() / ".cache" / "simulacion_reforestacion")
+) / "cache.sqlite"
+
+# Se incluye en las claves en disco: subirla invalida lo guardado por
+# versiones del motor que producían otros resultados
+VERSION_CACHE = 2
+
+
+def clave_config(config):
+    """
+    Hash del contenido de una configuración (tablas y parámetros). El orden
+    de las tablas se conserva porque influye en los desempates del motor.
+    Con red vial se incluye el contenido del archivo, no solo su ruta.
+
+    Los campos se serializan directamente (sin `asdict`, que copia en
+    profundidad todas las tablas); el texto es el mismo, así que las claves
+    guardadas en disco siguen valiendo.
+    """
+    campos = {f.name: getattr(config, f.name) for f in fields(config)}
+    contenido = json.dumps(campos, ensure_ascii=False, default=str)
+    h = hashlib.sha256(contenido.encode("utf-8"))
+    if config.red_vial:
+        h.update(Path(config.red_vial).read_bytes())
+    return h.hexdigest()
+
+
+class CacheLRU:
+    """Memoria acotada de resultados: descarta el menos usado recientemente."""
+
+    def __init__(self, max_entradas=32):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __contains__(self, clave):
+        return clave in self._datos
+
+    def __len__(self):
+        return len(self._datos)
+
+    def get(self, clave):
+        if clave not in self._datos:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self._datos.move_to_end(clave)
+        return self._datos[clave]
+
+    def put(self, clave, valor):
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+
+class CacheDisco:
+    """
+    Caché persistente en un archivo SQLite, con la misma interfaz que
+    `CacheLRU`. Los valores se guardan serializados con pickle y, al
+    superar `max_bytes`, se descartan los usados hace más tiempo.
+
+    Cada operación abre su propia conexión, así que una instancia se puede
+    compartir entre hilos (las sesiones de Streamlit) y entre procesos. Sin
+    `ruta` se usa `RUTA_CACHE_DISCO`.
+    """
+
+    def __init__(self, ruta=None, max_bytes=512 * 2**20):
+        self.ruta = Path(ruta if ruta is not None else RUTA_CACHE_DISCO)
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS entradas ("
+                " clave TEXT PRIMARY KEY, valor BLOB NOT NULL,"
+                " tamano INTEGER NOT NULL, usado REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS por_uso ON entradas (usado)")
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def _clave(clave):
+        return f"v{VERSION_CACHE}:{clave}"
+
+    def __contains__(self, clave):
+        with self._conectar() as con:
+            fila = con.execute(
+                "SELECT 1 FROM entradas WHERE clave = ?", (self._clave(clave),)
+            ).fetchone()
+        return fila is not None
+
+    def __len__(self):
+        with self._conectar() as con:
+            return con.execute("SELECT COUNT(*) FROM entradas").fetchone()[0]
+
+    def bytes_usados(self):
+        with self._conectar() as con:
+            return con.execute("SELECT COALESCE(SUM(tamano), 0) FROM entradas").fetchone()[0]
+
+    def get(self, clave):
+        with self._conectar() as con:
+            fila = con.execute(
+                "SELECT valor FROM entradas WHERE clave = ?", (self._clave(clave),)
+            ).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            con.execute(
+                "UPDATE entradas SET usado = ? WHERE clave = ?",
+                (time.time(), self._clave(clave)),
+            )
+        self.aciertos += 1
+        return pickle.loads(fila[0])
+
+    def put(self, clave, valor):
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(datos) > self.max_bytes:
+            return
+        with self._conectar() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?)",
+                (self._clave(clave), datos, len(datos), time.time()),
+            )
+            # Descarta las menos usadas recientemente hasta volver al límite
+            exceso = con.execute("SELECT SUM(tamano) FROM entradas").fetchone()[0] - self.max_bytes
+            if exceso > 0:
+                viejas = []
+                for vieja, tamano in con.execute(
+                    "SELECT clave, tamano FROM entradas ORDER BY usado"
+                ):
+                    if exceso <= 0:
+                        break
+                    viejas.append((vieja,))
+                    exceso -= tamano
+                con.executemany("DELETE FROM entradas WHERE clave = ?", viejas)
+
+    def vaciar(self):
+        with self._conectar() as con:
+            con.execute("DELETE FROM entradas")
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            con.execute("VACUUM")
+        finally:
+            con.close()
+
+
+class CacheEnCapas:
+    """
+    Caché en memoria delante de una persistente: lo que solo está en disco
+    se sube a memoria al leerlo y lo nuevo se guarda en ambas.
+    """
+
+    def __init__(self, memoria, disco):
+        self.memoria = memoria
+        self.disco = disco
+
+    def __contains__(self, clave):
+        return clave in self.memoria or clave in self.disco
+
+    def __len__(self):
+        return len(self.disco)
+
+    def get(self, clave):
+        valor = self.memoria.get(clave)
+        if valor is None:
+            valor = self.disco.get(clave)
+            if valor is not None:
+                self.memoria.put(clave, valor)
+        return valor
+
+    def put(self, clave, valor):
+        self.memoria.put(clave, valor)
+        self.disco.put(clave, valor)
+
+
+def simular_con_cache(config, cache, perfil=None, al_avanzar=None, cache_matrices=None,
+                      clave=None, directorio=None):
+    """
+    Devuelve `(resultados, desde_cache)`, simulando solo si hace falta. Con
+    un `perfil` siempre se simula (para medir) y se actualiza la caché.
+    Mientras se simula se llama `al_avanzar(dia_simulado, acumulado)` con
+    cada día producido (ver `simulacion.flujo`). `cache_matrices` (p. ej. un
+    `CacheDisco`) guarda las matrices de viaje por red vial. `clave` evita
+    recalcular `clave_config(config)` si quien llama ya la tiene. Con un
+    `directorio`, las tablas largas se vuelcan ahí por bloques mientras se
+    simula y los bloques se borran al terminar.
+    """
+    if clave is None:
+        clave = clave_config(config)
+    if perfil is None:
+        resultados = cache.get(clave)
+        if resultados is not None:
+            return resultados, True
+    flujo = simular_en_flujo(config, perfil, directorio, cache_matrices=cache_matrices)
+    for dia_simulado, acumulado in flujo:
+        if al_avanzar is not None:
+            al_avanzar(dia_simulado, acumulado)
+    with acumulado:
+        resultados = acumulado.resultados()
+    cache.put(clave, resultados)
+    return resultados, False
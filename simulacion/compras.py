@@ -0,0 +1,162 @@
+"""
+Plan de compras de todo el horizonte como un solo problema lineal entero
+mixto (`scipy.optimize.milp`), alternativa a las compras voraces día a día.
+
+Espacio en almacén, capacidad de reparto y transporte son restricciones
+sobre el total de unidades, y la aclimatación no depende de la especie; lo
+único propio de cada especie es su costo (según qué ofertas se usen) y su
+demanda. Por eso el modelo se plantea en unidades totales por día —compra
+`z`, inventario al cierre `I`, entrega `w` y día de pedido `y` (binaria)—
+más lo comprado a cada oferta `v` en todo el horizonte:
+
+    I[d] = I[d-1] + z[d-1] - w[d]          (lo comprado llega mañana)
+    w[d] <= I[d - aclimatacion]             (solo se entrega lo aclimatado)
+    I[d] + z[d] <= espacio_max_almacen
+    w[d] <= capacidad de reparto del día
+    z[d] <= M · y[d]
+    Σd z[d] = Σ v,   v[p, s] <= Max_oferta,   Σp v[p, s] <= demanda de s
+
+El plan se resuelve en dos pasos. Primero, sin costos (un problema
+lineal), la mayor cantidad que se puede entregar en el horizonte; después,
+con esa entrega como restricción, el plan más barato: costo de compra +
+transporte por día de pedido. Así no entregar nunca sale más barato que
+entregar, y el costo solo decide cómo y cuándo se compra.
+
+El plan es solo el total de unidades por día: el motor compra esas
+unidades en el mismo orden de especies que las compras voraces. Si el
+solver se detiene por tiempo sin probar que el plan es óptimo, se avisa
+con un `RuntimeWarning` y se usa el mejor plan encontrado.
+"""
+import warnings
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+
+# Límite de tiempo y brecha relativa aceptada del solver
+TIEMPO_LIMITE_S = 30
+BRECHA_RELATIVA = 1e-3
+
+# Costo por unidad y día de espera de una entrega: solo desempata a favor
+# de entregar (y comprar) pronto
+COSTO_ATRASO = 1e-3
+
+
+def optimizar_compras(demanda_total, costo, max_oferta, config, capacidad_diaria):
+    """
+    Unidades a pedir cada día del horizonte (en total, de todas las
+    especies). `costo` y
+    `max_oferta` son proveedor × especie (costo NaN donde no hay oferta) y
+    `capacidad_diaria` las unidades que la flota puede repartir por día.
+    """
+    n_especies = len(demanda_total)
+    dias = config.dias_totales
+    acl = config.aclimatacion_min_dias
+    ofertas_p, ofertas_s = np.nonzero(~np.isnan(costo) & (max_oferta > 0))
+    n_ofertas = len(ofertas_p)
+    if n_ofertas == 0 or dias == 0:
+        return np.zeros(dias)
+
+    # Posición de cada bloque de variables
+    z0, i0, w0, y0 = 0, dias, 2 * dias, 3 * dias
+    v0 = 4 * dias
+    n_vars = v0 + n_ofertas
+
+    d = np.arange(dias)
+    filas, columnas, valores, lb, ub = [], [], [], [], []
+
+    def restriccion(n, terminos, inferior, superior):
+        """Agrega `n` filas: `terminos` son (fila, columna, coeficiente)."""
+        base = sum(len(x) for x in lb)
+        for fila, columna, coef in terminos:
+            filas.append(base + np.asarray(fila))
+            columnas.append(np.asarray(columna))
+            valores.append(np.full(len(columnas[-1]), float(coef)))
+        lb.append(np.broadcast_to(np.asarray(inferior, dtype=float), (n,)))
+        ub.append(np.broadcast_to(np.asarray(superior, dtype=float), (n,)))
+
+    # Balance de inventario
+    restriccion(
+        dias,
+        [(d, i0 + d, 1), (d[1:], i0 + d[1:] - 1, -1), (d[1:], z0 + d[1:] - 1, -1), (d, w0 + d, 1)],
+        0, 0,
+    )
+    # Aclimatación: con 0 días basta con que el inventario no sea negativo
+    if 0 < acl < dias:
+        n = dias - acl
+        restriccion(n, [(d[:n], w0 + d[acl:], 1), (d[:n], i0 + d[:n], -1)], -np.inf, 0)
+    # Espacio en almacén y día de pedido
+    restriccion(dias, [(d, i0 + d, 1), (d, z0 + d, 1)], -np.inf, config.espacio_max_almacen)
+    tope_pedido = min(config.espacio_max_almacen, demanda_total.sum())
+    restriccion(dias, [(d, z0 + d, 1), (d, y0 + d, -tope_pedido)], -np.inf, 0)
+    # Lo comprado en el horizonte se reparte entre ofertas...
+    restriccion(
+        1,
+        [(np.zeros(n_ofertas, dtype=int), v0 + np.arange(n_ofertas), 1),
+         (np.zeros(dias, dtype=int), z0 + d, -1)],
+        0, 0,
+    )
+    # ... sin comprar de cada especie más de lo que demanda
+    restriccion(n_especies, [(ofertas_s, v0 + np.arange(n_ofertas), 1)], -np.inf, demanda_total)
+
+    matriz = coo_matrix(
+        (np.concatenate(valores), (np.concatenate(filas), np.concatenate(columnas))),
+        shape=(sum(len(x) for x in lb), n_vars),
+    ).tocsr()
+
+    # Cotas: no se compra lo que ya no alcanza a aclimatarse en el horizonte,
+    # no se entrega antes de que haya algo aclimatado ni más que la capacidad
+    cota_sup = np.full(n_vars, np.inf)
+    cota_sup[z0:z0 + dias][d + acl >= dias] = 0
+    cota_sup[w0:w0 + dias] = np.where(d < acl, 0, capacidad_diaria)
+    cota_sup[y0:y0 + dias] = 1
+    cota_sup[v0:] = max_oferta[ofertas_p, ofertas_s]
+
+    restricciones = LinearConstraint(matriz, np.concatenate(lb), np.concatenate(ub))
+    cotas = Bounds(np.zeros(n_vars), cota_sup)
+
+    # 1) Lo máximo que se puede entregar (lineal: sin costos, los días de
+    # pedido no restringen nada)
+    objetivo = np.zeros(n_vars)
+    objetivo[w0:w0 + dias] = -1
+    res = milp(objetivo, constraints=restricciones, bounds=cotas)
+    if res.x is None:
+        raise ValueError(f"No se pudo optimizar el plan de compras: {res.message}")
+    entregable = np.floor(res.x[w0:w0 + dias].sum() + 1e-6)
+
+    # 2) El plan más barato que entrega eso: con cada pedido de a lo sumo
+    # `tope_pedido` unidades hacen falta al menos ceil(entregable / tope)
+    # días de pedido (esa cota entera acota mucho mejor la relajación)
+    fila_w = np.zeros(n_vars)
+    fila_w[w0:w0 + dias] = 1
+    fila_y = np.zeros(n_vars)
+    fila_y[y0:y0 + dias] = 1
+    minimo_pedidos = np.ceil(entregable / tope_pedido - 1e-9) if tope_pedido > 0 else 0
+    objetivo = np.zeros(n_vars)
+    objetivo[w0:w0 + dias] = COSTO_ATRASO * d / max(dias * entregable, 1)
+    objetivo[y0:y0 + dias] = config.costo_transporte
+    objetivo[v0:] = costo[ofertas_p, ofertas_s]
+
+    integralidad = np.zeros(n_vars)
+    integralidad[y0:y0 + dias] = 1
+
+    res = milp(
+        objetivo,
+        constraints=[
+            restricciones,
+            LinearConstraint(fila_w[None], entregable, np.inf),
+            LinearConstraint(fila_y[None], minimo_pedidos, np.inf),
+        ],
+        bounds=cotas,
+        integrality=integralidad,
+        options={"time_limit": TIEMPO_LIMITE_S, "mip_rel_gap": BRECHA_RELATIVA},
+    )
+    if res.x is None:
+        raise ValueError(f"No se pudo optimizar el plan de compras: {res.message}")
+    if res.status != 0:
+        warnings.warn(
+            f"El plan de compras no se probó óptimo ({res.message}); se usa el mejor encontrado",
+            RuntimeWarning, stacklevel=2,
+        )
+
+    return np.round(res.x[z0:z0 + dias])
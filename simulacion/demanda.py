@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class DemandaPendiente:
+    """
+    Demanda restante especie × polígono (arreglo 2-D indexado como en el
+    motor), con la marca de los polígonos que aún tienen demanda abierta y
+    un índice espacial para elegir el siguiente destino sin recorrer toda la
+    tabla en cada parada.
+
+    Los empates de distancia se resuelven como en la lista de candidatos
+    original (especie por especie, en el orden de la tabla de demandas): un
+    polígono se ordena por su primera especie abierta y por su posición en
+    la demanda de esa especie (`posicion`).
+
+    Con `euclidiana=False` (distancias por red vial) el árbol no sirve para
+    acotar: los más cercanos se eligen directamente de la fila de la matriz.
+
+    Con `zonas` (zona de cada polígono, ver `simulacion.zonas`) los cercanos
+    se pueden pedir dentro de una zona (`cercanos_en_zona`): se ordenan solo
+    sus polígonos abiertos, sin consultar el árbol.
+
+    `con_stock` (especies con stock disponible) descarta los polígonos
+    cuya demanda abierta es solo de especies sin stock, que no recibirían
+    nada.
+    """
+
+    # Tamaño inicial de las consultas al árbol; se duplica si no alcanza
+    K_INICIAL = 8
+
+    def __init__(self, demanda, posicion, coords, dist_almacen, euclidiana=True, zonas=None):
+        self.restante = demanda.copy()
+        self.euclidiana = euclidiana
+        self.posicion = posicion
+        self.coords = coords
+
+        abiertas = self.restante > 0
+        self.abierto = abiertas.any(axis=0)
+        self.n_abiertos = int(self.abierto.sum())
+        # Primera especie con demanda abierta en cada polígono
+        self.primera_abierta = np.argmax(abiertas, axis=0)
+
+        # Polígonos con demanda ordenados por distancia al almacén, de mayor a
+        # menor, con el número de grupo de empate de cada uno
+        ids = np.flatnonzero(self.abierto)
+        self._lejanos = ids[np.argsort(-dist_almacen[ids], kind="stable")]
+        d = dist_almacen[self._lejanos]
+        self._grupo_lejanos = np.concatenate(([0], np.cumsum(d[1:] != d[:-1])))
+        # Sin empates de distancia el orden ya es el de `_lejanos`
+        self._empates_lejanos = bool((d[1:] == d[:-1]).any())
+
+        self._arbol = None
+        self._ids_arbol = None
+
+        # Polígonos abiertos de cada zona (se depuran al consultarlos)
+        self._en_zona = None
+        if zonas is not None:
+            orden = ids[np.argsort(zonas[ids], kind="stable")]
+            nombres, inicios = np.unique(zonas[orden], return_index=True)
+            self._en_zona = dict(zip(nombres.tolist(), np.split(orden, inicios[1:])))
+
+    def entregar(self, j, q):
+        """Descuenta la entrega `q` (por especie) del polígono `j`."""
+        self.restante[:, j] -= q
+        s = self.primera_abierta[j]
+        siguientes = np.flatnonzero(self.restante[s:, j] > 0)
+        if len(siguientes):
+            self.primera_abierta[j] = s + siguientes[0]
+        elif self.abierto[j]:
+            self.abierto[j] = False
+            self.n_abiertos -= 1
+
+    def _ordenar(self, ids, *claves):
+        """`ids` ordenados por `claves` y luego por la clave de desempate."""
+        s = self.primera_abierta[ids]
+        return ids[np.lexsort((self.posicion[s, ids], s) + claves[::-1])]
+
+    def _con_stock(self, ids, con_stock):
+        """Marca de los `ids` con demanda abierta de alguna especie con stock."""
+        if con_stock is None:
+            return np.ones(len(ids), dtype=bool)
+        especies = np.flatnonzero(con_stock)
+        return (self.restante[np.ix_(especies, ids)] > 0).any(axis=0)
+
+    def _filtrar_stock(self, ids, con_stock):
+        return ids if con_stock is None else ids[self._con_stock(ids, con_stock)]
+
+    def lejanos(self, con_stock=None):
+        """Arreglo de polígonos abiertos del más lejano al más cercano al almacén."""
+        utiles = self.abierto[self._lejanos]
+        utiles[utiles] = self._con_stock(self._lejanos[utiles], con_stock)
+        ids = self._lejanos[utiles]
+        if self._empates_lejanos:
+            ids = self._ordenar(ids, self._grupo_lejanos[utiles])
+        return ids
+
+    def cercanos_en_zona(self, zona, distancias, con_stock=None):
+        """
+        Arreglo de polígonos abiertos de `zona` en orden de distancia
+        creciente según `distancias` (la fila de la matriz del motor).
+        """
+        ids = self._en_zona[zona]
+        ids = self._en_zona[zona] = ids[self.abierto[ids]]
+        ids = self._filtrar_stock(ids, con_stock)
+        return self._ordenar(ids, distancias[ids])
+
+    def cercanos(self, origen, distancias, con_stock=None):
+        """
+        Polígonos abiertos en orden de distancia creciente desde el polígono
+        `origen`. `distancias` es la fila de la matriz del motor para
+        `origen`; el árbol solo acota qué polígonos hay que mirar.
+        """
+        self._actualizar_arbol()
+        n = len(self._ids_arbol)
+        if n == 0:
+            return
+        k = min(self.K_INICIAL, n)
+        hechos = 0
+        while True:
+            dist_kd, pos = self._consultar(origen, distancias, k)
+            completo = k >= n
+            # Solo se emiten los grupos de empate que quedaron completos
+            limite = math.inf if completo else dist_kd[-1] * (1 - 1e-9) - 1e-12
+            ids = self._ids_arbol[pos]
+            ids = self._filtrar_stock(ids[self.abierto[ids] & (distancias[ids] < limite)], con_stock)
+            listos = self._ordenar(ids, distancias[ids])
+            yield from listos[hechos:]
+            hechos = max(hechos, len(listos))
+            if completo:
+                return
+            k = min(2 * k, n)
+
+    def _consultar(self, origen, distancias, k):
+        """Distancias y posiciones (en `_ids_arbol`) de los `k` más cercanos."""
+        if self.euclidiana:
+            dist_kd, pos = self._arbol.query(self.coords[origen], k=k)
+            return np.atleast_1d(dist_kd), np.atleast_1d(pos)
+        d = distancias[self._ids_arbol]
+        pos = np.argpartition(d, k - 1)[:k] if k < len(d) else np.arange(len(d))
+        pos = pos[np.argsort(d[pos], kind="stable")]
+        return d[pos], pos
+
+    def _actualizar_arbol(self):
+        # Se reconstruye solo con los abiertos cuando la mitad ya se cerró
+        if self._ids_arbol is None or self.n_abiertos * 2 < len(self._ids_arbol):
+            self._ids_arbol = np.flatnonzero(self.abierto)
+            if len(self._ids_arbol) and self.euclidiana:
+                self._arbol = cKDTree(self.coords[self._ids_arbol])
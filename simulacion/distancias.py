@@ -0,0 +1,48 @@
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+from .red import matrices_desde_archivo
+
+
+def construir_matrices(coords, velocidad, red_vial="", cache=None):
+    """
+    Matrices densas de distancia y de tiempo de viaje (minutos) entre todos
+    los polígonos, en el orden de `coords`: en línea recta o, con un archivo
+    `red_vial`, por la red (ver `simulacion.red`). Se reutilizan mientras no
+    cambie la tabla de polígonos, la velocidad ni la red.
+
+    Las matrices por red se guardan además en `cache` (p. ej. un
+    `CacheDisco`) con el hash del contenido; las de línea recta se
+    recalculan, porque `cdist` es más rápido que leerlas de disco.
+    """
+    if not red_vial:
+        return _matrices(tuple(coords.items()), float(velocidad))
+    if cache is None:
+        return matrices_desde_archivo(red_vial, coords, velocidad)
+
+    h = hashlib.sha256(json.dumps([list(coords.items()), float(velocidad)], default=str).encode())
+    h.update(Path(red_vial).read_bytes())
+    clave = "matrices:" + h.hexdigest()
+    matrices = cache.get(clave)
+    if matrices is None:
+        matrices = matrices_desde_archivo(red_vial, coords, velocidad)
+        cache.put(clave, matrices)
+    for m in matrices:
+        m.setflags(write=False)
+    return matrices
+
+
+@lru_cache(maxsize=16)
+def _matrices(items, velocidad):
+    puntos = np.array([xy for _, xy in items], dtype=float).reshape(-1, 2)
+    distancias = cdist(puntos, puntos)
+    tiempos = (distancias / velocidad) * 60
+    # Compartidas entre ejecuciones: solo lectura
+    distancias.setflags(write=False)
+    tiempos.setflags(write=False)
+    return distancias, tiempos
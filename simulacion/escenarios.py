@@ -0,0 +1,357 @@
+import json
+from dataclasses import fields
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .motor import ALMACEN, ConfigSimulacion
+
+# ------------------------------------------------------------
+# ESCENARIO "EJEMPLO COMPLETO"
+# ------------------------------------------------------------
+
+def crear_poligonos_completo():
+    # IDs dados: 1, 3, 4, 5, 20, 23, 24, 18, 17, 16, 19, 25, 26
+    # Coordenadas arbitrarias para cada polígono (puedes ajustar si tienes datos reales)
+    coords = {
+        1:  ( 0,  0),
+        3:  (10,  0),
+        4:  (20,  0),
+        5:  (30,  0),
+        20: ( 0, 10),
+        23: (10, 10),
+        24: (20, 10),
+        19: (40, 10),
+        25: (50, 10),
+        26: (60, 10),
+        18: (20, 20),
+        17: (30, 20),
+        16: (40, 20),
+
+    }
+    df = pd.DataFrame([
+        {"Polígono": pid, "X": x, "Y": y}
+        for pid, (x, y) in coords.items()
+    ])
+    return df
+
+def crear_demandas_completo():
+    # Hectáreas por polígono
+    hectareas = {
+        1:  5.40,
+        3:  8.00,
+        4:  8.00,
+        5:  7.56,
+        20: 1.38,
+        23: 5.53,
+        24: 5.64,
+        18: 7.11,
+        17: 6.11,
+        16: 5.64,
+        19: 4.92,
+        25: 5.05,
+        26: 4.75,
+    }
+    # Densidad por hectárea (unidades/ha) de cada especie
+    densidad = {
+        "Lechugilla":            33,
+        "Maguey Verde Salmiana": 157,
+        "Maguey azul":           33,
+        "Maguey Verde Striata":  33,
+        "Cuijo cantabriginesis":  39,
+        "Cuijo engelmani":       30,
+        "Tapón":                 58,
+        "Cardón":                51,
+        "Mezquite":              69,
+        "palma china":           21
+    }
+
+    filas = []
+    for pid, ha in hectareas.items():
+        for esp, d in densidad.items():
+            demanda_unidades = int(round(ha * d))
+            filas.append({
+                "Especie":   esp,
+                "Polígono":  pid,
+                "Demanda":   demanda_unidades
+            })
+    df = pd.DataFrame(filas)
+    return df
+
+def crear_proveedores_completo():
+    # Cada proveedor y las especies que ofrece con su costo; max_oferta = 10000 (genérico)
+    filas = []
+    # Vivero: Mezquite a 26.5, palma china a 26
+    filas.extend([
+        {"Proveedor": "Vivero", "Especie": "Mezquite",    "Costo": 26.5, "Max_oferta": 10000},
+        {"Proveedor": "Vivero", "Especie": "palma china", "Costo": 26.0, "Max_oferta": 10000},
+    ])
+    # Moctezuma: Maguey azul y Maguey Verde Striata a 26; Cuijo cantabriginesis y Tapón a 17
+    filas.extend([
+        {"Proveedor": "Moctezuma", "Especie": "Maguey azul",            "Costo": 26.0, "Max_oferta": 10000},
+        {"Proveedor": "Moctezuma", "Especie": "Maguey Verde Striata",   "Costo": 26.0, "Max_oferta": 10000},
+        {"Proveedor": "Moctezuma", "Especie": "Cuijo cantabriginesis",  "Costo": 17.0, "Max_oferta": 10000},
+        {"Proveedor": "Moctezuma", "Especie": "Tapón",                  "Costo": 17.0, "Max_oferta": 10000},
+    ])
+    # Venado: Maguey Verde Striata a 25; Cuijo cantabriginesis, Cuijo engelmani, Tapón, Cardón a 18
+    filas.extend([
+        {"Proveedor": "Venado", "Especie": "Maguey Verde Striata",      "Costo": 25.0, "Max_oferta": 10000},
+        {"Proveedor": "Venado", "Especie": "Cuijo cantabriginesis",      "Costo": 18.0, "Max_oferta": 10000},
+        {"Proveedor": "Venado", "Especie": "Cuijo engelmani",           "Costo": 18.0, "Max_oferta": 10000},
+        {"Proveedor": "Venado", "Especie": "Tapón",                     "Costo": 18.0, "Max_oferta": 10000},
+        {"Proveedor": "Venado", "Especie": "Cardón",                    "Costo": 18.0, "Max_oferta": 10000},
+    ])
+    # Laguna seca: Lechugilla, Maguey Verde Salmiana, Maguey azul a 26; Cuijo engelmani a 21; Tapón a 18
+    filas.extend([
+        {"Proveedor": "Laguna seca", "Especie": "Lechugilla",           "Costo": 26.0, "Max_oferta": 10000},
+        {"Proveedor": "Laguna seca", "Especie": "Maguey Verde Salmiana","Costo": 26.0, "Max_oferta": 10000},
+        {"Proveedor": "Laguna seca", "Especie": "Maguey azul",          "Costo": 26.0, "Max_oferta": 10000},
+        {"Proveedor": "Laguna seca", "Especie": "Cuijo engelmani",      "Costo": 21.0, "Max_oferta": 10000},
+        {"Proveedor": "Laguna seca", "Especie": "Tapón",                "Costo": 18.0, "Max_oferta": 10000},
+    ])
+
+    df = pd.DataFrame(filas)
+    return df
+
+
+# ------------------------------------------------------------
+# ESCENARIOS SINTÉTICOS
+# ------------------------------------------------------------
+
+def generar_tablas(n_poligonos, n_especies, n_proveedores, semilla=0, lado=60.0, cobertura=0.8):
+    """
+    Tablas de un escenario aleatorio reproducible (misma `semilla`, mismas
+    tablas) con `n_poligonos` polígonos en un cuadrado de `lado` km (el
+    almacén incluido, en el centro), `n_especies` especies presentes en cada
+    polígono con probabilidad `cobertura`, y `n_proveedores` proveedores.
+    Hectáreas, densidades y costos siguen los rangos del ejemplo completo.
+    """
+    rng = np.random.default_rng(semilla)
+
+    # Polígonos: IDs 1..n, asegurando que exista el almacén
+    ids = np.arange(1, n_poligonos + 1)
+    if ALMACEN not in ids:
+        ids[-1] = ALMACEN
+    xy = rng.uniform(0, lado, size=(n_poligonos, 2)).round(2)
+    xy[ids == ALMACEN] = lado / 2
+    df_poligonos = pd.DataFrame({"Polígono": ids, "X": xy[:, 0], "Y": xy[:, 1]})
+
+    # Demandas: hectáreas por polígono × densidad por especie
+    especies = np.array([f"Especie {i + 1}" for i in range(n_especies)])
+    hectareas = rng.uniform(1.0, 8.0, size=n_poligonos)
+    densidad = rng.integers(20, 160, size=n_especies)
+    presente = rng.random((n_poligonos, n_especies)) < cobertura
+    pol_idx, esp_idx = np.nonzero(presente)
+    df_demandas = pd.DataFrame({
+        "Especie":  especies[esp_idx],
+        "Polígono": ids[pol_idx],
+        "Demanda":  np.rint(hectareas[pol_idx] * densidad[esp_idx]).astype(int),
+    })
+
+    # Proveedores: cada especie con al menos una oferta; oferta total de
+    # cada especie ≈ 1.5 veces su demanda, repartida entre sus proveedores
+    ofrece = rng.random((n_proveedores, n_especies)) < 0.5
+    ofrece[rng.integers(0, n_proveedores, size=n_especies), np.arange(n_especies)] = True
+    demanda_especie = np.bincount(esp_idx, weights=df_demandas["Demanda"], minlength=n_especies)
+    max_oferta = np.ceil(1.5 * demanda_especie / ofrece.sum(axis=0))
+    prov_idx, esp_of = np.nonzero(ofrece)
+    df_proveedores = pd.DataFrame({
+        "Proveedor":  [f"Proveedor {p + 1}" for p in prov_idx],
+        "Especie":    especies[esp_of],
+        "Costo":      rng.uniform(15.0, 30.0, size=len(prov_idx)).round(1),
+        "Max_oferta": max_oferta[esp_of],
+    })
+    return df_poligonos, df_demandas, df_proveedores
+
+
+def generar_escenario(n_poligonos, n_especies, n_proveedores, dias, semilla=0, **parametros):
+    """ConfigSimulacion sintética de `dias` días (ver `generar_tablas`)."""
+    tablas = generar_tablas(n_poligonos, n_especies, n_proveedores, semilla)
+    return config_desde_tablas(*tablas, dias_totales=dias, **parametros)
+
+
+# ------------------------------------------------------------
+# CONVERSIÓN DE TABLAS A DICCIONARIOS
+# ------------------------------------------------------------
+
+COLUMNAS_POLIGONOS = ["Polígono", "X", "Y"]
+COLUMNAS_DEMANDAS = ["Especie", "Polígono", "Demanda"]
+COLUMNAS_PROVEEDORES = ["Proveedor", "Especie", "Costo", "Max_oferta"]
+
+# Tipo de cada columna de las tablas de entrada
+TIPOS_COLUMNAS = {
+    "Polígono": int, "X": float, "Y": float,
+    "Especie": str, "Demanda": float,
+    "Proveedor": str, "Costo": float, "Max_oferta": float,
+}
+
+# Las conversiones son por columna (dropna + conversión), no fila por fila.
+# Las filas incompletas se ignoran; si un ID se repite, conserva la posición
+# de su primera aparición y el valor de la última. Un valor que no se puede
+# convertir (p. ej. "P1" como polígono) da un ValueError que lo indica.
+
+
+def convertir_columna(df, columna):
+    """
+    Columna `columna` de `df` (sin nulos) convertida a su tipo en
+    `TIPOS_COLUMNAS`; ValueError con el primer valor que no es un número.
+    """
+    tipo = TIPOS_COLUMNAS[columna]
+    if tipo is str:
+        return df[columna].astype(str)
+    valores = pd.to_numeric(df[columna], errors="coerce")
+    invalidos = valores.isna().to_numpy()
+    if invalidos.any():
+        valor = df[columna].iloc[int(invalidos.argmax())]
+        raise ValueError(f"Columna '{columna}': '{valor}' no es un número.")
+    return valores.astype(tipo)
+
+
+def leer_poligonos(df_poligonos):
+    """{polígono: (x, y)} con las filas completas de la tabla."""
+    df = df_poligonos.dropna(subset=COLUMNAS_POLIGONOS)
+    ids = convertir_columna(df, "Polígono").tolist()
+    xy = zip(convertir_columna(df, "X").tolist(), convertir_columna(df, "Y").tolist())
+    return dict(zip(ids, xy))
+
+
+def leer_demandas(df_demandas):
+    """{especie: {polígono: demanda}} con las filas completas de la tabla."""
+    df = df_demandas.dropna(subset=COLUMNAS_DEMANDAS)
+    df = pd.DataFrame({col: convertir_columna(df, col) for col in COLUMNAS_DEMANDAS})
+    return {
+        esp: dict(zip(grupo["Polígono"].tolist(), grupo["Demanda"].tolist()))
+        for esp, grupo in df.groupby("Especie", sort=False)
+    }
+
+
+def leer_proveedores(df_proveedores):
+    """{proveedor: {especie: {"costo": c, "max_oferta": m}}}."""
+    df = df_proveedores.dropna(subset=COLUMNAS_PROVEEDORES)
+    df = pd.DataFrame({col: convertir_columna(df, col) for col in COLUMNAS_PROVEEDORES})
+    return {
+        prov: {
+            esp: {"costo": costo, "max_oferta": max_oferta}
+            for esp, costo, max_oferta in zip(
+                grupo["Especie"].tolist(),
+                grupo["Costo"].tolist(),
+                grupo["Max_oferta"].tolist(),
+            )
+        }
+        for prov, grupo in df.groupby("Proveedor", sort=False)
+    }
+
+
+def config_desde_tablas(df_poligonos, df_demandas, df_proveedores, **parametros):
+    """Construye la configuración a partir de las tres tablas y los parámetros."""
+    return ConfigSimulacion(
+        poligonos_coords=leer_poligonos(df_poligonos),
+        demanda_poligonos=leer_demandas(df_demandas),
+        demandas_oferta=leer_proveedores(df_proveedores),
+        **parametros,
+    )
+
+
+# ------------------------------------------------------------
+# IMPORTACIÓN DE TABLAS (CSV / PARQUET)
+# ------------------------------------------------------------
+
+def cargar_tabla(origen, columnas):
+    """
+    Lee una tabla completa desde un archivo .csv o .parquet (ruta o archivo
+    abierto con atributo `name`, como los de st.file_uploader) y verifica
+    que tenga las `columnas` requeridas y que las numéricas lo sean. Leer
+    Parquet requiere pyarrow.
+    """
+    nombre = str(getattr(origen, "name", origen))
+    if nombre.lower().endswith((".parquet", ".pq")):
+        df = pd.read_parquet(origen)
+    elif nombre.lower().endswith((".csv", ".txt")):
+        df = pd.read_csv(origen)
+    else:
+        raise ValueError(f"{nombre}: formato no soportado (usa .csv o .parquet)")
+
+    df.columns = [str(c).strip() for c in df.columns]
+    faltantes = [c for c in columnas if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"{nombre}: faltan columnas " + ", ".join(faltantes))
+    df = df[columnas]
+    for col in columnas:
+        try:
+            convertir_columna(df.dropna(subset=[col]), col)
+        except ValueError as e:
+            raise ValueError(f"{nombre}: {e}") from None
+    return df
+
+
+# ------------------------------------------------------------
+# ARCHIVOS DE ESCENARIO (JSON)
+# ------------------------------------------------------------
+# {
+#   "nombre": "...",
+#   "parametros": {"dias_totales": 30, "capacidad_camion": 535, ...},
+#   "poligonos":   [{"Polígono": 1, "X": 0, "Y": 0}, ...],
+#   "demandas":    [{"Especie": "...", "Polígono": 1, "Demanda": 178}, ...],
+#   "proveedores": [{"Proveedor": "...", "Especie": "...", "Costo": 26, "Max_oferta": 10000}, ...]
+# }
+#
+# En lugar de la lista de filas, cada tabla puede ser la ruta (relativa al
+# JSON) de un archivo .csv o .parquet, p. ej. "demandas": "demandas.parquet".
+# El parámetro "red_vial" también es una ruta relativa al JSON, y
+# "almacenes" usa el polígono como texto: {"18": 1000, "42": 800}.
+
+PARAMETROS = [
+    f.name for f in fields(ConfigSimulacion)
+    if f.name not in ("poligonos_coords", "demanda_poligonos", "demandas_oferta")
+]
+
+
+def cargar_escenario(ruta):
+    """Lee un archivo de escenario y devuelve (nombre, ConfigSimulacion)."""
+    ruta = Path(ruta)
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+
+    parametros = datos.get("parametros", {})
+    desconocidos = set(parametros) - set(PARAMETROS)
+    if desconocidos:
+        raise ValueError(
+            f"{ruta}: parámetros desconocidos: " + ", ".join(sorted(desconocidos))
+        )
+
+    if parametros.get("red_vial"):
+        parametros = {**parametros, "red_vial": str(ruta.parent / parametros["red_vial"])}
+    if parametros.get("almacenes"):
+        # Las claves de un objeto JSON son texto; los polígonos, enteros
+        parametros = {
+            **parametros,
+            "almacenes": {int(pid): e for pid, e in parametros["almacenes"].items()},
+        }
+
+    def tabla(clave, columnas):
+        valor = datos.get(clave, [])
+        if isinstance(valor, str):
+            return cargar_tabla(ruta.parent / valor, columnas)
+        return pd.DataFrame(valor, columns=columnas)
+
+    config = config_desde_tablas(
+        tabla("poligonos", COLUMNAS_POLIGONOS),
+        tabla("demandas", COLUMNAS_DEMANDAS),
+        tabla("proveedores", COLUMNAS_PROVEEDORES),
+        **parametros,
+    )
+    return datos.get("nombre", ruta.stem), config
+
+
+def guardar_escenario(ruta, nombre, df_poligonos, df_demandas, df_proveedores, **parametros):
+    """Escribe las tablas y parámetros en el formato de `cargar_escenario`."""
+    datos = {
+        "nombre": nombre,
+        "parametros": parametros,
+        "poligonos": json.loads(df_poligonos.to_json(orient="records", force_ascii=False)),
+        "demandas": json.loads(df_demandas.to_json(orient="records", force_ascii=False)),
+        "proveedores": json.loads(df_proveedores.to_json(orient="records", force_ascii=False)),
+    }
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
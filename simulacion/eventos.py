@@ -0,0 +1,74 @@
+"""
+Cola de eventos para el núcleo de simulación por eventos discretos
+(`MotorSimulacion.iterar_eventos`).
+
+Un evento ocurre en un día y, dentro del día, en una fase y un minuto
+desde el inicio de la jornada. Las fases fijan el orden en que el núcleo
+diario hacía sus pasos: primero llega lo comprado, luego se arma la
+jornada, los camiones salen, descargan y regresan, y al final se cierra el
+día (entregas al inventario y compras).
+"""
+import heapq
+import itertools
+from typing import NamedTuple
+
+# Tipos de evento
+LLEGADA = "llegada"          # lo comprado ayer entra al almacén
+ACLIMATADO = "aclimatado"    # lo que llegó hace `aclimatacion_min_dias` ya se puede entregar
+JORNADA = "jornada"          # se planifican las rutas del día
+SALIDA = "salida"            # un camión sale cargado del almacén
+DESCARGA = "descarga"        # un camión descarga en un polígono
+REGRESO = "regreso"          # un camión vuelve al almacén
+CIERRE = "cierre"            # entregas al inventario, compras y cierre del día
+
+FASES = {
+    LLEGADA: 0,
+    ACLIMATADO: 1,
+    JORNADA: 2,
+    SALIDA: 3,
+    DESCARGA: 3,
+    REGRESO: 3,
+    CIERRE: 4,
+}
+
+MINUTOS_DIA = 24 * 60
+
+
+class Evento(NamedTuple):
+    dia: int
+    fase: int
+    minuto: float
+    orden: int
+    tipo: str
+    datos: dict
+
+
+class ColaEventos:
+    """
+    Montículo de eventos ordenado por (día, fase, minuto) y, a igualdad,
+    por orden de programación. Los eventos de un mismo tipo y día que se
+    programan con `unico=True` se agregan una sola vez.
+    """
+
+    def __init__(self):
+        self._monticulo = []
+        self._contador = itertools.count()
+        self._unicos = set()
+        self.procesados = 0
+
+    def __len__(self):
+        return len(self._monticulo)
+
+    def programar(self, tipo, dia, minuto=0.0, unico=False, **datos):
+        if unico:
+            if (tipo, dia) in self._unicos:
+                return
+            self._unicos.add((tipo, dia))
+        heapq.heappush(
+            self._monticulo,
+            Evento(dia, FASES[tipo], float(minuto), next(self._contador), tipo, datos),
+        )
+
+    def siguiente(self):
+        self.procesados += 1
+        return heapq.heappop(self._monticulo)
@@ -0,0 +1,168 @@
+"""
+Exportación compacta de resultados a Arrow / Parquet.
+
+Las tablas de `simular` usan columnas de texto para especies y
+proveedores, flotantes para cantidades enteras y una columna `Detalle` de
+rutas con listas de tuplas y diccionarios. Para exportar se convierten a:
+
+- especies y proveedores como categorías (diccionarios en Arrow), con
+  todas las especies y proveedores del escenario aunque no aparezcan;
+- un tipo fijo por columna (`ESQUEMAS`), que no depende de los valores:
+  dos corridas del mismo escenario exportan el mismo esquema. Días y
+  camiones como enteros angostos, cantidades en float32 (exactas hasta
+  16 millones de unidades) y montos en float64;
+- `rutas` sin `Ruta` ni `Detalle`, con un `Ruta_id`, y una tabla
+  `paradas` normalizada con una fila por ruta × parada × especie.
+
+Los archivos `.arrow` (formato IPC) se leen de vuelta sin copiar, mapeando
+el archivo en memoria; los `.parquet` también se abren con `memory_map`.
+"""
+import io
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+FORMATOS = ("parquet", "arrow")
+
+COLUMNAS_PARADAS = ["Ruta_id", "Parada", "Polígono", "Especie", "Cantidad"]
+
+DIA = "int32"
+CANTIDAD = "float32"
+MONTO = "float64"
+
+# Tipo de cada columna por tabla; "category" usa las categorías del escenario
+ESQUEMAS = {
+    "compras": {
+        "Especie": "category", "Día pedido": DIA, "Proveedor": "category",
+        "Cantidad": CANTIDAD, "Costo compra": MONTO, "Costo transporte": MONTO,
+    },
+    "entregas": {
+        "Especie": "category", "Día entrega": DIA, "Cantidad": CANTIDAD, "Costo plantación": MONTO,
+    },
+    "rutas": {
+        "Ruta_id": "int32", "Día": DIA, "Camión": "int16", "Duración_min": "int32",
+        "Unidades": CANTIDAD, "Ahorro_min": CANTIDAD,
+    },
+    "paradas": {
+        "Ruta_id": "int32", "Parada": "int16", "Polígono": "int32", "Especie": "category",
+        "Cantidad": CANTIDAD,
+    },
+}
+
+
+def _esquema(config, nombre):
+    """
+    {columna: tipo} de la tabla `nombre`: el inventario tiene una columna
+    por especie y, con varios almacenes, compras, entregas y rutas empiezan
+    con `Almacén`.
+    """
+    if nombre == "inventario":
+        return {"Día": DIA, **dict.fromkeys(config.demanda_poligonos, CANTIDAD)}
+    if config.almacenes and nombre != "paradas":
+        return {"Almacén": "int32", **ESQUEMAS[nombre]}
+    return ESQUEMAS[nombre]
+
+
+def _tipar(df, esquema, categorias):
+    """`df` con las columnas de `esquema` en su tipo, aunque esté vacía."""
+    if df.empty:
+        df = df.reindex(columns=list(esquema))
+    return pd.DataFrame({
+        col: pd.Categorical(df[col], categories=categorias[col])
+        if tipo == "category" else df[col].astype(tipo)
+        for col, tipo in esquema.items()
+    })
+
+
+def tabla_paradas(df_rutas):
+    """Detalle de las rutas como tabla: una fila por ruta, parada y especie."""
+    filas = [
+        (r, parada, pid, esp, q)
+        for r, detalle in enumerate(df_rutas["Detalle"])
+        for parada, (pid, cantidades) in enumerate(detalle, start=1)
+        for esp, q in cantidades.items()
+    ]
+    return pd.DataFrame(filas, columns=COLUMNAS_PARADAS)
+
+
+def tablas_compactas(config, resultados):
+    """{nombre: DataFrame} listo para exportar (ver el docstring del módulo)."""
+    df_inventario, df_compras, df_entregas, df_rutas = resultados
+    categorias = {
+        "Especie": list(config.demanda_poligonos),
+        "Proveedor": list(config.demandas_oferta),
+    }
+
+    if df_rutas.empty:
+        rutas = df_rutas
+        paradas = pd.DataFrame(columns=COLUMNAS_PARADAS)
+    else:
+        paradas = tabla_paradas(df_rutas)
+        rutas = df_rutas.drop(columns=["Ruta", "Detalle"])
+        rutas.insert(0, "Ruta_id", np.arange(len(rutas)))
+
+    tablas = {
+        "inventario": df_inventario,
+        "compras": df_compras,
+        "entregas": df_entregas,
+        "rutas": rutas,
+        "paradas": paradas,
+    }
+    return {
+        nombre: _tipar(df, _esquema(config, nombre), categorias)
+        for nombre, df in tablas.items()
+    }
+
+
+def exportar(config, resultados, directorio, formato="parquet"):
+    """
+    Escribe las tablas compactas en `directorio` como `<tabla>.parquet` o
+    `<tabla>.arrow` y devuelve las rutas de los archivos.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido '{formato}': usa " + " o ".join(FORMATOS))
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    rutas = []
+    for nombre, df in tablas_compactas(config, resultados).items():
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        ruta = directorio / f"{nombre}.{formato}"
+        if formato == "parquet":
+            pq.write_table(tabla, ruta)
+        else:
+            with pa.OSFile(str(ruta), "wb") as archivo:
+                with pa.ipc.new_file(archivo, tabla.schema) as escritor:
+                    escritor.write_table(tabla)
+        rutas.append(ruta)
+    return rutas
+
+
+def exportar_zip(config, resultados, formato="parquet"):
+    """Bytes de un .zip con las tablas exportadas (para descargar)."""
+    buffer = io.BytesIO()
+    with tempfile.TemporaryDirectory() as directorio:
+        with zipfile.ZipFile(buffer, "w") as archivo_zip:
+            for ruta in exportar(config, resultados, directorio, formato):
+                archivo_zip.write(ruta, ruta.name)
+    return buffer.getvalue()
+
+
+def leer_exportado(directorio):
+    """
+    {tabla: pyarrow.Table} de lo exportado en `directorio`, leído con mapeo
+    en memoria (`.to_pandas()` convierte una tabla a DataFrame con sus
+    categorías).
+    """
+    tablas = {}
+    for ruta in sorted(Path(directorio).iterdir()):
+        if ruta.suffix == ".arrow":
+            tablas[ruta.stem] = pa.ipc.open_file(pa.memory_map(str(ruta))).read_all()
+        elif ruta.suffix == ".parquet":
+            tablas[ruta.stem] = pq.read_table(ruta, memory_map=True)
+    return tablas
@@ -0,0 +1,202 @@
+"""
+Simulación en flujo: los resultados de cada día se consumen a medida que
+el motor los produce (`MotorSimulacion.iterar`), para mostrar avance y
+KPIs parciales mientras corre y para no guardar filas sueltas de todo el
+horizonte.
+
+Cada tabla se acumula por columnas; con un `directorio`, cada
+`filas_por_bloque` filas se escriben a disco como un bloque y se liberan
+de memoria. Las tablas completas se arman solo al pedir `resultados()`;
+quien solo necesita KPIs (`kpis()`) o recorrer las tablas por bloques
+(`TablaEnBloques.partes()`) no las arma nunca. Los bloques se borran con
+`borrar()` o al salir del acumulador usado como contexto:
+
+    with tempfile.TemporaryDirectory() as directorio:
+        for _, acumulado in simular_en_flujo(config, directorio=directorio):
+            ...
+        kpis = acumulado.kpis()
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .motor import ResultadosSimulacion, SIN_PERFIL, crear_motor, kpis_de_totales
+
+# Filas por tabla que se juntan en memoria antes de escribirlas a disco
+FILAS_POR_BLOQUE = 50_000
+
+
+class TablaEnBloques:
+    """Filas de una tabla guardadas por columna, con volcado opcional a disco."""
+
+    def __init__(self, nombre, directorio=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        self.nombre = nombre
+        self.directorio = Path(directorio) if directorio is not None else None
+        self.filas_por_bloque = filas_por_bloque
+        self.columnas = {}
+        self.n_filas = 0
+        self.bloques = []
+
+    def __len__(self):
+        return self.n_filas + sum(n for _, n in self.bloques)
+
+    def agregar(self, filas):
+        """Agrega filas como diccionarios (todas con las mismas columnas)."""
+        if not filas:
+            return
+        for col in filas[0]:
+            self.columnas.setdefault(col, []).extend(f[col] for f in filas)
+        self._sumar(len(filas))
+
+    def agregar_columnas(self, columnas):
+        """Agrega un bloque dado como {columna: arreglo}."""
+        n = 0
+        for col, valores in columnas.items():
+            valores = valores.tolist() if isinstance(valores, np.ndarray) else list(valores)
+            self.columnas.setdefault(col, []).extend(valores)
+            n = len(valores)
+        self._sumar(n)
+
+    def _sumar(self, n):
+        self.n_filas += n
+        if self.directorio is not None and self.n_filas >= self.filas_por_bloque:
+            self.volcar()
+
+    def volcar(self):
+        """Escribe a disco las filas en memoria y las libera."""
+        if not self.n_filas:
+            return
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self.directorio / f"{self.nombre}_{len(self.bloques):05d}.pkl"
+        pd.DataFrame(self.columnas).to_pickle(ruta)
+        self.bloques.append((ruta, self.n_filas))
+        self.columnas = {}
+        self.n_filas = 0
+
+    def partes(self):
+        """La tabla bloque a bloque: los volcados a disco y lo que queda en memoria."""
+        for ruta, _ in self.bloques:
+            yield pd.read_pickle(ruta)
+        if self.n_filas or not self.bloques:
+            yield pd.DataFrame(self.columnas)
+
+    def a_dataframe(self):
+        partes = list(self.partes())
+        if len(partes) == 1:
+            return partes[0]
+        return pd.concat(partes, ignore_index=True)
+
+    def borrar(self):
+        """Borra los bloques volcados a disco (la tabla queda vacía)."""
+        for ruta, _ in self.bloques:
+            ruta.unlink(missing_ok=True)
+        self.bloques = []
+        self.columnas = {}
+        self.n_filas = 0
+
+
+class AcumuladorResultados:
+    """
+    Junta los `DiaSimulado` de una corrida en las cuatro tablas de
+    resultados y lleva los totales con los que se muestran KPIs parciales.
+    """
+
+    def __init__(self, config, directorio=None, filas_por_bloque=FILAS_POR_BLOQUE):
+        self.config = config
+        self.especies = list(config.demanda_poligonos)
+        self.tablas = {
+            nombre: TablaEnBloques(nombre, directorio, filas_por_bloque)
+            for nombre in ResultadosSimulacion._fields
+        }
+        self.dia = -1
+        self.viajes = 0
+        self.unidades_entregadas = 0.0
+        self.costo_compra = 0.0
+        self.costo_transporte = 0.0
+        self.costo_plantacion = 0.0
+        self.dia_ultima_ruta = 0
+        self.duracion_ultima = 0
+        self.unidades_en_rutas = 0.0
+        self.minutos_ahorrados = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.borrar()
+
+    @property
+    def costo_total(self):
+        return self.costo_compra + self.costo_transporte + self.costo_plantacion
+
+    def agregar(self, dia_simulado):
+        filas = dia_simulado.inventario
+        inicio = len(self.tablas["inventario"])
+        self.tablas["inventario"].agregar_columnas({
+            "Día": np.arange(inicio, inicio + len(filas)),
+            **{esp: filas[:, s] for s, esp in enumerate(self.especies)},
+        })
+        self.tablas["compras"].agregar(dia_simulado.compras)
+        self.tablas["entregas"].agregar(dia_simulado.entregas)
+        self.tablas["rutas"].agregar(dia_simulado.rutas)
+
+        self.dia = dia_simulado.dia
+        self.viajes += len(dia_simulado.rutas)
+        for fila in dia_simulado.entregas:
+            self.unidades_entregadas += fila["Cantidad"]
+            self.costo_plantacion += fila["Costo plantación"]
+        for fila in dia_simulado.compras:
+            self.costo_compra += fila["Costo compra"]
+            self.costo_transporte += fila["Costo transporte"]
+        for fila in dia_simulado.rutas:
+            self.dia_ultima_ruta = max(self.dia_ultima_ruta, int(fila["Día"]))
+            self.unidades_en_rutas += fila["Unidades"]
+            self.minutos_ahorrados += fila.get("Ahorro_min", 0)
+        if dia_simulado.rutas:
+            self.duracion_ultima = int(dia_simulado.rutas[-1]["Duración_min"])
+
+    def volcar(self):
+        for tabla in self.tablas.values():
+            if tabla.directorio is not None:
+                tabla.volcar()
+
+    def borrar(self):
+        """Borra de disco los bloques volcados de todas las tablas."""
+        for tabla in self.tablas.values():
+            tabla.borrar()
+
+    def resultados(self):
+        return ResultadosSimulacion(
+            **{nombre: tabla.a_dataframe() for nombre, tabla in self.tablas.items()}
+        )
+
+    def kpis(self):
+        """Los KPIs de `calcular_kpis` sin armar las tablas."""
+        return kpis_de_totales(self.config, {
+            "viajes": self.viajes,
+            "dias_total": self.dia_ultima_ruta,
+            "duracion_ultima": self.duracion_ultima,
+            "costo_compra": self.costo_compra,
+            "costo_transporte": self.costo_transporte,
+            "costo_plantacion": self.costo_plantacion,
+            "unidades_entregadas": self.unidades_entregadas,
+            "unidades_en_rutas": self.unidades_en_rutas,
+            "minutos_ahorrados": self.minutos_ahorrados,
+        })
+
+
+def simular_en_flujo(config, perfil=None, directorio=None, filas_por_bloque=FILAS_POR_BLOQUE,
+                     cache_matrices=None):
+    """
+    Generador de `(dia_simulado, acumulado)`: el resultado de cada día y el
+    `AcumuladorResultados` con todo lo producido hasta él. Al terminar,
+    `acumulado.resultados()` devuelve las mismas tablas que `simular`.
+    """
+    perfil = perfil or SIN_PERFIL
+    with perfil.etapa("construccion"):
+        motor = crear_motor(config, perfil, cache_matrices)
+    acumulado = AcumuladorResultados(config, directorio, filas_por_bloque)
+    for dia_simulado in motor.iterar():
+        acumulado.agregar(dia_simulado)
+        yield dia_simulado, acumulado
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# plotly se importa dentro de cada generar_*: la app lo carga solo cuando
+# dibuja un diagrama
+# Hora de inicio de la jornada del día 0
+INICIO_JORNADA = datetime(2025, 1, 1, 9, 0, 0)
+
+# Por encima de esta cantidad de rutas el Gantt detallado (una barra SVG por
+# ruta) se vuelve inmanejable en el navegador
+UMBRAL_DETALLE = 200
+
+ALTO_MAXIMO = 2400
+
+
+def horarios_rutas(df_rutas, base=INICIO_JORNADA):
+    """
+    Agrega Start/Finish a cada ruta: las rutas de un mismo camión en un día
+    salen una tras otra desde el inicio de la jornada (suma acumulada por
+    día, camión y, con varios almacenes, almacén).
+    """
+    df = df_rutas.reset_index(drop=True)
+    duracion = df["Duración_min"].astype(float)
+    grupos = [df[c] for c in ("Día", "Almacén", "Camión") if c in df]
+    fin_min = duracion.groupby(grupos).cumsum()
+    inicio = base + pd.to_timedelta(df["Día"].astype(int), unit="D")
+    df = df.assign(
+        Start=inicio + pd.to_timedelta(fin_min - duracion, unit="m"),
+        Finish=inicio + pd.to_timedelta(fin_min, unit="m"),
+    )
+    df["Task"] = "Día " + df["Día"].astype(str) + " – ruta " + df.index.astype(str)
+    return df
+
+
+def generar_gantt_rutas(df_rutas):
+    """Gantt detallado: una barra por ruta."""
+    import plotly.express as px
+
+    df = horarios_rutas(df_rutas)
+
+    fig = px.timeline(
+        df,
+        x_start="Start",
+        x_end="Finish",
+        y="Task",
+        color="Día",
+        title="Diagrama de Gantt de Rutas",
+        labels={"Día": "Día", "Task": "Ruta"}
+    )
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(
+        xaxis_title="Fecha y hora",
+        margin=dict(l=200, r=40, t=80, b=40),
+        height=min(150 + 30 * len(df), ALTO_MAXIMO)
+    )
+    return fig
+
+
+def generar_gantt_webgl(df_rutas, colores=10):
+    """
+    Gantt de todas las rutas dibujado con WebGL: cada ruta es un segmento
+    horizontal de una traza Scattergl (una traza por color, ciclando por
+    día), así que miles de rutas se dibujan sin crear miles de barras.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    df = horarios_rutas(df_rutas)
+    paleta = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for c, grupo in df.groupby(df["Día"] % colores):
+        # Segmentos (inicio, fin, hueco) intercalados en una sola traza
+        n = len(grupo)
+        x = np.full(3 * n, np.datetime64("NaT"), dtype="datetime64[ns]")
+        y = np.full(3 * n, np.nan)
+        x[0::3] = grupo["Start"].to_numpy(dtype="datetime64[ns]")
+        x[1::3] = grupo["Finish"].to_numpy(dtype="datetime64[ns]")
+        y[0::3] = y[1::3] = grupo.index.to_numpy()
+        fig.add_trace(go.Scattergl(
+            x=x, y=y,
+            mode="lines",
+            line=dict(width=4, color=paleta[int(c) % len(paleta)]),
+            hoverinfo="skip",
+        ))
+    fig.update_yaxes(autorange="reversed", title="Ruta")
+    fig.update_layout(
+        title="Diagrama de Gantt de Rutas (WebGL)",
+        xaxis_title="Fecha y hora",
+        showlegend=False,
+        height=600,
+    )
+    return fig
+
+
+def resumen_diario(df_rutas):
+    """Minutos de ruta, viajes y unidades por día."""
+    return (
+        df_rutas.groupby("Día", as_index=False)
+        .agg(Viajes=("Duración_min", "size"),
+             Minutos=("Duración_min", "sum"),
+             Unidades=("Unidades", "sum"))
+    )
+
+
+def generar_resumen_diario(df_rutas):
+    """Una barra por día con el total de minutos en ruta."""
+    import plotly.express as px
+
+    df = resumen_diario(df_rutas)
+    fig = px.bar(
+        df,
+        x="Día",
+        y="Minutos",
+        hover_data=["Viajes", "Unidades"],
+        title="Minutos en ruta por día",
+        labels={"Minutos": "Minutos en ruta"}
+    )
+    fig.update_layout(height=400, bargap=0.1)
+    return fig
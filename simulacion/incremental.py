@@ -0,0 +1,335 @@
+"""
+Puntos de control y re-simulación incremental, para análisis "qué pasa si".
+
+Una corrida con puntos de control (`simular_con_puntos`) guarda el estado
+del núcleo diario (ver `PuntoControl`) cada `cada` días. Al cambiar la
+configuración, `resimular` calcula el primer día cuyo resultado puede
+cambiar y sigue desde el último punto de control anterior a él: los días
+previos se copian de la corrida base y solo se simula el resto. El
+resultado es el mismo que el de una corrida completa con la nueva
+configuración.
+
+Con `resimular(corrida, config, desde=d)` el cambio es a partir del día `d`
+("qué pasa si desde el día 40 hay un camión más"): hasta `d` rige la
+configuración de la corrida y desde `d` la nueva, y solo se simula desde
+el último punto de control anterior a `d`. Las re-simulaciones siguientes
+sobre esa corrida conservan los días anteriores a `d`. Solo se puede
+cambiar a mitad de la corrida lo que no cambia la forma del estado
+guardado (ver `cambios_incompatibles`): con otras especies, polígonos,
+proveedores o días de aclimatación, varios almacenes o compras óptimas,
+`resimular` da ValueError. Con varios almacenes no hay puntos de
+control y se simula siempre todo.
+
+Primer día afectado según lo que cambió (con compras voraces y un solo
+almacén; si no, o si cambian polígonos, proveedores, aclimatación, espacio
+o modo de compras, se simula todo). El orden de las filas de las tablas
+desempata rutas y compras, así que reordenarlas también es un cambio:
+
+- `dias_totales`: las compras se cortan `aclimatacion_min_dias` antes del
+  fin, así que cambia desde el horizonte más corto menos la aclimatación;
+- costos de transporte o de plantación: desde la primera compra o entrega;
+- parámetros de rutas, flota, zonas y matrices de viaje: desde el primer
+  día con plantas aclimatadas (antes no se arma ninguna ruta);
+- demanda: desde el primer día con plantas aclimatadas o, si es antes, el
+  primer día en que lo comprado de una especie modificada alcanza la menor
+  de sus demandas total vieja y nueva (hasta entonces las compras de esa
+  especie no dependen de su total); si cambia el orden de los polígonos
+  de una especie, desde el día 0.
+"""
+from dataclasses import fields
+from typing import NamedTuple
+
+from .cache import clave_config, simular_con_cache
+from .flujo import AcumuladorResultados, simular_en_flujo
+from .motor import SIN_PERFIL, DiaSimulado, MotorSimulacion, ResultadosSimulacion
+
+# Días entre puntos de control
+CADA_DIAS = 10
+
+# Parámetros que solo usan el planificador de rutas y las matrices de viaje
+PARAMETROS_RUTEO = (
+    "capacidad_camion", "jornada_min", "tiempo_carga", "tiempo_descarga", "camiones",
+    "planificador", "presupuesto_mejora_ms", "velocidad", "red_vial", "ruido_tiempos",
+    "semilla", "almacen", "tamano_zona", "metodo_zonas",
+)
+
+# Parámetros que no cambian los resultados
+PARAMETROS_NEUTROS = ("nucleo", "procesos")
+
+
+def _ordenado(valor):
+    """
+    `valor` con los diccionarios (también anidados) como listas de pares:
+    el orden de las tablas desempata rutas y compras, así que al comparar
+    configuraciones cuenta como un cambio (igual que en `clave_config`).
+    """
+    if isinstance(valor, dict):
+        return [(k, _ordenado(v)) for k, v in valor.items()]
+    return valor
+
+
+class CorridaIncremental(NamedTuple):
+    config: object
+    resultados: ResultadosSimulacion
+    # Puntos de control en orden de día
+    puntos: list
+    # Primer día con plantas aclimatadas (dias_totales si no hubo)
+    primer_dia_con_stock: int
+    # Día desde el que se simuló (0: corrida completa)
+    desde: int = 0
+    # Día desde el que rige `config` (antes, el de corridas anteriores)
+    cambio: int = 0
+
+
+def _filas_antes(df, columna, dia):
+    if df.empty:
+        return []
+    return df[df[columna] < dia].to_dict("records")
+
+
+def _dias_previos(resultados, dia):
+    """Los resultados de los días anteriores a `dia` como un solo `DiaSimulado`."""
+    df_inventario, df_compras, df_entregas, df_rutas = resultados
+    return DiaSimulado(
+        dia - 1,
+        df_inventario.iloc[:dia, 1:].to_numpy(dtype=float),
+        _filas_antes(df_compras, "Día pedido", dia),
+        _filas_antes(df_entregas, "Día entrega", dia),
+        _filas_antes(df_rutas, "Día", dia),
+    )
+
+
+def _correr(config, perfil=None, al_avanzar=None, cada=CADA_DIAS, cache_matrices=None,
+            base=None, punto=None, cambio=0, directorio=None):
+    """
+    Corrida del núcleo diario con puntos de control, completa o desde
+    `punto` de `base`. Si `punto` es anterior a `cambio`, hasta ese día se
+    simula con la configuración de `base`. Con un `directorio`, las tablas
+    se vuelcan ahí por bloques (ver `simulacion.flujo`).
+
+    Con varios almacenes (que no tienen puntos de control) la corrida es
+    siempre completa y sin puntos.
+    """
+    if config.almacenes:
+        return _correr_completa(config, perfil, al_avanzar, cache_matrices, directorio)
+    acumulado = AcumuladorResultados(config, directorio)
+    puntos = []
+    primeros = []
+    desde = 0 if punto is None else punto.dia
+    if punto is not None:
+        puntos = [p for p in base.puntos if p.dia < punto.dia]
+        acumulado.agregar(_dias_previos(base.resultados, punto.dia))
+        if base.primer_dia_con_stock < punto.dia:
+            primeros.append(base.primer_dia_con_stock)
+
+    tramos = [(config, None)]
+    if punto is not None and punto.dia < cambio:
+        tramos.insert(0, (base.config, cambio))
+    perfil = perfil or SIN_PERFIL
+    for config_tramo, hasta in tramos:
+        with perfil.etapa("construccion"):
+            motor = MotorSimulacion(config_tramo, perfil, cache_matrices)
+        for dia_simulado in motor.iterar_dias(punto, cada, hasta):
+            acumulado.agregar(dia_simulado)
+            if al_avanzar is not None:
+                al_avanzar(dia_simulado, acumulado)
+        puntos += motor.puntos_control
+        if motor.primer_dia_con_stock is not None:
+            primeros.append(motor.primer_dia_con_stock)
+        if hasta is not None:
+            punto = motor.punto_final
+
+    with acumulado:
+        resultados = acumulado.resultados()
+    return CorridaIncremental(
+        config,
+        resultados,
+        puntos,
+        min(primeros, default=config.dias_totales),
+        desde,
+        cambio,
+    )
+
+
+def _correr_completa(config, perfil=None, al_avanzar=None, cache_matrices=None, directorio=None):
+    flujo = simular_en_flujo(config, perfil, directorio, cache_matrices=cache_matrices)
+    for dia_simulado, acumulado in flujo:
+        if al_avanzar is not None:
+            al_avanzar(dia_simulado, acumulado)
+    with acumulado:
+        resultados = acumulado.resultados()
+    return CorridaIncremental(config, resultados, [], config.dias_totales)
+
+
+def simular_con_puntos(config, perfil=None, al_avanzar=None, cada=CADA_DIAS, cache_matrices=None,
+                       directorio=None):
+    """Corrida completa (núcleo diario) con un punto de control cada `cada` días."""
+    return _correr(config, perfil, al_avanzar, cada, cache_matrices, directorio=directorio)
+
+
+def _primer_dia_demanda(corrida, config):
+    base = corrida.config
+    dia = corrida.primer_dia_con_stock
+    compras = corrida.resultados.compras
+    for esp, vieja in base.demanda_poligonos.items():
+        nueva = config.demanda_poligonos[esp]
+        # Los polígonos que siguen en la tabla, en otro orden: cambian los
+        # desempates de las rutas desde el primer reparto
+        comunes = vieja.keys() & nueva.keys()
+        if [p for p in vieja if p in comunes] != [p for p in nueva if p in comunes]:
+            return 0
+        if vieja == nueva:
+            continue
+        tope = min(sum(vieja.values()), sum(nueva.values()))
+        if tope <= 0:
+            return 0
+        if compras.empty:
+            continue
+        de_especie = compras[compras["Especie"] == esp]
+        acumulado = de_especie.groupby("Día pedido")["Cantidad"].sum().cumsum()
+        alcanzado = acumulado.index[acumulado.to_numpy() >= tope]
+        if len(alcanzado):
+            dia = min(dia, int(alcanzado[0]))
+    return dia
+
+
+def cambios_incompatibles(base, config):
+    """
+    Diferencias entre `base` y `config` que impiden seguir con `config` a
+    partir del estado de una corrida de `base` (ver
+    `MotorSimulacion.restaurar`), descritas para mostrarlas. Con compras
+    óptimas el plan se calcula para todo el horizonte, así que tampoco se
+    puede cambiar de configuración a mitad de la corrida.
+    """
+    incompatibles = []
+    if base.almacenes or config.almacenes:
+        incompatibles.append("hay varios almacenes")
+    if "optimo" in (base.modo_compras, config.modo_compras):
+        incompatibles.append("las compras óptimas se planean para todo el horizonte")
+    if list(base.demanda_poligonos) != list(config.demanda_poligonos):
+        incompatibles.append("cambian las especies")
+    if list(base.poligonos_coords) != list(config.poligonos_coords):
+        incompatibles.append("cambian los polígonos")
+    if _ordenado(base.demandas_oferta) != _ordenado(config.demandas_oferta):
+        incompatibles.append("cambian los proveedores")
+    if base.aclimatacion_min_dias != config.aclimatacion_min_dias:
+        incompatibles.append("cambian los días de aclimatación")
+    return incompatibles
+
+
+def primer_dia_afectado(corrida, config):
+    """
+    Primer día en que los resultados de `config` pueden diferir de los de
+    `corrida` (ver el docstring del módulo); `dias_totales` de la corrida si
+    no cambia nada. Nunca es anterior al día desde el que rige la
+    configuración de la corrida.
+    """
+    dia = _primer_dia_afectado(corrida, config)
+    return dia if dia >= corrida.config.dias_totales else max(dia, corrida.cambio)
+
+
+def _primer_dia_afectado(corrida, config):
+    base = corrida.config
+    cambios = {
+        f.name for f in fields(base)
+        if _ordenado(getattr(base, f.name)) != _ordenado(getattr(config, f.name))
+    } - set(PARAMETROS_NEUTROS)
+    if (
+        base.almacenes or config.almacenes
+        or "optimo" in (base.modo_compras, config.modo_compras)
+        or list(base.demanda_poligonos) != list(config.demanda_poligonos)
+    ):
+        return 0 if cambios else base.dias_totales
+
+    dia = base.dias_totales
+    for campo in cambios:
+        if campo == "dias_totales":
+            dia = min(dia, min(base.dias_totales, config.dias_totales) - base.aclimatacion_min_dias)
+        elif campo in PARAMETROS_RUTEO:
+            dia = min(dia, corrida.primer_dia_con_stock)
+        elif campo == "costo_transporte":
+            compras = corrida.resultados.compras
+            dia = min(dia, int(compras["Día pedido"].min()) if not compras.empty else dia)
+        elif campo == "costo_plantacion":
+            entregas = corrida.resultados.entregas
+            dia = min(dia, int(entregas["Día entrega"].min()) if not entregas.empty else dia)
+        elif campo == "demanda_poligonos":
+            dia = min(dia, _primer_dia_demanda(corrida, config))
+        else:
+            return 0
+    return max(dia, 0)
+
+
+def resimular(corrida, config, perfil=None, al_avanzar=None, cada=CADA_DIAS, cache_matrices=None,
+              desde=None, directorio=None):
+    """
+    Resultados de `config` reutilizando `corrida`: sigue desde el último
+    punto de control anterior al primer día afectado (o simula todo si no
+    hay ninguno). Con `desde`, `config` rige solo a partir de ese día.
+    Devuelve la nueva `CorridaIncremental`.
+
+    Si la corrida tiene un cambio a partir de un día (o se pide uno con
+    `desde`), `config` tiene que poder seguir desde su estado (ver
+    `cambios_incompatibles`); si no, ValueError.
+    """
+    # Lo que no se puede cambiar a mitad de una corrida obliga a simular
+    # todo, salvo que la nueva configuración deba regir desde un día
+    incompatibles = cambios_incompatibles(corrida.config, config)
+    if incompatibles and (desde is not None or corrida.cambio > 0):
+        raise ValueError(
+            "No se puede cambiar a mitad de la corrida: " + "; ".join(incompatibles)
+            + ". Simula la corrida completa con la nueva configuración."
+        )
+    cambio = corrida.cambio
+    if desde is None:
+        dia = primer_dia_afectado(corrida, config)
+    else:
+        if desde < corrida.cambio:
+            raise ValueError(
+                f"La corrida ya cambia de configuración el día {corrida.cambio}; "
+                "indica un día igual o posterior."
+            )
+        if desde > min(corrida.config.dias_totales, config.dias_totales):
+            raise ValueError("El día del cambio debe estar dentro del horizonte.")
+        dia = cambio = desde
+    previos = [p for p in corrida.puntos if p.dia <= dia]
+    if not previos or (previos[-1].dia == 0 and cambio == 0):
+        return _correr(config, perfil, al_avanzar, cada, cache_matrices, directorio=directorio)
+    return _correr(config, perfil, al_avanzar, cada, cache_matrices, corrida, previos[-1], cambio,
+                   directorio)
+
+
+def simular_o_reanudar(config, cache, corrida=None, perfil=None, al_avanzar=None,
+                       cache_matrices=None, cada=CADA_DIAS, clave=None, directorio=None):
+    """
+    Como `simular_con_cache`, pero si hay que simular y se tiene la última
+    `corrida` con puntos de control, se re-simula solo desde el primer día
+    afectado. Devuelve `(resultados, corrida, desde)`: la corrida con puntos
+    de control más reciente (la misma si no se simuló con el núcleo
+    diario) y `desde`, None si los resultados vinieron de la caché o el día
+    desde el que se simuló. Con un `perfil` se simula todo, para medir.
+    `clave` es `clave_config(config)`, si ya se calculó. `directorio` es
+    donde volcar las tablas largas mientras se simula.
+
+    Varios almacenes y el núcleo por eventos se simulan completos, sin
+    puntos de control.
+    """
+    if config.almacenes or config.nucleo != "dias":
+        resultados, desde_cache = simular_con_cache(
+            config, cache, perfil, al_avanzar, cache_matrices, clave, directorio
+        )
+        return resultados, corrida, None if desde_cache else 0
+
+    if clave is None:
+        clave = clave_config(config)
+    if perfil is None:
+        resultados = cache.get(clave)
+        if resultados is not None:
+            return resultados, corrida, None
+    if corrida is None or perfil is not None:
+        corrida = simular_con_puntos(config, perfil, al_avanzar, cada, cache_matrices, directorio)
+    else:
+        corrida = resimular(corrida, config, perfil, al_avanzar, cada, cache_matrices,
+                            directorio=directorio)
+    cache.put(clave, corrida.resultados)
+    return corrida.resultados, corrida, corrida.desde
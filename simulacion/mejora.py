@@ -0,0 +1,84 @@
+"""
+Mejora local de rutas con movimientos 2-opt y Or-opt sobre la matriz de
+tiempos de viaje.
+
+Cada movimiento se evalúa en tiempo constante con la diferencia de los
+tramos que cambia (supone la matriz simétrica), se aplica el primero que
+acorta la ruta y se repite hasta que ninguno mejora o se acaba el
+presupuesto de CPU. Las cantidades entregadas en cada parada no cambian:
+solo el orden de visita.
+"""
+import time
+
+# Longitudes de los tramos que Or-opt intenta mover
+TRAMOS_OR_OPT = (1, 2, 3)
+
+_EPS = 1e-9
+
+
+def _dos_opt(orden, t):
+    """Aplica el primer 2-opt que mejora; devuelve lo que acorta (0 si ninguno)."""
+    n = len(orden)
+    for i in range(n - 3):
+        a, b = orden[i], orden[i + 1]
+        t_ab = t[a][b]
+        for j in range(i + 2, n - 1):
+            c, d = orden[j], orden[j + 1]
+            delta = t[a][c] + t[b][d] - t_ab - t[c][d]
+            if delta < -_EPS:
+                orden[i + 1:j + 1] = orden[i + 1:j + 1][::-1]
+                return -delta
+    return 0.0
+
+
+def _or_opt(orden, t):
+    """Aplica el primer Or-opt que mejora; devuelve lo que acorta (0 si ninguno)."""
+    n = len(orden)
+    for largo in TRAMOS_OR_OPT:
+        for s in range(1, n - largo):
+            e = s + largo - 1
+            p, u, v, q = orden[s - 1], orden[s], orden[e], orden[e + 1]
+            quitar = t[p][u] + t[v][q] - t[p][q]
+            for m in range(n - 1):
+                if s - 1 <= m <= e:
+                    continue
+                x, y = orden[m], orden[m + 1]
+                directo = t[x][u] + t[v][y] - t[x][y]
+                invertido = t[x][v] + t[u][y] - t[x][y]
+                insertar = min(directo, invertido)
+                if insertar - quitar < -_EPS:
+                    tramo = orden[s:e + 1]
+                    if invertido < directo:
+                        tramo.reverse()
+                    resto = orden[:s] + orden[e + 1:]
+                    pos = m + 1 if m < s else m + 1 - largo
+                    orden[:] = resto[:pos] + tramo + resto[pos:]
+                    return quitar - insertar
+    return 0.0
+
+
+def mejorar_ruta(paradas, almacen, tiempos, limite=None):
+    """
+    Reordena las `paradas` (índices del motor) de una ruta que sale y vuelve
+    a `almacen`. Devuelve `(orden, ahorro, movimientos)`: la permutación de
+    posiciones de `paradas`, los minutos de viaje ahorrados y los
+    movimientos aplicados. `limite` es el `time.process_time()` en el que
+    hay que detenerse.
+    """
+    k = len(paradas)
+    if k < 2:
+        return list(range(k)), 0.0, 0
+    # Submatriz local: 0 es el almacén y 1..k las paradas
+    nodos = [almacen, *paradas]
+    t = tiempos[nodos][:, nodos].tolist()
+    orden = [0, *range(1, k + 1), 0]
+
+    ahorro = 0.0
+    movimientos = 0
+    while limite is None or time.process_time() < limite:
+        delta = _dos_opt(orden, t) or _or_opt(orden, t)
+        if not delta:
+            break
+        ahorro += delta
+        movimientos += 1
+    return [i - 1 for i in orden[1:-1]], ahorro, movimientos
@@ -0,0 +1,140 @@
+"""
+Modo estocástico (Monte Carlo): R réplicas de un escenario con demanda,
+`Max_oferta` de proveedores y tiempos de viaje perturbados.
+
+    python -m simulacion.montecarlo escenarios/ejemplo_completo.json -r 200 \
+        --cv-demanda 0.1 --cv-oferta 0.2 --cv-tiempos 0.15 -o montecarlo.csv
+
+Cada cantidad se multiplica por un factor lognormal de media 1 con el
+coeficiente de variación indicado (y se redondea a unidades enteras); los
+tiempos de viaje reciben un factor por par de polígonos dentro del motor
+(`ruido_tiempos`). Los factores de todas las réplicas se sortean juntos,
+como matrices réplicas × valores, a partir de una sola `semilla`; las
+simulaciones, que son secuenciales por naturaleza, se reparten en un pool
+de procesos. El resumen da media e intervalo de confianza (t de Student)
+de cada KPI.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .escenarios import cargar_escenario
+from .motor import factores_lognormales
+from .paralelo import simular_variantes
+
+# KPIs que se resumen con intervalo de confianza
+KPIS_MONTECARLO = ("fill_rate", "costo_total", "unidades_entregadas", "viajes", "costo_unitario")
+
+
+def sortear_replicas(config, replicas, cv_demanda=0.0, cv_oferta=0.0, cv_tiempos=0.0, semilla=0):
+    """
+    Parámetros de cada réplica: lista de dicts con la demanda y la oferta
+    perturbadas (en el formato de `ConfigSimulacion`) y la semilla y
+    variación de los tiempos de viaje.
+    """
+    if replicas < 1:
+        raise ValueError("Indica al menos una réplica.")
+    if min(cv_demanda, cv_oferta, cv_tiempos) < 0:
+        raise ValueError("Los coeficientes de variación no pueden ser negativos.")
+    rng = np.random.default_rng(semilla)
+
+    # Demanda: un factor por réplica y par especie-polígono
+    pares = [(esp, pid) for esp, dem in config.demanda_poligonos.items() for pid in dem]
+    base = np.array([config.demanda_poligonos[e][p] for e, p in pares], dtype=float)
+    demandas = np.round(base * factores_lognormales(rng, cv_demanda, (replicas, len(pares))))
+
+    # Oferta: un factor por réplica y oferta proveedor-especie
+    ofertas = [
+        (prov, esp) for prov, datos in config.demandas_oferta.items()
+        for esp, info in datos.items() if info
+    ]
+    base = np.array([config.demandas_oferta[p][e]["max_oferta"] for p, e in ofertas], dtype=float)
+    max_ofertas = np.round(base * factores_lognormales(rng, cv_oferta, (replicas, len(ofertas))))
+
+    semillas = rng.integers(2**31, size=replicas)
+
+    parametros = []
+    for r in range(replicas):
+        demanda = {esp: {} for esp in config.demanda_poligonos}
+        for (esp, pid), d in zip(pares, demandas[r].tolist()):
+            demanda[esp][pid] = d
+        oferta = {
+            prov: {esp: dict(info) if info else info for esp, info in datos.items()}
+            for prov, datos in config.demandas_oferta.items()
+        }
+        for (prov, esp), m in zip(ofertas, max_ofertas[r].tolist()):
+            oferta[prov][esp]["max_oferta"] = m
+        parametros.append({
+            "demanda_poligonos": demanda,
+            "demandas_oferta": oferta,
+            "ruido_tiempos": cv_tiempos,
+            "semilla": int(semillas[r]),
+        })
+    return parametros
+
+
+def ejecutar_montecarlo(config_base, replicas, cv_demanda=0.0, cv_oferta=0.0, cv_tiempos=0.0,
+                        semilla=0, procesos=None):
+    """Tabla con los KPIs de cada réplica."""
+    tareas = [
+        ({"Réplica": r}, parametros) for r, parametros in enumerate(
+            sortear_replicas(config_base, replicas, cv_demanda, cv_oferta, cv_tiempos, semilla)
+        )
+    ]
+    filas = simular_variantes(config_base, tareas, procesos)
+    return pd.DataFrame(filas)
+
+
+def resumen_montecarlo(df, nivel=0.95):
+    """Media, desviación estándar e intervalo de confianza de cada KPI."""
+    n = len(df)
+    filas = []
+    for kpi in KPIS_MONTECARLO:
+        valores = df[kpi].to_numpy(dtype=float)
+        media = valores.mean()
+        desv = valores.std(ddof=1) if n > 1 else 0.0
+        margen = stats.t.ppf((1 + nivel) / 2, n - 1) * desv / np.sqrt(n) if n > 1 else 0.0
+        filas.append({
+            "KPI": kpi,
+            "Media": media,
+            "Desv. estándar": desv,
+            "IC inferior": media - margen,
+            "IC superior": media + margen,
+            "Mínimo": valores.min(),
+            "Máximo": valores.max(),
+        })
+    return pd.DataFrame(filas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m simulacion.montecarlo",
+        description="Réplicas Monte Carlo de un escenario con demanda, oferta y tiempos inciertos.",
+    )
+    parser.add_argument("escenario", help="archivo de escenario (.json)")
+    parser.add_argument("-r", "--replicas", type=int, default=100, help="número de réplicas")
+    parser.add_argument("--cv-demanda", type=float, default=0.1, help="variación de la demanda")
+    parser.add_argument("--cv-oferta", type=float, default=0.1, help="variación de Max_oferta")
+    parser.add_argument("--cv-tiempos", type=float, default=0.1, help="variación de los tiempos")
+    parser.add_argument("-s", "--semilla", type=int, default=0)
+    parser.add_argument("--nivel", type=float, default=0.95, help="nivel de confianza")
+    parser.add_argument("-o", "--salida", default="montecarlo.csv", help="CSV con cada réplica")
+    parser.add_argument("-j", "--procesos", type=int, default=None, help="procesos (por defecto, todos los núcleos)")
+    args = parser.parse_args(argv)
+
+    _, config = cargar_escenario(args.escenario)
+    df = ejecutar_montecarlo(
+        config, args.replicas, args.cv_demanda, args.cv_oferta, args.cv_tiempos,
+        args.semilla, args.procesos,
+    )
+    df.to_csv(args.salida, index=False)
+    print(resumen_montecarlo(df, args.nivel).to_string(index=False))
+    print(f"{len(df)} réplicas → {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1359 @@
+import time
+import warnings
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .ahorros import asignar_carga, construir_rutas
+from .almacenes import asignar_almacenes, configs_por_almacen
+from .compras import optimizar_compras
+from .demanda import DemandaPendiente
+from .distancias import construir_matrices
+from .eventos import (
+    ACLIMATADO, CIERRE, DESCARGA, JORNADA, LLEGADA, REGRESO, SALIDA, ColaEventos,
+)
+from .mejora import mejorar_ruta
+from .perfil import SIN_PERFIL
+from .zonas import METODOS_ZONA, zonificar
+
+# Polígono que funciona como almacén por defecto (origen y destino de todas
+# las rutas)
+ALMACEN = 18
+
+# Planificadores de rutas diarias: el voraz original (más lejano primero y
+# luego vecino más cercano) y el de ahorros de Clarke–Wright
+PLANIFICADORES = ("voraz", "ahorros")
+
+# Compras: voraces día a día o según un plan optimizado de todo el horizonte
+MODOS_COMPRA = ("voraz", "optimo")
+
+# Días de reparto simulados para medir la capacidad diaria de la flota que
+# usa el plan de compras
+DIAS_CALIBRACION = 5
+
+# Plan de compras aún no calculado (None es "comprar como en el modo voraz")
+_SIN_PLANIFICAR = object()
+
+# Núcleo de simulación: un paso por día o por eventos discretos (solo se
+# procesan los días en los que pasa algo)
+NUCLEOS = ("dias", "eventos")
+
+
+@dataclass
+class ConfigSimulacion:
+    """
+    Configuración completa de una corrida: las tres tablas del escenario
+    (ya convertidas a diccionarios) y los parámetros logísticos del sidebar.
+    """
+    # {polígono: (x, y)}
+    poligonos_coords: dict = field(default_factory=dict)
+    # {especie: {polígono: demanda}}
+    demanda_poligonos: dict = field(default_factory=dict)
+    # {proveedor: {especie: {"costo": c, "max_oferta": m}}}
+    demandas_oferta: dict = field(default_factory=dict)
+
+    dias_totales: int = 30
+    aclimatacion_min_dias: int = 3
+    capacidad_camion: int = 535
+    jornada_min: int = 360
+    espacio_max_almacen: int = 1000
+    costo_transporte: float = 4500
+    velocidad: float = 60.0
+    costo_plantacion: float = 20.0
+    tiempo_carga: int = 30      # minutos
+    tiempo_descarga: int = 30   # minutos
+    camiones: int = 1           # cada uno con su propia jornada
+    planificador: str = "voraz"
+    # CPU por día para acortar rutas con 2-opt / Or-opt (0: sin mejora)
+    presupuesto_mejora_ms: float = 0.0
+    modo_compras: str = "voraz"
+    nucleo: str = "dias"
+    # CSV de aristas de la red vial ("": distancias en línea recta)
+    red_vial: str = ""
+    # Variación aleatoria de los tiempos de viaje (coeficiente de variación
+    # de un factor lognormal por par de polígonos; 0: tiempos exactos)
+    ruido_tiempos: float = 0.0
+    semilla: int = 0
+    # Polígono almacén de la corrida (con un solo almacén)
+    almacen: int = ALMACEN
+    # Varios almacenes: {polígono: espacio_max_almacen}; cada polígono se
+    # atiende desde el más cercano (ver `simulacion.almacenes`). Vacío: un
+    # solo almacén, `almacen`, con `espacio_max_almacen`
+    almacenes: dict = field(default_factory=dict)
+    # Procesos para simular los almacenes en paralelo
+    procesos: int = 1
+    # Zonas de reparto de unos `tamano_zona` polígonos; cada ruta se arma
+    # dentro de una zona (ver `simulacion.zonas`; 0: sin zonas)
+    tamano_zona: int = 0
+    metodo_zonas: str = "kmeans"
+
+    def validar(self):
+        for pid in self.almacenes or [self.almacen]:
+            if pid not in self.poligonos_coords:
+                raise ValueError(
+                    f"Debes incluir el polígono {pid} (almacén) en la tabla de Polígonos."
+                )
+        if any(espacio < 0 for espacio in self.almacenes.values()):
+            raise ValueError("El espacio de un almacén no puede ser negativo.")
+        if self.procesos < 1:
+            raise ValueError("Indica al menos un proceso.")
+        if self.tamano_zona < 0:
+            raise ValueError("El tamaño de zona no puede ser negativo.")
+        if self.metodo_zonas not in METODOS_ZONA:
+            raise ValueError(
+                f"Método de zonas desconocido '{self.metodo_zonas}': usa "
+                + " o ".join(METODOS_ZONA)
+            )
+        if not self.demanda_poligonos:
+            raise ValueError("Debes definir al menos una demanda en la tabla de Demandas.")
+        faltantes = {
+            pid
+            for esp in self.demanda_poligonos
+            for pid in self.demanda_poligonos[esp]
+            if pid not in self.poligonos_coords
+        }
+        if faltantes:
+            raise ValueError(
+                "Polígonos con demanda sin coordenadas: "
+                + ", ".join(map(str, sorted(faltantes)))
+            )
+        if self.camiones < 1:
+            raise ValueError("La flota debe tener al menos un camión.")
+        if self.presupuesto_mejora_ms < 0:
+            raise ValueError("El presupuesto de mejora no puede ser negativo.")
+        if self.planificador not in PLANIFICADORES:
+            raise ValueError(
+                f"Planificador desconocido '{self.planificador}': usa "
+                + " o ".join(PLANIFICADORES)
+            )
+        if self.modo_compras not in MODOS_COMPRA:
+            raise ValueError(
+                f"Modo de compras desconocido '{self.modo_compras}': usa "
+                + " o ".join(MODOS_COMPRA)
+            )
+        if self.ruido_tiempos < 0:
+            raise ValueError("La variación de los tiempos de viaje no puede ser negativa.")
+        if self.red_vial and not Path(self.red_vial).is_file():
+            raise ValueError(f"No se encontró el archivo de red vial '{self.red_vial}'.")
+        if self.nucleo not in NUCLEOS:
+            raise ValueError(
+                f"Núcleo de simulación desconocido '{self.nucleo}': usa "
+                + " o ".join(NUCLEOS)
+            )
+
+
+def factores_lognormales(rng, cv, forma, simetrico=False):
+    """
+    Factores multiplicativos lognormales de media 1 y coeficiente de
+    variación `cv`. Con `simetrico` (matriz cuadrada) f[i, j] == f[j, i].
+    """
+    sigma2 = np.log1p(cv ** 2)
+    f = rng.lognormal(-sigma2 / 2, np.sqrt(sigma2), size=forma)
+    if simetrico:
+        f = np.triu(f, 1)
+        f = f + f.T
+    return f
+
+
+class ResultadosSimulacion(NamedTuple):
+    inventario: pd.DataFrame
+    compras: pd.DataFrame
+    entregas: pd.DataFrame
+    rutas: pd.DataFrame
+
+
+class DiaSimulado(NamedTuple):
+    """
+    Resultados de un día, tal como los produce `MotorSimulacion.iterar`:
+    las filas de inventario (una por día, en orden, hasta `dia` inclusive;
+    el núcleo por eventos incluye los días sin eventos anteriores) y las
+    compras, entregas y rutas del día como filas de sus tablas.
+    """
+    dia: int
+    inventario: np.ndarray
+    compras: list
+    entregas: list
+    rutas: list
+
+
+class PuntoControl(NamedTuple):
+    """
+    Estado de una corrida del núcleo diario al inicio del día `dia` (ver
+    `MotorSimulacion.capturar`): inventario, demanda restante (y la demanda
+    con la que se calculó), compras acumuladas por especie y por oferta, y
+    el atraso del plan de compras.
+    """
+    dia: int
+    stock: np.ndarray
+    llegadas: np.ndarray
+    historial: np.ndarray
+    restante: np.ndarray
+    demanda: np.ndarray
+    comprado: np.ndarray
+    usada: np.ndarray
+    cursor: np.ndarray
+    atraso: np.ndarray
+
+
+class Inventario:
+    """
+    Inventario del almacén como arreglos por especie (en el orden de
+    `MotorSimulacion.especies`), actualizado con trabajo constante por día.
+
+    `stock` es la existencia del día en curso y `llegadas` lo comprado hoy,
+    que entra al almacén mañana. `historial` es un buffer circular con el
+    cierre de los últimos `aclimatacion_min_dias` días (fila `dia % n`): lo
+    que se puede entregar hoy es lo que había al cierre de hace
+    `aclimatacion_min_dias` días y sigue en el almacén.
+    """
+
+    def __init__(self, n_especies, aclimatacion_min_dias):
+        self.aclimatacion_min_dias = aclimatacion_min_dias
+        self.stock = np.zeros(n_especies)
+        self.llegadas = np.zeros(n_especies)
+        self.historial = np.zeros((aclimatacion_min_dias, n_especies))
+
+    def abrir_dia(self):
+        """Incorpora al stock lo que llega hoy."""
+        self.stock += self.llegadas
+        self.llegadas[:] = 0
+
+    def disponibles(self, dia):
+        """Unidades ya aclimatadas que se pueden entregar hoy, por especie."""
+        n = self.aclimatacion_min_dias
+        if n == 0:
+            return self.stock.copy()
+        if dia < n:
+            return np.zeros_like(self.stock)
+        # Lo entregado desde ese cierre ya no está
+        return np.minimum(self.historial[dia % n], self.stock)
+
+    def cerrar_dia(self, dia):
+        """Guarda el cierre del día en el buffer de aclimatación."""
+        if self.aclimatacion_min_dias:
+            self.historial[dia % self.aclimatacion_min_dias] = self.stock
+
+    def total(self):
+        return self.stock.sum()
+
+
+class InventarioDisperso(Inventario):
+    """
+    Inventario para el núcleo por eventos: en lugar del buffer circular
+    guarda el cierre solo de los días que se procesaron (los demás no
+    cambian el stock) y busca el último cierre anterior a la aclimatación.
+    """
+
+    def __init__(self, n_especies, aclimatacion_min_dias):
+        super().__init__(n_especies, 0)
+        self.aclimatacion_min_dias = aclimatacion_min_dias
+        self.dias_cierre = []
+        self.cierres = []
+
+    def disponibles(self, dia):
+        n = self.aclimatacion_min_dias
+        if n == 0:
+            return self.stock.copy()
+        i = bisect_right(self.dias_cierre, dia - n) - 1
+        if i < 0:
+            return np.zeros_like(self.stock)
+        return np.minimum(self.cierres[i], self.stock)
+
+    def cerrar_dia(self, dia):
+        if self.aclimatacion_min_dias:
+            self.dias_cierre.append(dia)
+            self.cierres.append(self.stock.copy())
+
+
+class LibroCompras:
+    """
+    Totales acumulados de compra por especie y consumo de cada oferta, para
+    no recorrer el historial de compras en cada día.
+
+    `usada[p, s]` es lo comprado al proveedor `p` de la especie `s` y
+    `cursor[s]` la posición (en `MotorSimulacion.ofertas_por_especie[s]`) de
+    la primera oferta que puede tener saldo. `pendientes` conserva, en el
+    orden de la tabla de demandas, las especies a las que les falta comprar
+    y aún tienen ofertas.
+    """
+
+    def __init__(self, demanda_total, max_oferta, ofertas_por_especie):
+        self.demanda_total = demanda_total
+        self.comprado = np.zeros_like(demanda_total)
+        self.usada = np.zeros_like(max_oferta)
+        self.cursor = np.zeros(len(demanda_total), dtype=int)
+        self.pendientes = {
+            s: None
+            for s in range(len(demanda_total))
+            if demanda_total[s] > 0 and len(ofertas_por_especie[s])
+        }
+
+    def restante(self, s):
+        return self.demanda_total[s] - self.comprado[s]
+
+    def registrar(self, p, s, cantidad):
+        self.comprado[s] += cantidad
+        self.usada[p, s] += cantidad
+
+
+class MotorSimulacion:
+    """
+    Motor de simulación sin dependencias de interfaz. Todo el estado de la
+    corrida sale de `config`; las matrices de viaje se construyen una vez.
+
+    Internamente especies, polígonos y proveedores se codifican como índices
+    enteros densos (posición en `especies`, `poligonos` y `proveedores`) y el
+    estado se guarda en arreglos de NumPy; los nombres solo se usan al
+    armar las tablas de resultados.
+
+    Con un `perfil` (ver `simulacion.perfil.Perfilador`) se registra el
+    tiempo de cada etapa por día y los contadores del planificador, y con
+    `cache_matrices` (ver `simulacion.cache.CacheDisco`) las matrices por
+    red vial se guardan entre sesiones. `matrices` (distancias, tiempos)
+    reemplaza a las calculadas desde las coordenadas.
+    """
+
+    def __init__(self, config, perfil=None, cache_matrices=None, matrices=None):
+        config.validar()
+        self.config = config
+        self.perfil = perfil or SIN_PERFIL
+
+        self.poligonos = list(config.poligonos_coords)
+        self.indice_poligono = {pid: i for i, pid in enumerate(self.poligonos)}
+        self.idx_almacen = self.indice_poligono[config.almacen]
+        self.coords = np.array(list(config.poligonos_coords.values()), dtype=float).reshape(-1, 2)
+        if matrices is None:
+            matrices = construir_matrices(
+                config.poligonos_coords, config.velocidad, config.red_vial, cache_matrices
+            )
+        self.matriz_distancias, self.matriz_tiempos = matrices
+        if config.ruido_tiempos > 0:
+            self.matriz_tiempos = self.matriz_tiempos * factores_lognormales(
+                np.random.default_rng(config.semilla), config.ruido_tiempos,
+                self.matriz_tiempos.shape, simetrico=True,
+            )
+        # Zona de reparto de cada polígono (None: sin zonas)
+        self.zona = None
+        if config.tamano_zona:
+            self.zona = zonificar(
+                self.coords, config.tamano_zona, config.metodo_zonas, config.semilla
+            )
+
+        # Demanda especie × polígono y posición de cada polígono dentro de la
+        # demanda de su especie (para desempatar como la tabla original)
+        self.especies = list(config.demanda_poligonos)
+        self.indice_especie = {esp: s for s, esp in enumerate(self.especies)}
+        self.demanda = np.zeros((len(self.especies), len(self.poligonos)))
+        self.posicion = np.zeros(self.demanda.shape, dtype=np.int64)
+        for s, dem in enumerate(config.demanda_poligonos.values()):
+            for pos, (pid, d) in enumerate(dem.items()):
+                self.demanda[s, self.indice_poligono[pid]] = d
+                self.posicion[s, self.indice_poligono[pid]] = pos
+        self.demanda_total = np.array(
+            [sum(dem.values()) for dem in config.demanda_poligonos.values()], dtype=float
+        )
+
+        # Ofertas proveedor × especie y, por especie, proveedores ordenados
+        # por costo (a igual costo, en el orden de la tabla de proveedores)
+        self.proveedores = list(config.demandas_oferta)
+        self.costo = np.full((len(self.proveedores), len(self.especies)), np.nan)
+        self.max_oferta = np.zeros(self.costo.shape)
+        for p, datos in enumerate(config.demandas_oferta.values()):
+            for esp, info in datos.items():
+                s = self.indice_especie.get(esp)
+                if s is not None and info:
+                    self.costo[p, s] = info["costo"]
+                    self.max_oferta[p, s] = info["max_oferta"]
+        self.ofertas_por_especie = [
+            [int(p) for p in np.argsort(col, kind="stable") if not np.isnan(col[p])]
+            for col in self.costo.T
+        ]
+        self._plan = _SIN_PLANIFICAR
+
+    def tiempo_entre(self, p1, p2):
+        return float(self.matriz_tiempos[self.indice_poligono[p1], self.indice_poligono[p2]])
+
+    def actualizar_inventario(self, inventario, dia):
+        inventario.abrir_dia()
+
+    def calcular_disponibles(self, inventario, dia):
+        return inventario.disponibles(dia)
+
+    @staticmethod
+    def entrega_nodo(disponibles, demanda, capacidad_libre):
+        """
+        Cantidad a dejar de cada especie en un nodo: el mínimo entre lo
+        disponible y lo demandado, llenando el camión especie por especie
+        (en orden) hasta `capacidad_libre`.
+        """
+        posible = np.maximum(np.minimum(disponibles, demanda), 0)
+        previo = np.cumsum(posible) - posible
+        return np.minimum(posible, np.maximum(capacidad_libre - previo, 0))
+
+    def fila_ruta(self, dia, camion, ruta, duracion, carga, detalle, ahorro=0.0):
+        """Fila de la tabla de rutas; `ruta` empieza en el almacén."""
+        return {
+            "Día": dia,
+            "Camión": camion,
+            "Ruta": " → ".join(str(self.poligonos[j]) for j in [*ruta, self.idx_almacen]),
+            "Duración_min": round(duracion),
+            "Unidades": float(carga),
+            "Detalle": detalle,
+            "Ahorro_min": round(float(ahorro), 2)
+        }
+
+    def mejorar(self, paradas, limite, dia):
+        """
+        Orden de visita mejorado de `paradas` y minutos ahorrados, o el orden
+        original si la mejora está apagada (`limite` None) o ya se gastó el
+        presupuesto del día.
+        """
+        if limite is None or time.process_time() >= limite:
+            return list(range(len(paradas))), 0.0
+        orden, ahorro, movimientos = mejorar_ruta(paradas, self.idx_almacen, self.matriz_tiempos, limite)
+        self.perfil.contar("movimientos_mejora", movimientos, dia)
+        self.perfil.contar("minutos_ahorrados", ahorro, dia)
+        return orden, ahorro
+
+    def detalle_nodo(self, j, q):
+        return (self.poligonos[j], {self.especies[s]: float(q[s]) for s in np.flatnonzero(q > 0)})
+
+    def planificar_rutas(self, dia, disponibles, demanda_restante):
+        """
+        Rutas del día con el planificador de la configuración. Descuenta lo
+        entregado de `disponibles` y `demanda_restante` y devuelve las filas
+        de rutas y el total entregado por especie.
+
+        Con `presupuesto_mejora_ms` cada ruta se acorta con 2-opt / Or-opt
+        apenas se arma, así que los minutos recuperados quedan para los
+        viajes siguientes del mismo día.
+        """
+        cfg = self.config
+        limite = None
+        if cfg.presupuesto_mejora_ms > 0:
+            limite = time.process_time() + cfg.presupuesto_mejora_ms / 1000
+        if cfg.planificador == "ahorros":
+            return self.planificar_ahorros(dia, disponibles, demanda_restante, limite)
+        return self.planificar_voraz(dia, disponibles, demanda_restante, limite)
+
+    def planificar_voraz(self, dia, disponibles, demanda_restante, limite=None):
+        cfg = self.config
+        rutas_dia = []
+        entregado = np.zeros(len(self.especies))
+        contadores = {"rutas_intentadas": 0, "candidatos_evaluados": 0}
+        # Cada camión arma sus viajes uno tras otro dentro de su jornada
+        for camion in range(1, cfg.camiones + 1):
+            rutas_dia += self._viajes_voraz(
+                dia, camion, disponibles, demanda_restante, entregado, contadores, limite
+            )
+
+        for nombre, n in contadores.items():
+            self.perfil.contar(nombre, n, dia)
+        self.perfil.contar("rutas", len(rutas_dia), dia)
+        return rutas_dia, entregado
+
+    def _viajes_voraz(self, dia, camion, disponibles, demanda_restante, entregado, contadores,
+                      limite):
+        cfg = self.config
+        tiempos = self.matriz_tiempos
+        almacen = self.idx_almacen
+        rutas_dia = []
+        tiempo_total = 0
+        rutas_intentadas = 0
+        candidatos_evaluados = 0
+
+        while tiempo_total < cfg.jornada_min:
+            rutas_intentadas += 1
+            ruta = [almacen]
+            tiempo_ruta = cfg.tiempo_carga
+            carga = 0
+            detalle = []
+
+            while True:
+                last = ruta[-1]
+                con_stock = disponibles > 0
+                # Sin demanda abierta, sin camión libre o sin plantas aclimatadas
+                # ningún candidato recibiría entrega
+                if (
+                    not demanda_restante.n_abiertos
+                    or carga >= cfg.capacidad_camion
+                    or not con_stock.any()
+                ):
+                    break
+
+                # Primer paso: al nodo más lejano desde el almacén
+                if len(ruta) == 1:
+                    candidatos = self._caben(
+                        demanda_restante.lejanos(con_stock), last, tiempo_total + tiempo_ruta
+                    )
+                elif self.zona is not None:
+                    # Con zonas, vecino más cercano dentro de la zona de la primera parada
+                    candidatos = self._caben(
+                        demanda_restante.cercanos_en_zona(
+                            self.zona[ruta[1]], self.matriz_distancias[last], con_stock
+                        ),
+                        last, tiempo_total + tiempo_ruta,
+                    )
+                else:
+                    # Luego, vecino más cercano
+                    candidatos = demanda_restante.cercanos(
+                        last, self.matriz_distancias[last], con_stock
+                    )
+
+                encontrado = False
+                for j in candidatos:
+                    candidatos_evaluados += 1
+                    t_viaje = tiempos[last, j]
+                    t_vuelta = tiempos[j, almacen]
+                    t_extra = t_viaje + cfg.tiempo_descarga + t_vuelta
+                    if tiempo_total + tiempo_ruta + t_extra > cfg.jornada_min:
+                        continue
+
+                    q = self.entrega_nodo(
+                        disponibles, demanda_restante.restante[:, j], cfg.capacidad_camion - carga
+                    )
+                    total_nodo = q.sum()
+
+                    if total_nodo > 0:
+                        ruta.append(j)
+                        tiempo_ruta += t_viaje + cfg.tiempo_descarga
+                        disponibles -= q
+                        entregado += q
+                        demanda_restante.entregar(j, q)
+                        carga += total_nodo
+                        detalle.append(self.detalle_nodo(j, q))
+                        encontrado = True
+                        break
+
+                if not encontrado:
+                    break
+
+            if len(ruta) > 1:
+                tiempo_ruta += tiempos[ruta[-1], almacen]
+                orden, ahorro = self.mejorar(ruta[1:], limite, dia)
+                if ahorro:
+                    ruta = [almacen, *(ruta[1 + i] for i in orden)]
+                    detalle = [detalle[i] for i in orden]
+                    tiempo_ruta -= ahorro
+                tiempo_total += tiempo_ruta
+                rutas_dia.append(
+                    self.fila_ruta(dia, camion, ruta, tiempo_ruta, carga, detalle, ahorro)
+                )
+            else:
+                break
+
+        contadores["rutas_intentadas"] += rutas_intentadas
+        contadores["candidatos_evaluados"] += candidatos_evaluados
+        return rutas_dia
+
+    def _caben(self, candidatos, desde, usado):
+        """
+        Los `candidatos` (arreglo) a los que aún se llega desde `desde` y se
+        vuelve al almacén sin pasar la jornada, con `usado` minutos ya
+        ocupados; es la misma cuenta que hace el planificador por candidato.
+        """
+        t_extra = (self.matriz_tiempos[desde, candidatos] + self.config.tiempo_descarga
+                   + self.matriz_tiempos[candidatos, self.idx_almacen])
+        return candidatos[~(usado + t_extra > self.config.jornada_min)]
+
+    def planificar_ahorros(self, dia, disponibles, demanda_restante, limite=None):
+        """
+        Rutas del día por ahorros (ver `simulacion.ahorros`) para toda la
+        flota. En cada ronda se reparte el stock entre los polígonos abiertos
+        (los más lejanos primero, hasta un camión lleno por polígono), se
+        arman las rutas, se acortan (si hay presupuesto de mejora) y se
+        asignan, de la más llena a la menos llena, al primer camión al que le
+        alcance la jornada. Lo que no se asignó
+        vuelve a repartirse en la ronda siguiente, hasta que ninguna ruta
+        quepa, y al final se unen los viajes que caben juntos en un camión.
+        Con zonas, las rutas solo se unen dentro de cada zona.
+        """
+        cfg = self.config
+        tiempos = self.matriz_tiempos
+        almacen = self.idx_almacen
+        entregado = np.zeros(len(self.especies))
+        libre = np.full(cfg.camiones, float(cfg.jornada_min))
+        viajes = [[] for _ in range(cfg.camiones)]
+        rondas = 0
+        evaluados = 0
+
+        while demanda_restante.n_abiertos and (disponibles > 0).any():
+            rondas += 1
+            nodos = demanda_restante.lejanos()
+            solo = (cfg.tiempo_carga + tiempos[almacen, nodos]
+                    + cfg.tiempo_descarga + tiempos[nodos, almacen])
+            alcanzables = solo <= libre.max()
+            nodos, solo = nodos[alcanzables], solo[alcanzables]
+            q = asignar_carga(disponibles, demanda_restante.restante[:, nodos], cfg.capacidad_camion)
+            cargas = q.sum(axis=0)
+            con_carga = cargas > 0
+            nodos, q, cargas = nodos[con_carga], q[:, con_carga], cargas[con_carga]
+            if not len(nodos):
+                break
+            # La flota no puede repartir hoy más que un camión lleno por cada
+            # viaje que aún le cabe: no se arman rutas para más polígonos
+            minimo = solo[con_carga].min()
+            if minimo > 0:
+                viajes_max = np.floor(libre / minimo).sum()
+                corte = np.searchsorted(np.cumsum(cargas), viajes_max * cfg.capacidad_camion) + 1
+                nodos, q, cargas = nodos[:corte], q[:, :corte], cargas[:corte]
+
+            rutas = []
+            for en_zona in self.separar_zonas(nodos):
+                rutas_zona, n = construir_rutas(
+                    nodos[en_zona], cargas[en_zona], tiempos, self.coords, almacen,
+                    cfg.capacidad_camion, libre.max(), cfg.tiempo_carga, cfg.tiempo_descarga,
+                )
+                rutas += rutas_zona
+                evaluados += n
+            columna = {int(j): c for c, j in enumerate(nodos)}
+
+            asignadas = 0
+            for ruta, duracion, unidades, partes in sorted(rutas, key=lambda r: -r[2]):
+                orden, ahorro = self.mejorar(ruta, limite, dia)
+                ruta, partes = ruta[orden], partes[orden]
+                duracion -= ahorro
+                caben = np.flatnonzero(libre >= duracion)
+                if not len(caben):
+                    continue
+                k = caben[0]
+                libre[k] -= duracion
+                detalle = []
+                for j, parte in zip(ruta, partes):
+                    # Con entregas divididas cada ruta lleva solo su parte
+                    # de la carga del nodo (especie por especie, en orden)
+                    q_nodo = q[:, columna[int(j)]]
+                    q_j = np.minimum(q_nodo, np.maximum(parte - (np.cumsum(q_nodo) - q_nodo), 0))
+                    q_nodo -= q_j
+                    disponibles -= q_j
+                    entregado += q_j
+                    demanda_restante.entregar(j, q_j)
+                    detalle.append(self.detalle_nodo(j, q_j))
+                viajes[k].append(([almacen, *ruta], duracion, unidades, detalle, ahorro))
+                asignadas += 1
+            if not asignadas:
+                break
+
+        self.perfil.contar("viajes_unidos", self.unir_viajes(viajes, libre), dia)
+        rutas_dia = [
+            self.fila_ruta(dia, k + 1, *viaje)
+            for k, viajes_camion in enumerate(viajes)
+            for viaje in viajes_camion
+        ]
+        self.perfil.contar("rondas_ahorros", rondas, dia)
+        self.perfil.contar("ahorros_evaluados", evaluados, dia)
+        self.perfil.contar("rutas", len(rutas_dia), dia)
+        return rutas_dia, entregado
+
+    def unir_viajes(self, viajes, libre):
+        """
+        Une los viajes del día (`viajes` por camión) cuya carga sumada cabe en
+        un camión: de menor a mayor carga, cada viaje se agrega al final del
+        viaje más cargado con el que quepa, si al camión de ese viaje le
+        alcanza la jornada. Como se ahorra una vuelta al almacén y una carga,
+        dos viajes del mismo camión unidos nunca duran más que por separado.
+        Las rondas de ahorros se arman sin saber cuánto le queda a cada
+        camión, así que lo que no cupo en una ronda suele salir en viajes a
+        medio llenar. Con zonas solo se unen viajes de la misma zona.
+        Actualiza `viajes` y `libre` y devuelve cuántos unió.
+        """
+        cfg = self.config
+        tiempos = self.matriz_tiempos
+        almacen = self.idx_almacen
+        todos = [[k, *viaje] for k, viajes_camion in enumerate(viajes) for viaje in viajes_camion]
+        todos.sort(key=lambda v: v[3])
+        unidos = 0
+        for chico in list(todos):
+            k_chico, ruta_chico, duracion_chico, carga_chico = chico[:4]
+            for otro in reversed(todos):
+                k, ruta, duracion, carga = otro[:4]
+                if otro is chico or carga + carga_chico > cfg.capacidad_camion:
+                    continue
+                if self.zona is not None and self.zona[ruta[1]] != self.zona[ruta_chico[1]]:
+                    continue
+                ahorro = (tiempos[ruta[-1], almacen] + tiempos[almacen, ruta_chico[1]]
+                          + cfg.tiempo_carga - tiempos[ruta[-1], ruta_chico[1]])
+                extra = duracion_chico - ahorro
+                if k != k_chico and libre[k] < extra:
+                    continue
+                libre[k] -= extra
+                libre[k_chico] += duracion_chico
+                otro[1:] = [
+                    [*ruta, *ruta_chico[1:]], duracion + extra, carga + carga_chico,
+                    otro[4] + chico[4], otro[5] + chico[5],
+                ]
+                todos.remove(chico)
+                unidos += 1
+                break
+        for viajes_camion in viajes:
+            viajes_camion.clear()
+        for k, *viaje in todos:
+            viajes[k].append(tuple(viaje))
+        return unidos
+
+    def separar_zonas(self, nodos):
+        """Posiciones de `nodos` agrupadas por zona, cada grupo en su orden original."""
+        if self.zona is None:
+            return [np.arange(len(nodos))]
+        zonas = self.zona[nodos]
+        orden = np.argsort(zonas, kind="stable")
+        _, inicios = np.unique(zonas[orden], return_index=True)
+        return np.split(orden, inicios[1:])
+
+    def procesar_entregas(self, inventario, entregas, entregado, dia):
+        a_entregar = np.minimum(inventario.stock, entregado)
+        inventario.stock -= np.maximum(a_entregar, 0)
+        for s in np.flatnonzero(a_entregar > 0):
+            cantidad = float(a_entregar[s])
+            entregas.append({
+                "Especie":      self.especies[s],
+                "Día entrega":  dia,
+                "Cantidad":     cantidad,
+                "Costo plantación": cantidad * self.config.costo_plantacion
+            })
+
+    def realizar_compras(self, inventario, compras, libro, dia):
+        """
+        Compra todas las especies que hagan falta para reponer el inventario,
+        cobrando un solo costo de transporte por día, y asegurándose de que
+        el espacio en almacén (espacio_max_almacen) se trate como un total agregado.
+        """
+        cfg = self.config
+        # Ya no alcanzaría a llegar (si no cabe en almacén para aclimatar):
+        if dia + cfg.aclimatacion_min_dias >= cfg.dias_totales:
+            return
+
+        # Calculamos cuánto hay en total en inventario en el día 'dia'
+        espacio_libre_total = cfg.espacio_max_almacen - inventario.total()
+        self.comprar_en_orden(inventario, compras, libro, dia, espacio_libre_total)
+
+    def comprar_en_orden(self, inventario, compras, libro, dia, cantidad):
+        """
+        Compra hasta `cantidad` unidades en total, especie por especie en el
+        orden de las pendientes, cobrando un solo costo de transporte por
+        día. Devuelve lo comprado.
+        """
+        # Si ya está lleno o no hay espacio, no compramos nada:
+        if cantidad <= 0:
+            return 0.0
+
+        # Flag para cobrar transporte solo una vez por día
+        transporte_cobrado = False
+        restante = cantidad
+        # Iteramos solo las especies que aún tienen algo por comprar
+        for s in list(libro.pendientes):
+            max_posible = min(libro.restante(s), restante)
+            comprado, transporte_cobrado = self.comprar_especie(
+                inventario, compras, libro, dia, s, max_posible, transporte_cobrado
+            )
+
+            # Reducimos lo que falta por comprar
+            restante -= comprado
+            if restante <= 0:
+                break  # ya no cabe nada más en almacén
+        return cantidad - restante
+
+    def comprar_especie(self, inventario, compras, libro, dia, s, cantidad, transporte_cobrado):
+        """
+        Compra hasta `cantidad` unidades de la especie `s`, de la oferta más
+        barata a la más cara. Devuelve lo comprado y si ya se cobró el
+        transporte del día.
+        """
+        cfg = self.config
+        # Ofertas de la especie ya ordenadas por costo; las agotadas
+        # quedan siempre antes del cursor
+        ofertas = self.ofertas_por_especie[s]
+        i = libro.cursor[s]
+
+        restante_a_comprar = cantidad
+        while i < len(ofertas) and restante_a_comprar > 0:
+            p = ofertas[i]
+            dispo = self.max_oferta[p, s] - libro.usada[p, s]
+            if dispo <= 0:
+                i += 1
+                continue
+            q = float(min(dispo, restante_a_comprar))
+
+            # 4) Cobro único de transporte por día:
+            costo_trans = 0
+            if not transporte_cobrado:
+                costo_trans = cfg.costo_transporte
+                transporte_cobrado = True
+
+            compras.append({
+                "Especie":          self.especies[s],
+                "Día pedido":       dia,
+                "Proveedor":        self.proveedores[p],
+                "Cantidad":         q,
+                "Costo compra":     q * float(self.costo[p, s]),
+                "Costo transporte": costo_trans
+            })
+
+            # Actualizamos el libro; lo comprado llega al almacén mañana
+            libro.registrar(p, s, q)
+            inventario.llegadas[s] += q
+            restante_a_comprar -= q
+
+        libro.cursor[s] = i
+        if libro.restante(s) <= 0 or i >= len(ofertas):
+            libro.pendientes.pop(s, None)
+        return cantidad - restante_a_comprar, transporte_cobrado
+
+    def capacidad_reparto_diaria(self):
+        """
+        Unidades que la flota reparte en un día, medidas con el propio
+        planificador de rutas: durante `DIAS_CALIBRACION` días, desde la
+        demanda inicial, se reparte cada día un almacén lleno con la mezcla
+        de especies de la demanda y se promedia lo entregado. Con muchas
+        paradas por viaje o polígonos lejanos se reparte bastante menos que
+        camiones llenos en viajes de ida y vuelta. Si cada día se repartió
+        el almacén entero, lo que limita es el espacio y no la flota, y se
+        usa la estimación de `_capacidad_ida_y_vuelta`.
+        """
+        cfg = self.config
+        total = self.demanda_total.astype(float)
+        if total.sum() <= 0:
+            return self._capacidad_ida_y_vuelta()
+        stock = np.floor(np.minimum(total, cfg.espacio_max_almacen * total / total.sum()))
+        demanda_restante = DemandaPendiente(
+            self.demanda, self.posicion, self.coords, self.matriz_distancias[self.idx_almacen],
+            euclidiana=not cfg.red_vial, zonas=self.zona,
+        )
+        perfil, self.perfil = self.perfil, SIN_PERFIL
+        try:
+            entregado = [
+                self.planificar_rutas(dia, stock.copy(), demanda_restante)[1].sum()
+                for dia in range(DIAS_CALIBRACION)
+            ]
+        finally:
+            self.perfil = perfil
+        if min(entregado) >= stock.sum():
+            return max(self._capacidad_ida_y_vuelta(), float(stock.sum()))
+        return float(np.mean(entregado))
+
+    def _capacidad_ida_y_vuelta(self):
+        """
+        Camiones llenos en viajes de ida y vuelta de duración media a los
+        polígonos con demanda.
+        """
+        cfg = self.config
+        tiempos = self.matriz_tiempos
+        con_demanda = np.flatnonzero(self.demanda.any(axis=0))
+        if not len(con_demanda):
+            return float(cfg.camiones * cfg.capacidad_camion)
+        vuelta = tiempos[self.idx_almacen, con_demanda] + tiempos[con_demanda, self.idx_almacen]
+        viaje = cfg.tiempo_carga + cfg.tiempo_descarga + vuelta.mean()
+        viajes = max(1, int(cfg.jornada_min // viaje)) if viaje > 0 else 1
+        return float(cfg.camiones * viajes * cfg.capacidad_camion)
+
+    def planificar_compras(self):
+        """
+        Unidades a comprar cada día de todo el horizonte (modo "optimo"), o
+        None si seguir el plan entrega menos o cuesta más que las compras
+        voraces. El modelo solo ve totales y una capacidad de reparto
+        estimada, así que ambas formas de comprar se prueban con una corrida
+        del núcleo diario. El resultado se guarda para `restaurar`.
+        """
+        if self._plan is _SIN_PLANIFICAR:
+            plan = optimizar_compras(
+                self.demanda_total, self.costo, self.max_oferta, self.config,
+                self.capacidad_reparto_diaria(),
+            )
+            entregado_voraz, costo_voraz = self._probar_compras(None)
+            entregado_plan, costo_plan = self._probar_compras(plan)
+            if entregado_plan < entregado_voraz or costo_plan > costo_voraz + 1e-6:
+                warnings.warn(
+                    "El plan de compras entrega menos o cuesta más que las compras "
+                    "voraces; se compra como en el modo voraz",
+                    RuntimeWarning, stacklevel=3,
+                )
+                plan = None
+            self._plan = plan
+        return self._plan
+
+    def _probar_compras(self, plan):
+        """
+        Unidades entregadas y costo de compra y transporte de una corrida
+        que sigue `plan` (None: compras voraces).
+        """
+        prueba = MotorSimulacion(
+            replace(self.config, nucleo="dias", ruido_tiempos=0.0),
+            matrices=(self.matriz_distancias, self.matriz_tiempos),
+        )
+        prueba._plan = plan
+        entregado = costo = 0.0
+        for dia_simulado in prueba.iterar_dias():
+            entregado += sum(e["Cantidad"] for e in dia_simulado.entregas)
+            costo += sum(c["Costo compra"] + c["Costo transporte"] for c in dia_simulado.compras)
+        return entregado, costo
+
+    def comprar_segun_plan(self, inventario, compras, libro, atraso, plan, dia):
+        """
+        Compra las unidades que el plan pide para `dia`, en el mismo orden de
+        especies que las compras voraces (una o dos especies a la vez en el
+        almacén dan viajes más llenos que la mezcla de todas), sin pasar del
+        espacio libre. Lo que no cupo (porque el reparto real fue más lento
+        que el planeado) queda en `atraso` y se compra en cuanto haya espacio.
+        """
+        cfg = self.config
+        atraso += plan[dia]
+        if dia + cfg.aclimatacion_min_dias >= cfg.dias_totales:
+            return
+        espacio_libre_total = cfg.espacio_max_almacen - inventario.total()
+        atraso -= self.comprar_en_orden(
+            inventario, compras, libro, dia, min(float(atraso), espacio_libre_total)
+        )
+
+    def estado_inicial(self):
+        """Demanda pendiente, libro de compras y plan (modo "optimo") al día 0."""
+        demanda_restante = DemandaPendiente(
+            self.demanda, self.posicion, self.coords, self.matriz_distancias[self.idx_almacen],
+            euclidiana=not self.config.red_vial, zonas=self.zona,
+        )
+        libro = LibroCompras(self.demanda_total, self.max_oferta, self.ofertas_por_especie)
+        plan = None
+        if self.config.modo_compras == "optimo":
+            with self.perfil.etapa("optimizar_compras"):
+                plan = self.planificar_compras()
+        return demanda_restante, libro, plan
+
+    def comprar(self, inventario, compras, libro, atraso, plan, dia):
+        if plan is None:
+            self.realizar_compras(inventario, compras, libro, dia)
+        else:
+            self.comprar_segun_plan(inventario, compras, libro, atraso, plan, dia)
+
+    def armar_resultados(self, filas_inventario, compras, entregas, rutas):
+        df_inventario = pd.DataFrame(filas_inventario, columns=self.especies)
+        df_inventario.insert(0, "Día", np.arange(len(filas_inventario)))
+
+        return ResultadosSimulacion(
+            inventario=df_inventario,
+            compras=pd.DataFrame(compras),
+            entregas=pd.DataFrame(entregas),
+            rutas=pd.DataFrame(rutas),
+        )
+
+    def simular(self):
+        filas = []
+        compras = []
+        entregas = []
+        rutas = []
+        for dia_simulado in self.iterar():
+            filas.append(dia_simulado.inventario)
+            compras.extend(dia_simulado.compras)
+            entregas.extend(dia_simulado.entregas)
+            rutas.extend(dia_simulado.rutas)
+
+        with self.perfil.etapa("armar_tablas"):
+            return self.armar_resultados(np.vstack(filas), compras, entregas, rutas)
+
+    def iterar(self):
+        """
+        Generador con los resultados de la corrida a medida que se producen
+        (ver `DiaSimulado`), con el núcleo de la configuración. La última
+        entrega es el día `dias_totales`, con lo que queda por llegar.
+        """
+        if self.config.nucleo == "eventos":
+            return self.iterar_eventos()
+        return self.iterar_dias()
+
+    def capturar(self, dia, inventario, demanda_restante, libro, atraso):
+        """`PuntoControl` con copias del estado al inicio de `dia`."""
+        return PuntoControl(
+            dia,
+            inventario.stock.copy(),
+            inventario.llegadas.copy(),
+            inventario.historial.copy(),
+            demanda_restante.restante.copy(),
+            self.demanda,
+            libro.comprado.copy(),
+            libro.usada.copy(),
+            libro.cursor.copy(),
+            atraso.copy(),
+        )
+
+    def restaurar(self, punto):
+        """
+        Inventario, demanda pendiente, libro de compras, plan y atraso de
+        `punto` para la configuración de este motor (mismas especies,
+        polígonos, proveedores y días de aclimatación). Si la demanda cambió,
+        lo ya entregado se descuenta de la nueva.
+        """
+        inventario = Inventario(len(self.especies), self.config.aclimatacion_min_dias)
+        inventario.stock[:] = punto.stock
+        inventario.llegadas[:] = punto.llegadas
+        inventario.historial[:] = punto.historial
+
+        restante = punto.restante + (self.demanda - punto.demanda)
+        demanda_restante = DemandaPendiente(
+            np.maximum(restante, 0), self.posicion, self.coords,
+            self.matriz_distancias[self.idx_almacen],
+            euclidiana=not self.config.red_vial, zonas=self.zona,
+        )
+
+        libro = LibroCompras(self.demanda_total, self.max_oferta, self.ofertas_por_especie)
+        libro.comprado[:] = punto.comprado
+        libro.usada[:] = punto.usada
+        libro.cursor[:] = punto.cursor
+        libro.pendientes = {
+            s: None for s in libro.pendientes
+            if libro.restante(s) > 0 and libro.cursor[s] < len(self.ofertas_por_especie[s])
+        }
+
+        plan = None
+        if self.config.modo_compras == "optimo":
+            with self.perfil.etapa("optimizar_compras"):
+                plan = self.planificar_compras()
+        return inventario, demanda_restante, libro, plan, punto.atraso.copy()
+
+    def iterar_dias(self, desde=None, cada_control=0, hasta=None):
+        """
+        Núcleo diario. Con `desde` (un `PuntoControl`) la corrida sigue desde
+        ese día; con `cada_control` se guarda en `self.puntos_control` un
+        punto de control al inicio del primer día y de cada día múltiplo de
+        `cada_control`. Con `hasta` se detiene antes de ese día (sin la fila
+        final de lo que queda por llegar) y deja su estado en
+        `self.punto_final`. `self.primer_dia_con_stock` es el primer día en
+        que hubo plantas aclimatadas para repartir (None si no hubo).
+        """
+        cfg = self.config
+        perfil = self.perfil
+        if desde is None:
+            inventario = Inventario(len(self.especies), cfg.aclimatacion_min_dias)
+            demanda_restante, libro, plan = self.estado_inicial()
+            atraso = np.zeros(())
+            inicio = 0
+        else:
+            inventario, demanda_restante, libro, plan, atraso = self.restaurar(desde)
+            inicio = desde.dia
+        self.puntos_control = []
+        self.primer_dia_con_stock = None
+
+        for dia in range(inicio, cfg.dias_totales if hasta is None else hasta):
+            if cada_control and (dia == inicio or dia % cada_control == 0):
+                self.puntos_control.append(
+                    self.capturar(dia, inventario, demanda_restante, libro, atraso)
+                )
+            compras = []
+            entregas = []
+            with perfil.etapa("actualizar_inventario", dia):
+                self.actualizar_inventario(inventario, dia)
+                fila = inventario.stock[None].copy()
+
+            with perfil.etapa("calcular_disponibles", dia):
+                disponibles = self.calcular_disponibles(inventario, dia)
+                if self.primer_dia_con_stock is None and (disponibles > 0).any():
+                    self.primer_dia_con_stock = dia
+            with perfil.etapa("planificar_rutas", dia):
+                rutas_dia, entregado = self.planificar_rutas(dia, disponibles, demanda_restante)
+            with perfil.etapa("procesar_entregas", dia):
+                self.procesar_entregas(inventario, entregas, entregado, dia)
+            with perfil.etapa("realizar_compras", dia):
+                self.comprar(inventario, compras, libro, atraso, plan, dia)
+                inventario.cerrar_dia(dia)
+            yield DiaSimulado(dia, fila, compras, entregas, rutas_dia)
+
+        if hasta is not None:
+            self.punto_final = self.capturar(hasta, inventario, demanda_restante, libro, atraso)
+            return
+        yield DiaSimulado(cfg.dias_totales, inventario.llegadas[None].copy(), [], [], [])
+
+    def iterar_eventos(self):
+        """
+        Misma simulación que `iterar_dias`, pero guiada por una cola de
+        eventos (ver `simulacion.eventos`): solo se procesa un día si algo
+        puede cambiar en él, así que el costo crece con el número de eventos
+        y no con el largo del horizonte.
+
+        Un día se procesa cuando llega una compra, cuando lo que llegó
+        termina de aclimatarse, al día siguiente de uno con entregas (queda
+        jornada para lo que no alcanzó) y en los días del plan de compras.
+        En cualquier otro día el núcleo diario no haría nada: las compras se
+        detienen solo sin espacio o sin ofertas, y el espacio se libera
+        únicamente al entregar. Cada día procesado se entrega junto con las
+        filas de inventario de los días sin eventos anteriores a él.
+
+        Dentro de cada jornada los camiones generan sus eventos de salida,
+        descarga y regreso al minuto; lo descargado se descuenta del
+        inventario al cierre del día. Al terminar, la bitácora de eventos
+        queda en `self.bitacora`.
+
+        Cada día procesado cuesta más que en el núcleo diario (cola y
+        bitácora por parada), así que solo conviene cuando la mayoría de los
+        días no tienen eventos, como en horizontes de varios años en que la
+        demanda se cubre al principio. Por eso el núcleo por omisión sigue
+        siendo el diario.
+        """
+        cfg = self.config
+        perfil = self.perfil
+        tiempos = self.matriz_tiempos
+        almacen = self.idx_almacen
+        inventario = InventarioDisperso(len(self.especies), cfg.aclimatacion_min_dias)
+        demanda_restante, libro, plan = self.estado_inicial()
+        atraso = np.zeros(())
+        bitacora = []
+
+        cola = ColaEventos()
+        if cfg.dias_totales > 0:
+            cola.programar(JORNADA, 0, unico=True)
+        if plan is not None:
+            # Días con compras del plan
+            for d in np.flatnonzero(plan > 0):
+                cola.programar(JORNADA, int(d), unico=True)
+
+        # Primer día aún no entregado; hasta el día procesado el stock es el
+        # del último cierre
+        desde = 0
+        stock_cierre = inventario.stock.copy()
+        entregado = np.zeros(len(self.especies))
+        while len(cola):
+            evento = cola.siguiente()
+            dia, tipo, datos = evento.dia, evento.tipo, evento.datos
+            perfil.contar("eventos", 1, dia)
+
+            if tipo == LLEGADA:
+                with perfil.etapa("actualizar_inventario", dia):
+                    unidades = float(inventario.llegadas.sum())
+                    self.actualizar_inventario(inventario, dia)
+                bitacora.append({"Día": dia, "Minuto": 0.0, "Evento": tipo, "Unidades": unidades})
+                cola.programar(JORNADA, dia, unico=True)
+                if dia + cfg.aclimatacion_min_dias < cfg.dias_totales:
+                    cola.programar(
+                        ACLIMATADO, dia + cfg.aclimatacion_min_dias, unidades=unidades
+                    )
+
+            elif tipo == ACLIMATADO:
+                bitacora.append({"Día": dia, "Minuto": 0.0, "Evento": tipo, **datos})
+                cola.programar(JORNADA, dia, unico=True)
+
+            elif tipo == JORNADA:
+                fila = inventario.stock[None].copy()
+                with perfil.etapa("calcular_disponibles", dia):
+                    disponibles = self.calcular_disponibles(inventario, dia)
+                with perfil.etapa("planificar_rutas", dia):
+                    rutas_dia, _ = self.planificar_rutas(dia, disponibles, demanda_restante)
+                # Reloj de cada camión desde el inicio de la jornada
+                reloj = {}
+                for fila_ruta in rutas_dia:
+                    camion = fila_ruta["Camión"]
+                    minuto = reloj.get(camion, 0.0) + cfg.tiempo_carga
+                    cola.programar(
+                        SALIDA, dia, minuto, camion=camion, unidades=fila_ruta["Unidades"]
+                    )
+                    previo = almacen
+                    for pid, cantidades in fila_ruta["Detalle"]:
+                        j = self.indice_poligono[pid]
+                        minuto += tiempos[previo, j]
+                        cola.programar(
+                            DESCARGA, dia, minuto, camion=camion, poligono=pid,
+                            cantidades=cantidades,
+                        )
+                        minuto += cfg.tiempo_descarga
+                        previo = j
+                    minuto += tiempos[previo, almacen]
+                    cola.programar(REGRESO, dia, minuto, camion=camion)
+                    reloj[camion] = minuto
+                cola.programar(CIERRE, dia, unico=True)
+
+            elif tipo in (SALIDA, DESCARGA, REGRESO):
+                registro = {"Día": dia, "Minuto": evento.minuto, "Evento": tipo,
+                            "Camión": datos["camion"]}
+                if tipo == DESCARGA:
+                    cantidades = datos["cantidades"]
+                    for esp, q in cantidades.items():
+                        entregado[self.indice_especie[esp]] += q
+                    registro["Polígono"] = datos["poligono"]
+                    registro["Unidades"] = sum(cantidades.values())
+                elif tipo == SALIDA:
+                    registro["Unidades"] = datos["unidades"]
+                bitacora.append(registro)
+
+            elif tipo == CIERRE:
+                compras = []
+                entregas = []
+                hubo_entregas = bool(entregado.any())
+                with perfil.etapa("procesar_entregas", dia):
+                    self.procesar_entregas(inventario, entregas, entregado, dia)
+                    entregado[:] = 0
+                with perfil.etapa("realizar_compras", dia):
+                    self.comprar(inventario, compras, libro, atraso, plan, dia)
+                    inventario.cerrar_dia(dia)
+                if dia + 1 < cfg.dias_totales:
+                    if inventario.llegadas.any():
+                        cola.programar(LLEGADA, dia + 1)
+                    if hubo_entregas:
+                        cola.programar(JORNADA, dia + 1, unico=True)
+
+                filas = np.vstack([np.repeat(stock_cierre[None], dia - desde, axis=0), fila])
+                yield DiaSimulado(dia, filas, compras, entregas, rutas_dia)
+                desde = dia + 1
+                stock_cierre = inventario.stock.copy()
+
+        self.bitacora = pd.DataFrame(
+            bitacora, columns=["Día", "Minuto", "Evento", "Camión", "Polígono", "Unidades"]
+        )
+        filas = np.vstack([
+            np.repeat(stock_cierre[None], cfg.dias_totales - desde, axis=0),
+            inventario.llegadas[None],
+        ])
+        yield DiaSimulado(cfg.dias_totales, filas, [], [], [])
+
+
+def _dias_almacen(args):
+    """Corrida completa de un almacén en un proceso del pool."""
+    config, matrices = args
+    return list(MotorSimulacion(config, matrices=matrices).iterar())
+
+
+def _por_dia(flujo):
+    """Separa los bloques de varios días del núcleo por eventos en un `DiaSimulado` por día."""
+    for d in flujo:
+        n = len(d.inventario)
+        for k in range(n - 1):
+            yield DiaSimulado(d.dia - n + 1 + k, d.inventario[k:k + 1], [], [], [])
+        yield DiaSimulado(d.dia, d.inventario[-1:], d.compras, d.entregas, d.rutas)
+
+
+class MotorMultialmacen:
+    """
+    Varios almacenes (`config.almacenes`): cada polígono se asigna una vez
+    al almacén más cercano y cada almacén se simula con su propio
+    `MotorSimulacion` (sus polígonos, su parte de la oferta, su espacio y su
+    flota), sobre submatrices de las matrices de viaje completas. Los
+    resultados se juntan día a día: el inventario es la suma de los
+    almacenes y las filas de compras, entregas y rutas llevan una columna
+    `Almacén`.
+
+    Como los almacenes no comparten estado, con `config.procesos` > 1 (y
+    sin perfil) se simulan en paralelo en un pool de procesos; en ese caso
+    los resultados llegan todos al terminar el almacén más lento.
+    """
+
+    def __init__(self, config, perfil=None, cache_matrices=None):
+        config.validar()
+        self.config = config
+        self.perfil = perfil or SIN_PERFIL
+        self.especies = list(config.demanda_poligonos)
+
+        poligonos = list(config.poligonos_coords)
+        indice = {pid: i for i, pid in enumerate(poligonos)}
+        distancias, tiempos = construir_matrices(
+            config.poligonos_coords, config.velocidad, config.red_vial, cache_matrices
+        )
+        self.asignacion = asignar_almacenes(distancias, poligonos, config.almacenes)
+
+        # {almacén: (config, (distancias, tiempos))} de cada corrida
+        self.corridas = {}
+        for almacen, sub in configs_por_almacen(config, self.asignacion).items():
+            idx = np.array([indice[pid] for pid in sub.poligonos_coords])
+            self.corridas[almacen] = (
+                sub, (distancias[np.ix_(idx, idx)], tiempos[np.ix_(idx, idx)])
+            )
+
+    # Mismo armado de tablas que con un solo almacén
+    simular = MotorSimulacion.simular
+    armar_resultados = MotorSimulacion.armar_resultados
+
+    def iterar(self):
+        """Como `MotorSimulacion.iterar`, un `DiaSimulado` por día con todos los almacenes."""
+        almacenes = list(self.corridas)
+        procesos = min(self.config.procesos, len(almacenes))
+        if procesos > 1 and self.perfil is SIN_PERFIL:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                flujos = list(pool.map(_dias_almacen, self.corridas.values()))
+        else:
+            flujos = [
+                MotorSimulacion(sub, self.perfil, matrices=matrices).iterar()
+                for sub, matrices in self.corridas.values()
+            ]
+
+        for partes in zip(*map(_por_dia, flujos)):
+            yield DiaSimulado(
+                partes[0].dia,
+                sum(p.inventario for p in partes),
+                [{"Almacén": a, **f} for a, p in zip(almacenes, partes) for f in p.compras],
+                [{"Almacén": a, **f} for a, p in zip(almacenes, partes) for f in p.entregas],
+                [{"Almacén": a, **f} for a, p in zip(almacenes, partes) for f in p.rutas],
+            )
+
+
+def crear_motor(config, perfil=None, cache_matrices=None):
+    """`MotorMultialmacen` si la configuración tiene varios almacenes; si no, `MotorSimulacion`."""
+    if config.almacenes:
+        return MotorMultialmacen(config, perfil, cache_matrices)
+    return MotorSimulacion(config, perfil, cache_matrices)
+
+
+def simular(config, perfil=None):
+    """Atajo: construye el motor para `config` y ejecuta la simulación."""
+    perfil = perfil or SIN_PERFIL
+    with perfil.etapa("construccion"):
+        motor = crear_motor(config, perfil)
+    return motor.simular()
+
+
+def calcular_kpis(config, resultados):
+    """KPIs de la solución, los mismos que muestra la aplicación."""
+    df_inventario, df_compras, df_entregas, df_rutas = resultados
+    hay_rutas = len(df_rutas) > 0
+    return kpis_de_totales(config, {
+        "viajes": len(df_rutas),
+        "dias_total": int(df_rutas["Día"].max()) if hay_rutas else 0,
+        "duracion_ultima": int(df_rutas.iloc[-1]["Duración_min"]) if hay_rutas else 0,
+        "costo_compra": df_compras["Costo compra"].sum() if not df_compras.empty else 0,
+        "costo_transporte": df_compras["Costo transporte"].sum() if not df_compras.empty else 0,
+        "costo_plantacion": df_entregas["Costo plantación"].sum() if not df_entregas.empty else 0,
+        "unidades_entregadas": df_entregas["Cantidad"].sum() if not df_entregas.empty else 0,
+        "unidades_en_rutas": df_rutas["Unidades"].sum() if hay_rutas else 0,
+        # Minutos de viaje recuperados por la mejora 2-opt / Or-opt
+        "minutos_ahorrados": df_rutas["Ahorro_min"].sum() if "Ahorro_min" in df_rutas else 0,
+    })
+
+
+def kpis_de_totales(config, totales):
+    """
+    KPIs a partir de los totales de una corrida (ver `calcular_kpis`), para
+    quien los acumula día a día sin armar las tablas (ver
+    `simulacion.flujo.AcumuladorResultados`).
+    """
+    num_viajes = totales["viajes"]
+    costo_total = totales["costo_compra"] + totales["costo_transporte"] + totales["costo_plantacion"]
+
+    # Unidades demandadas y efectivamente entregadas
+    total_demandadas = sum(
+        d for esp in config.demanda_poligonos
+        for d in config.demanda_poligonos[esp].values()
+    )
+    total_entregadas = totales["unidades_entregadas"]
+
+    fill_rate = (total_entregadas / total_demandadas * 100) if total_demandadas > 0 else 0
+
+    # Utilización media de camión
+    if num_viajes > 0:
+        util_media = totales["unidades_en_rutas"] / (num_viajes * config.capacidad_camion) * 100
+    else:
+        util_media = 0
+
+    coste_unitario = (costo_total / total_entregadas) if total_entregadas > 0 else 0
+
+    return {
+        "viajes": num_viajes,
+        "dias_total": totales["dias_total"],
+        "duracion_ultima": totales["duracion_ultima"],
+        "costo_compra": float(totales["costo_compra"]),
+        "costo_transporte": float(totales["costo_transporte"]),
+        "costo_plantacion": float(totales["costo_plantacion"]),
+        "costo_total": float(costo_total),
+        "unidades_demandadas": float(total_demandadas),
+        "unidades_entregadas": float(total_entregadas),
+        "fill_rate": float(fill_rate),
+        "utilizacion_media": float(util_media),
+        "costo_unitario": float(coste_unitario),
+        "minutos_ahorrados": float(totales["minutos_ahorrados"]),
+    }
@@ -0,0 +1,46 @@
+"""
+Variantes de un escenario simuladas en un pool de procesos, para el
+barrido de parámetros (`simulacion.barrido`) y las réplicas Monte Carlo
+(`simulacion.montecarlo`).
+
+La configuración base se envía una sola vez a cada proceso del pool; por
+tarea solo viajan los campos que cambian.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+from .motor import calcular_kpis, simular
+
+# Configuración base de cada proceso del pool (se envía una sola vez)
+_config_base = None
+
+
+def _iniciar_proceso(config):
+    global _config_base
+    _config_base = config
+
+
+def _simular_variante(tarea):
+    columnas, cambios = tarea
+    config = replace(_config_base, **cambios)
+    return {**columnas, **calcular_kpis(config, simular(config))}
+
+
+def simular_variantes(config_base, tareas, procesos=None):
+    """
+    Filas de KPIs, una por tarea `(columnas, cambios)`: se simula
+    `config_base` con los campos de `cambios` reemplazados y la fila lleva
+    `columnas` seguidas de los KPIs. Con `procesos` > 1 (por defecto, uno
+    por núcleo) las tareas se reparten en un pool.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(procesos, len(tareas)),
+            initializer=_iniciar_proceso,
+            initargs=(config_base,),
+        ) as pool:
+            return list(pool.map(_simular_variante, tareas))
+    _iniciar_proceso(config_base)
+    return [_simular_variante(t) for t in tareas]
@@ -0,0 +1,89 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+
+class Perfilador:
+    """
+    Tiempos de pared y llamadas por etapa (en total y por día) y contadores
+    del planificador, registrados por `MotorSimulacion` cuando se le pasa
+    un perfilador.
+    """
+
+    def __init__(self):
+        # {etapa: [segundos, llamadas]}
+        self.etapas = defaultdict(lambda: [0.0, 0])
+        # {día: {etapa: segundos}}
+        self.por_dia = defaultdict(lambda: defaultdict(float))
+        # {contador: total} y {día: {contador: total}}
+        self.contadores = defaultdict(int)
+        self.contadores_dia = defaultdict(lambda: defaultdict(int))
+
+    @contextmanager
+    def etapa(self, nombre, dia=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            total = self.etapas[nombre]
+            total[0] += dt
+            total[1] += 1
+            if dia is not None:
+                self.por_dia[dia][nombre] += dt
+
+    def contar(self, nombre, n=1, dia=None):
+        self.contadores[nombre] += n
+        if dia is not None:
+            self.contadores_dia[dia][nombre] += n
+
+    def tabla_etapas(self):
+        """Segundos, llamadas y porcentaje del total por etapa."""
+        df = pd.DataFrame(
+            [(nombre, seg, n) for nombre, (seg, n) in self.etapas.items()],
+            columns=["Etapa", "Segundos", "Llamadas"],
+        )
+        total = df["Segundos"].sum()
+        df["% del total"] = df["Segundos"] / total * 100 if total > 0 else 0.0
+        return df.sort_values("Segundos", ascending=False, ignore_index=True)
+
+    def tabla_dias(self):
+        """Una fila por día: segundos por etapa y contadores."""
+        dias = sorted(set(self.por_dia) | set(self.contadores_dia))
+        return pd.DataFrame(
+            [{"Día": d, **self.por_dia.get(d, {}), **self.contadores_dia.get(d, {})} for d in dias]
+        ).fillna(0)
+
+    def a_dict(self):
+        return {
+            "etapas": {
+                nombre: {"segundos": seg, "llamadas": n}
+                for nombre, (seg, n) in self.etapas.items()
+            },
+            "contadores": dict(self.contadores),
+            "por_dia": {
+                str(d): {**self.por_dia.get(d, {}), **self.contadores_dia.get(d, {})}
+                for d in sorted(set(self.por_dia) | set(self.contadores_dia))
+            },
+        }
+
+    def a_json(self, **kwargs):
+        return json.dumps(self.a_dict(), ensure_ascii=False, **kwargs)
+
+
+class PerfiladorNulo:
+    """Perfilador que no registra nada (el costo por etapa es una llamada)."""
+
+    _nulo = nullcontext()
+
+    def etapa(self, nombre, dia=None):
+        return self._nulo
+
+    def contar(self, nombre, n=1, dia=None):
+        pass
+
+
+SIN_PERFIL = PerfiladorNulo()
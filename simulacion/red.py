@@ -0,0 +1,143 @@
+"""
+Distancias y tiempos de viaje sobre una red vial local, en lugar de la
+línea recta entre polígonos.
+
+La red es un CSV de aristas con una fila por tramo y columnas X1, Y1, X2,
+Y2 (extremos, en las mismas unidades que las coordenadas de los polígonos)
+y, opcionalmente, Distancia (por defecto el largo recto del tramo) y
+Velocidad (km/h del tramo; por defecto la del sidebar). Los tramos son de
+doble sentido y los extremos con las mismas coordenadas son el mismo nodo.
+
+Cada polígono se engancha al nodo más cercano (el acceso se recorre en
+línea recta a la velocidad general) y los tiempos entre todos los
+polígonos se calculan una sola vez con Dijkstra desde los nodos
+enganchados. Con Velocidad por tramo, la matriz de distancias del motor
+(que solo ordena por cercanía) es el tiempo expresado a la velocidad
+general.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+COLUMNAS_RED = ["X1", "Y1", "X2", "Y2"]
+
+# Orígenes por llamada a Dijkstra: acota la memoria a bloque × nodos de la red
+BLOQUE_DIJKSTRA = 64
+
+# Peso mínimo de un tramo (csgraph no distingue un peso 0 de la falta de tramo)
+_PESO_MIN = 1e-9
+
+
+def leer_red(fuente):
+    """Tabla de aristas validada desde un archivo o buffer CSV."""
+    aristas = pd.read_csv(fuente)
+    faltantes = [c for c in COLUMNAS_RED if c not in aristas.columns]
+    if faltantes:
+        raise ValueError("Faltan columnas en la red vial: " + ", ".join(faltantes))
+    if aristas.empty:
+        raise ValueError("La red vial no tiene tramos.")
+    numericas = [c for c in [*COLUMNAS_RED, "Distancia", "Velocidad"] if c in aristas.columns]
+    aristas[numericas] = aristas[numericas].apply(pd.to_numeric, errors="coerce")
+    if aristas[numericas].isna().any().any():
+        raise ValueError("La red vial tiene valores vacíos o no numéricos.")
+    if "Distancia" in aristas and (aristas["Distancia"] < 0).any():
+        raise ValueError("La red vial tiene tramos con distancia negativa.")
+    if "Velocidad" in aristas and (aristas["Velocidad"] <= 0).any():
+        raise ValueError("La red vial tiene tramos con velocidad no positiva.")
+    return aristas
+
+
+def _grafo(u, v, peso, n):
+    """Grafo disperso no dirigido con el tramo más corto entre cada par de nodos."""
+    a, b = np.minimum(u, v), np.maximum(u, v)
+    orden = np.lexsort((peso, b, a))
+    a, b, peso = a[orden], b[orden], peso[orden]
+    primero = np.ones(len(a), dtype=bool)
+    primero[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+    a, b, peso = a[primero], b[primero], np.maximum(peso[primero], _PESO_MIN)
+    return coo_matrix((peso, (a, b)), shape=(n, n)).tocsr()
+
+
+def _entre_nodos(grafo, nodos):
+    """Costo mínimo por la red entre cada par de `nodos` (por bloques de orígenes)."""
+    costos = np.empty((len(nodos), len(nodos)))
+    for i in range(0, len(nodos), BLOQUE_DIJKSTRA):
+        desde = nodos[i:i + BLOQUE_DIJKSTRA]
+        costos[i:i + len(desde)] = dijkstra(grafo, directed=False, indices=desde)[:, nodos]
+    return costos
+
+
+def matrices_red(aristas, coords, velocidad):
+    """
+    Matrices de distancia y de tiempo (minutos) entre los polígonos de
+    `coords` ({polígono: (x, y)}) por la red de `aristas`.
+    """
+    m = len(aristas)
+    extremos = np.vstack([
+        aristas[["X1", "Y1"]].to_numpy(dtype=float),
+        aristas[["X2", "Y2"]].to_numpy(dtype=float),
+    ])
+    nodos, inverso = np.unique(extremos, axis=0, return_inverse=True)
+    inverso = inverso.ravel()
+    u, v = inverso[:m], inverso[m:]
+    if "Distancia" in aristas:
+        largo = aristas["Distancia"].to_numpy(dtype=float)
+    else:
+        largo = np.hypot(*(extremos[:m] - extremos[m:]).T)
+
+    # Enganche de cada polígono a su nodo más cercano
+    puntos = np.array(list(coords.values()), dtype=float).reshape(-1, 2)
+    acceso, enganche = cKDTree(nodos).query(puntos)
+    unicos, pos = np.unique(enganche, return_inverse=True)
+
+    def por_poligono(grafo, acceso):
+        red = _entre_nodos(grafo, unicos)[pos][:, pos]
+        matriz = acceso[:, None] + red + acceso[None, :]
+        np.fill_diagonal(matriz, 0)
+        return matriz
+
+    if "Velocidad" in aristas:
+        minutos = largo / aristas["Velocidad"].to_numpy(dtype=float) * 60
+        tiempos = por_poligono(_grafo(u, v, minutos, len(nodos)), acceso / velocidad * 60)
+        # El motor usa las distancias solo para ordenar por cercanía: con
+        # velocidades por tramo se ordena por tiempo (distancia equivalente a
+        # la velocidad general) y basta una pasada de Dijkstra
+        distancias = tiempos * velocidad / 60
+    else:
+        distancias = por_poligono(_grafo(u, v, largo, len(nodos)), acceso)
+        tiempos = distancias / velocidad * 60
+
+    if not np.isfinite(tiempos).all():
+        # Los que no alcanzan al polígono mejor conectado quedan fuera de la red
+        base = np.isfinite(tiempos).sum(axis=1).argmax()
+        aislados = [pid for pid, ok in zip(coords, np.isfinite(tiempos[base])) if not ok]
+        raise ValueError(
+            "La red vial no conecta estos polígonos con el resto: "
+            + ", ".join(map(str, aislados))
+        )
+    return distancias, tiempos
+
+
+def matrices_desde_archivo(ruta, coords, velocidad):
+    """
+    `matrices_red` para el archivo `ruta`, reutilizado mientras no cambien
+    el archivo (fecha y tamaño), la tabla de polígonos ni la velocidad.
+    """
+    estado = Path(ruta).stat()
+    return _matrices_archivo(
+        str(ruta), estado.st_mtime_ns, estado.st_size, tuple(coords.items()), float(velocidad)
+    )
+
+
+@lru_cache(maxsize=8)
+def _matrices_archivo(ruta, mtime_ns, tamano, items, velocidad):
+    distancias, tiempos = matrices_red(leer_red(ruta), dict(items), velocidad)
+    # Compartidas entre ejecuciones: solo lectura
+    distancias.setflags(write=False)
+    tiempos.setflags(write=False)
+    return distancias, tiempos
@@ -0,0 +1,98 @@
+"""
+Zonas de reparto: los polígonos se agrupan por cercanía antes de
+planificar y cada ruta se arma dentro de una sola zona.
+
+Sin zonas, cada parada del planificador voraz busca el siguiente destino
+entre todos los polígonos abiertos del sitio (y, cuando los cercanos ya
+no caben en la jornada, sigue probando cada vez más lejos); el de ahorros
+une rutas de cualquier parte del sitio. Con zonas de `tamano_zona`
+polígonos, la ruta se queda en la zona de su primera parada (el polígono
+abierto más lejano) y cada búsqueda mira solo esa zona. Las rutas pueden
+salir algo más largas; `comparar_zonificacion` mide cuánto.
+
+Métodos: "kmeans" (`scipy.cluster.vq.kmeans2`, zonas compactas aunque la
+densidad de polígonos varíe) y "cuadricula" (celdas cuadradas con, en
+promedio, `tamano_zona` polígonos; más rápido y sin azar).
+"""
+import time
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.vq import kmeans2
+
+from .distancias import construir_matrices
+
+METODOS_ZONA = ("kmeans", "cuadricula")
+
+
+def zonificar(coords, tamano, metodo="kmeans", semilla=0):
+    """
+    Zona de cada polígono (arreglo de enteros 0..k-1 en el orden de
+    `coords`, un arreglo n × 2) con unos `tamano` polígonos por zona.
+    """
+    n = len(coords)
+    k = -(-n // tamano)
+    if k <= 1:
+        return np.zeros(n, dtype=np.int64)
+    if metodo == "cuadricula":
+        minimo = coords.min(axis=0)
+        extension = np.maximum(coords.max(axis=0) - minimo, 1e-9)
+        lado = np.sqrt(extension.prod() / k)
+        celdas = np.floor((coords - minimo) / lado).astype(np.int64)
+    else:
+        _, celdas = kmeans2(coords, k, seed=semilla, minit="++")
+    # Zonas numeradas de forma consecutiva (k-means puede dejar grupos vacíos)
+    _, zonas = np.unique(celdas, axis=0 if celdas.ndim > 1 else None, return_inverse=True)
+    return zonas.ravel()
+
+
+def distancia_rutas(config, df_rutas):
+    """
+    Distancia recorrida por cada ruta (almacén → paradas → almacén) con la
+    matriz de distancias del motor, como Serie alineada con `df_rutas`.
+    """
+    if df_rutas.empty:
+        return pd.Series(dtype=float)
+    distancias, _ = construir_matrices(config.poligonos_coords, config.velocidad, config.red_vial)
+    indice = {pid: i for i, pid in enumerate(config.poligonos_coords)}
+    almacenes = df_rutas["Almacén"] if "Almacén" in df_rutas else [config.almacen] * len(df_rutas)
+    total = []
+    for almacen, detalle in zip(almacenes, df_rutas["Detalle"]):
+        nodos = [indice[almacen], *(indice[pid] for pid, _ in detalle), indice[almacen]]
+        total.append(float(distancias[nodos[:-1], nodos[1:]].sum()))
+    return pd.Series(total, index=df_rutas.index, name="Distancia")
+
+
+def comparar_zonificacion(config):
+    """
+    Corre `config` con y sin zonas y devuelve una tabla con tiempo de
+    simulación, viajes, distancia recorrida, distancia por unidad entregada
+    y fill rate de cada variante. "Distancia extra (%)" compara la
+    distancia por unidad (las dos variantes pueden entregar distinto).
+    """
+    from .motor import calcular_kpis, simular
+
+    filas = []
+    for nombre, variante in (
+        ("Sin zonas", replace(config, tamano_zona=0)),
+        ("Con zonas", config),
+    ):
+        t0 = time.perf_counter()
+        resultados = simular(variante)
+        segundos = time.perf_counter() - t0
+        kpis = calcular_kpis(variante, resultados)
+        distancia = distancia_rutas(variante, resultados.rutas).sum()
+        entregadas = kpis["unidades_entregadas"]
+        filas.append({
+            "Planificación": nombre,
+            "Segundos": segundos,
+            "Viajes": kpis["viajes"],
+            "Distancia": distancia,
+            "Distancia por unidad": distancia / entregadas if entregadas else 0.0,
+            "Fill rate (%)": kpis["fill_rate"],
+        })
+    df = pd.DataFrame(filas)
+    base = df.loc[0, "Distancia por unidad"]
+    df["Distancia extra (%)"] = (df["Distancia por unidad"] / base - 1) * 100 if base else 0.0
+    return df
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ))
+
+from simulacion.escenarios import cargar_escenario  # noqa: E402
+
+EJEMPLO = RAIZ / "escenarios" / "ejemplo_completo.json"
+
+
+@pytest.fixture
+def ejemplo():
+    """ConfigSimulacion del escenario de ejemplo que viene con el repositorio."""
+    return cargar_escenario(EJEMPLO)[1]
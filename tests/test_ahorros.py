@@ -0,0 +1,44 @@
+from dataclasses import replace
+
+import pytest
+
+from simulacion import calcular_kpis, simular
+from simulacion.escenarios import generar_escenario
+from simulacion.motor import MotorSimulacion
+
+
+def planificar(config, punto, planificador):
+    """Viajes y unidades del día de `punto` con `planificador`."""
+    motor = MotorSimulacion(replace(config, planificador=planificador))
+    inventario, demanda, *_ = motor.restaurar(punto)
+    motor.actualizar_inventario(inventario, punto.dia)
+    disponibles = motor.calcular_disponibles(inventario, punto.dia)
+    rutas, entregado = motor.planificar_rutas(punto.dia, disponibles, demanda)
+    return len(rutas), entregado.sum()
+
+
+@pytest.fixture(params=["ejemplo", "amplio"])
+def escenario(request, ejemplo):
+    if request.param == "ejemplo":
+        return ejemplo
+    # Stock de sobra: la flota es lo que limita
+    return generar_escenario(500, 30, 8, 180, semilla=0, espacio_max_almacen=20000)
+
+
+def test_ahorros_no_usa_mas_viajes_para_la_misma_entrega(escenario):
+    motor = MotorSimulacion(escenario)
+    for _ in motor.iterar_dias(cada_control=5):
+        pass
+    for punto in motor.puntos_control:
+        viajes_voraz, unidades_voraz = planificar(escenario, punto, "voraz")
+        viajes, unidades = planificar(escenario, punto, "ahorros")
+        if unidades <= unidades_voraz:
+            assert viajes <= viajes_voraz, punto.dia
+
+
+def test_ahorros_no_usa_mas_viajes_en_la_corrida(escenario):
+    viajes = {}
+    for planificador in ("voraz", "ahorros"):
+        config = replace(escenario, planificador=planificador)
+        viajes[planificador] = calcular_kpis(config, simular(config))["viajes"]
+    assert viajes["ahorros"] <= viajes["voraz"]
@@ -0,0 +1,55 @@
+from dataclasses import replace
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from simulacion import calcular_kpis, simular
+from conftest import RAIZ
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Caché en disco vacía y sin la caché de recursos de otras pruebas
+    monkeypatch.setattr("simulacion.cache.RUTA_CACHE_DISCO", tmp_path / "cache.sqlite")
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    at = AppTest.from_file(str(RAIZ / "App.py"), default_timeout=120)
+    return at.run()
+
+
+def boton(at, texto):
+    return next(b for b in at.button if texto in b.label)
+
+
+def metrica(at, texto):
+    return next(m.value for m in at.metric if texto in m.label)
+
+
+def numero(at, etiqueta):
+    return next(n for n in at.sidebar.number_input if n.label == etiqueta)
+
+
+def mensajes(at):
+    return [s.value for s in at.success]
+
+
+def test_ejecutar_cambiar_parametro_y_volver(app, ejemplo):
+    app.selectbox[0].set_value("Ejemplo Completo").run()
+    assert not mensajes(app)
+
+    boton(app, "Ejecutar simulación").click().run()
+    assert any("Simulación completada" in m for m in mensajes(app))
+    assert metrica(app, "Viajes totales") == str(calcular_kpis(ejemplo, simular(ejemplo))["viajes"])
+
+    # El parámetro del sidebar llega a los resultados; con un horizonte más
+    # corto se re-simula desde un punto de control de la corrida anterior
+    numero(app, "Días totales").set_value(25).run()
+    boton(app, "Ejecutar simulación").click().run()
+    assert any("re-simuló" in m for m in mensajes(app)), mensajes(app)
+    config = replace(ejemplo, dias_totales=25)
+    assert metrica(app, "Viajes totales") == str(calcular_kpis(config, simular(config))["viajes"])
+
+    # Un escenario ya simulado se muestra sin pulsar el botón
+    numero(app, "Días totales").set_value(30).run()
+    assert any("caché" in m for m in mensajes(app))
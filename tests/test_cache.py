@@ -0,0 +1,25 @@
+import hashlib
+import json
+from dataclasses import asdict, replace
+
+from simulacion.cache import CacheLRU, clave_config, simular_con_cache
+
+
+def test_clave_igual_a_la_serializacion_con_asdict(ejemplo):
+    # Las claves guardadas en disco por versiones anteriores siguen valiendo
+    contenido = json.dumps(asdict(ejemplo), ensure_ascii=False, default=str)
+    assert clave_config(ejemplo) == hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def test_clave_cambia_con_la_configuracion(ejemplo):
+    assert clave_config(ejemplo) != clave_config(replace(ejemplo, camiones=2))
+
+
+def test_clave_precalculada(ejemplo):
+    cache = CacheLRU()
+    config = replace(ejemplo, dias_totales=20)
+    clave = clave_config(config)
+    _, desde_cache = simular_con_cache(config, cache, clave=clave)
+    assert not desde_cache and clave in cache
+    _, desde_cache = simular_con_cache(config, cache, clave=clave)
+    assert desde_cache
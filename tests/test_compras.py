@@ -0,0 +1,72 @@
+from dataclasses import replace
+
+import pytest
+from scipy.optimize import milp
+
+from simulacion import calcular_kpis, compras, simular
+from simulacion.escenarios import generar_escenario
+from simulacion.motor import MotorSimulacion
+
+# Horizontes en los que el reparto termina antes del final y almacén grande
+# con pocos camiones (lo que limita es la flota)
+CASOS = {
+    "30_dias": {},
+    "120_dias": {"dias_totales": 120},
+    "365_dias": {"dias_totales": 365},
+    "almacen_grande": {"dias_totales": 120, "espacio_max_almacen": 5000, "camiones": 3},
+}
+
+
+def kpis_por_modo(config):
+    kpis = {}
+    for modo in ("voraz", "optimo"):
+        modo_config = replace(config, modo_compras=modo)
+        kpis[modo] = calcular_kpis(modo_config, simular(modo_config))
+    return kpis
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("caso", list(CASOS))
+def test_optimo_no_empeora_al_voraz(ejemplo, caso):
+    kpis = kpis_por_modo(replace(ejemplo, **CASOS[caso]))
+    assert kpis["optimo"]["fill_rate"] >= kpis["voraz"]["fill_rate"]
+    assert kpis["optimo"]["costo_total"] <= kpis["voraz"]["costo_total"] + 1e-6
+
+
+def test_plan_ahorra_transporte_en_horizonte_largo(ejemplo):
+    config = replace(ejemplo, dias_totales=365, modo_compras="optimo")
+    assert MotorSimulacion(config).planificar_compras() is not None
+    kpis = kpis_por_modo(config)
+    assert kpis["optimo"]["costo_transporte"] < kpis["voraz"]["costo_transporte"]
+
+
+def test_avisa_y_compra_voraz_si_el_plan_entrega_menos(ejemplo):
+    motor = MotorSimulacion(replace(ejemplo, dias_totales=120, modo_compras="optimo"))
+    with pytest.warns(RuntimeWarning, match="modo voraz"):
+        assert motor.planificar_compras() is None
+
+
+def test_avisa_si_el_plan_no_se_probo_optimo(ejemplo, monkeypatch):
+    def detenido(*args, **kwargs):
+        res = milp(*args, **kwargs)
+        if "integrality" in kwargs:
+            res.status, res.message = 1, "Time limit reached."
+        return res
+
+    monkeypatch.setattr(compras, "milp", detenido)
+    motor = MotorSimulacion(replace(ejemplo, modo_compras="optimo"))
+    with pytest.warns(RuntimeWarning, match="no se probó óptimo"):
+        compras.optimizar_compras(
+            motor.demanda_total, motor.costo, motor.max_oferta, motor.config,
+            motor.capacidad_reparto_diaria(),
+        )
+
+
+def test_capacidad_medida_con_el_planificador(ejemplo):
+    # En el ejemplo cada parada llena el camión: limita el espacio
+    motor = MotorSimulacion(ejemplo)
+    assert motor.capacidad_reparto_diaria() == motor._capacidad_ida_y_vuelta()
+    # Con muchas especies de poca demanda por polígono cada viaje hace
+    # varias paradas y la flota no alcanza a repartir el almacén
+    motor = MotorSimulacion(generar_escenario(300, 60, 4, 30, semilla=0))
+    assert motor.capacidad_reparto_diaria() < motor.config.espacio_max_almacen
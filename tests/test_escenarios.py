@@ -0,0 +1,46 @@
+import io
+
+import pandas as pd
+import pytest
+
+from simulacion.escenarios import (
+    COLUMNAS_DEMANDAS,
+    cargar_tabla,
+    leer_demandas,
+    leer_poligonos,
+    leer_proveedores,
+)
+
+
+def test_lee_tablas_con_filas_incompletas():
+    poligonos = pd.DataFrame({"Polígono": [1, 2, None], "X": [0, 1.5, 2], "Y": [0, 2, 3]})
+    demandas = pd.DataFrame({
+        "Especie": ["a", "a", "b", None],
+        "Polígono": ["1", 2, 1, 2],
+        "Demanda": [10, 5, 3, 4],
+    })
+    proveedores = pd.DataFrame({
+        "Proveedor": ["P"], "Especie": ["a"], "Costo": [2], "Max_oferta": [100],
+    })
+    assert leer_poligonos(poligonos) == {1: (0.0, 0.0), 2: (1.5, 2.0)}
+    assert leer_demandas(demandas) == {"a": {1: 10.0, 2: 5.0}, "b": {1: 3.0}}
+    assert leer_proveedores(proveedores) == {"P": {"a": {"costo": 2.0, "max_oferta": 100.0}}}
+
+
+@pytest.mark.parametrize("lector, df", [
+    (leer_poligonos, pd.DataFrame({"Polígono": ["P1"], "X": [0], "Y": [0]})),
+    (leer_demandas, pd.DataFrame({"Especie": ["a"], "Polígono": ["P1"], "Demanda": [1]})),
+    (leer_proveedores, pd.DataFrame(
+        {"Proveedor": ["P"], "Especie": ["a"], "Costo": ["caro"], "Max_oferta": [1]}
+    )),
+])
+def test_valor_no_numerico_da_error_claro(lector, df):
+    with pytest.raises(ValueError, match="no es un número"):
+        lector(df)
+
+
+def test_importacion_con_ids_no_numericos():
+    archivo = io.StringIO("Especie,Polígono,Demanda\nRoble,P1,10\n")
+    archivo.name = "demandas.csv"
+    with pytest.raises(ValueError, match=r"demandas\.csv: Columna 'Polígono': 'P1'"):
+        cargar_tabla(archivo, COLUMNAS_DEMANDAS)
@@ -0,0 +1,31 @@
+from dataclasses import replace
+
+import pyarrow as pa
+
+from simulacion import simular
+from simulacion.exportar import exportar, leer_exportado
+
+
+def esquemas(config, directorio):
+    exportar(config, simular(config), directorio, "arrow")
+    return {nombre: tabla.schema for nombre, tabla in leer_exportado(directorio).items()}
+
+
+def test_esquema_no_depende_de_los_datos(ejemplo, tmp_path):
+    completo = esquemas(ejemplo, tmp_path / "completo")
+    # En 10 días solo se le compra a uno de los proveedores
+    corto = esquemas(replace(ejemplo, dias_totales=10), tmp_path / "corto")
+    assert completo == corto
+
+    compras = completo["compras"]
+    assert compras.field("Costo compra").type == pa.float64()
+    assert compras.field("Costo transporte").type == pa.float64()
+    proveedores = leer_exportado(tmp_path / "corto")["compras"].to_pandas()["Proveedor"]
+    assert proveedores.nunique() == 1
+    assert list(proveedores.cat.categories) == list(ejemplo.demandas_oferta)
+
+
+def test_tablas_vacias_con_esquema(ejemplo, tmp_path):
+    vacio = esquemas(replace(ejemplo, dias_totales=1), tmp_path / "vacio")
+    completo = esquemas(ejemplo, tmp_path / "completo")
+    assert {n: s.names for n, s in vacio.items()} == {n: s.names for n, s in completo.items()}
@@ -0,0 +1,24 @@
+import pandas as pd
+import pytest
+
+from simulacion import calcular_kpis, simular
+from simulacion.flujo import simular_en_flujo
+
+
+def test_kpis_sin_armar_tablas(ejemplo):
+    for _, acumulado in simular_en_flujo(ejemplo):
+        pass
+    esperado = calcular_kpis(ejemplo, simular(ejemplo))
+    assert acumulado.kpis() == pytest.approx(esperado)
+
+
+def test_bloques_en_disco_dan_las_mismas_tablas(ejemplo, tmp_path):
+    for _, acumulado in simular_en_flujo(ejemplo, directorio=tmp_path, filas_por_bloque=7):
+        pass
+    assert list(tmp_path.glob("*.pkl"))
+    with acumulado:
+        resultados = acumulado.resultados()
+    for df, esperado in zip(resultados, simular(ejemplo)):
+        pd.testing.assert_frame_equal(df, esperado, check_dtype=False)
+    # Al salir del contexto los bloques se borran
+    assert not list(tmp_path.glob("*.pkl"))
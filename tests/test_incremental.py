@@ -0,0 +1,81 @@
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from simulacion import simular
+from simulacion.cache import CacheLRU
+from simulacion.incremental import resimular, simular_con_puntos, simular_o_reanudar
+
+
+def assert_mismos_resultados(resultados, esperado):
+    for df, df_esperado in zip(resultados, esperado):
+        pd.testing.assert_frame_equal(
+            df.reset_index(drop=True), df_esperado.reset_index(drop=True), check_dtype=False
+        )
+
+
+@pytest.fixture
+def corrida(ejemplo):
+    return simular_con_puntos(ejemplo, cada=2)
+
+
+CAMBIOS = {
+    "camiones": lambda c: {"camiones": c.camiones + 1},
+    "costo_transporte": lambda c: {"costo_transporte": c.costo_transporte * 2},
+    "dias_totales": lambda c: {"dias_totales": c.dias_totales - 5},
+    "demanda": lambda c: {"demanda_poligonos": {
+        esp: {pid: d * 2 for pid, d in dem.items()} if i == 0 else dem
+        for i, (esp, dem) in enumerate(c.demanda_poligonos.items())
+    }},
+    "aclimatacion": lambda c: {"aclimatacion_min_dias": c.aclimatacion_min_dias + 2},
+    "almacenes": lambda c: {"almacenes": {c.almacen: 1000, 5: 800}},
+    "optimo": lambda c: {"modo_compras": "optimo"},
+    # El orden de las tablas desempata rutas y compras
+    "orden_poligonos": lambda c: {"poligonos_coords": invertido(c.poligonos_coords)},
+    "orden_demanda": lambda c: {"demanda_poligonos": {
+        esp: invertido(dem) if i == 0 else dem
+        for i, (esp, dem) in enumerate(c.demanda_poligonos.items())
+    }},
+    "orden_proveedores": lambda c: {"demandas_oferta": invertido(c.demandas_oferta)},
+}
+
+
+def invertido(tabla):
+    return dict(reversed(tabla.items()))
+
+
+@pytest.mark.parametrize("cambio", CAMBIOS)
+def test_resimular_igual_a_corrida_completa(ejemplo, corrida, cambio):
+    config = replace(ejemplo, **CAMBIOS[cambio](ejemplo))
+    assert_mismos_resultados(resimular(corrida, config).resultados, simular(config))
+
+
+@pytest.mark.parametrize("cambio", ["orden_poligonos", "orden_demanda"])
+def test_reanudar_tras_reordenar_igual_a_corrida_completa(ejemplo, cambio):
+    cache = CacheLRU()
+    _, corrida, _ = simular_o_reanudar(ejemplo, cache)
+    config = replace(ejemplo, **CAMBIOS[cambio](ejemplo))
+    resultados, _, desde = simular_o_reanudar(config, cache, corrida)
+    assert desde == 0
+    assert_mismos_resultados(resultados, simular(config))
+
+
+@pytest.mark.parametrize("cambio", ["aclimatacion", "almacenes", "optimo", "orden_proveedores"])
+def test_desde_rechaza_cambios_incompatibles(ejemplo, corrida, cambio):
+    config = replace(ejemplo, **CAMBIOS[cambio](ejemplo))
+    with pytest.raises(ValueError, match="mitad de la corrida"):
+        resimular(corrida, config, desde=12)
+
+
+def test_desde_igual_a_cambiar_sin_puntos_intermedios(ejemplo, corrida):
+    config = replace(ejemplo, camiones=ejemplo.camiones + 1)
+    con_puntos = resimular(corrida, config, desde=12)
+    # Solo con el punto del día 0: se simula todo, cambiando el día 12
+    sin_puntos = resimular(simular_con_puntos(ejemplo, cada=1000), config, desde=12)
+    assert con_puntos.desde == 12 and sin_puntos.desde == 0
+    assert_mismos_resultados(con_puntos.resultados, sin_puntos.resultados)
+
+    # Tras un cambio desde un día, lo incompatible tampoco se puede re-simular
+    with pytest.raises(ValueError, match="mitad de la corrida"):
+        resimular(con_puntos, replace(config, aclimatacion_min_dias=5))
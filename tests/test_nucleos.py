@@ -0,0 +1,36 @@
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from simulacion import simular
+from simulacion.escenarios import generar_escenario
+
+CASOS = {
+    "ejemplo": {},
+    "ahorros": {"planificador": "ahorros", "camiones": 2},
+    "sin_aclimatacion": {"aclimatacion_min_dias": 0, "dias_totales": 60, "espacio_max_almacen": 3000},
+    # En 30 días el plan entrega menos que comprar voraz y no se usa
+    "optimo": {"modo_compras": "optimo", "dias_totales": 365},
+}
+
+
+def assert_mismos_resultados(config):
+    diario = simular(replace(config, nucleo="dias"))
+    eventos = simular(replace(config, nucleo="eventos"))
+    for df, esperado in zip(eventos, diario):
+        # El detalle de rutas son listas de tuplas: se compara como texto
+        pd.testing.assert_frame_equal(
+            df.reset_index(drop=True).astype(str), esperado.reset_index(drop=True).astype(str)
+        )
+
+
+@pytest.mark.parametrize("caso", CASOS)
+def test_eventos_igual_a_dias(ejemplo, caso):
+    assert_mismos_resultados(replace(ejemplo, **CASOS[caso]))
+
+
+@pytest.mark.parametrize("planificador", ["voraz", "ahorros"])
+def test_eventos_igual_a_dias_en_escenario_generado(planificador):
+    config = generar_escenario(60, 8, 4, 120, semilla=1, planificador=planificador)
+    assert_mismos_resultados(config)
@@ -0,0 +1,16 @@
+import pandas as pd
+
+from simulacion.barrido import ejecutar_barrido
+from simulacion.montecarlo import ejecutar_montecarlo
+
+
+def test_pool_da_lo_mismo_que_en_serie(ejemplo):
+    valores = {"capacidad_camion": [400, 600]}
+    pd.testing.assert_frame_equal(
+        ejecutar_barrido(ejemplo, valores, procesos=2),
+        ejecutar_barrido(ejemplo, valores, procesos=1),
+    )
+    pd.testing.assert_frame_equal(
+        ejecutar_montecarlo(ejemplo, 2, cv_demanda=0.1, procesos=2),
+        ejecutar_montecarlo(ejemplo, 2, cv_demanda=0.1, procesos=1),
+    )